@@ -7,6 +7,7 @@ from alembic import context
 
 from app.config import settings
 from app.database import Base
+import app.models  # noqa: F401 - register every table on Base.metadata
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,202 @@
+"""baseline schema
+
+The schema exactly as create_tables() built it before migrations were
+versioned. Databases that already have it (created by create_tables()) are
+adopted as-is: the revision only records itself, and 0001a brings them up
+to date.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 10:12:25.954510
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("complaints"):
+        return  # created earlier by create_tables()
+    sqlite = bind.dialect.name == "sqlite"
+
+    op.create_table('tenants',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('config', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('tenant_id', sa.String(length=36), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('phone', sa.String(length=50), nullable=True),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=True),
+    sa.Column('department_id', sa.String(length=36), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('departments',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('tenant_id', sa.String(length=36), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('category_mapping', sa.JSON(), nullable=True),
+    sa.Column('head_officer_id', sa.String(length=36), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['head_officer_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # users <-> departments reference each other; close the cycle once both exist
+    if sqlite:
+        with op.batch_alter_table('users') as batch:
+            batch.create_foreign_key('fk_users_department_id', 'departments', ['department_id'], ['id'])
+    else:
+        op.create_foreign_key('fk_users_department_id', 'users', 'departments', ['department_id'], ['id'])
+    op.create_table('complaints',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('tenant_id', sa.String(length=36), nullable=True),
+    sa.Column('tracking_id', sa.String(length=20), nullable=False),
+    sa.Column('citizen_email', sa.String(length=255), nullable=False),
+    sa.Column('citizen_phone', sa.String(length=50), nullable=True),
+    sa.Column('citizen_name', sa.String(length=255), nullable=True),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=30), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=True),
+    sa.Column('subcategory', sa.String(length=100), nullable=True),
+    sa.Column('priority_score', sa.Integer(), nullable=True),
+    sa.Column('risk_level', sa.String(length=20), nullable=True),
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('address', sa.String(length=500), nullable=True),
+    sa.Column('ward', sa.String(length=100), nullable=True),
+    sa.Column('block', sa.String(length=100), nullable=True),
+    sa.Column('district', sa.String(length=100), nullable=True),
+    sa.Column('state', sa.String(length=100), nullable=True),
+    sa.Column('classification_confidence', sa.Float(), nullable=True),
+    sa.Column('ai_analysis', sa.JSON(), nullable=True),
+    sa.Column('satisfaction_rating', sa.Integer(), nullable=True),
+    sa.Column('satisfaction_comment', sa.Text(), nullable=True),
+    sa.Column('verified_fixed', sa.Boolean(), nullable=True),
+    sa.Column('reopen_count', sa.Integer(), nullable=False),
+    sa.Column('email_draft', sa.Text(), nullable=True),
+    sa.Column('email_approved', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_complaints_citizen_email'), 'complaints', ['citizen_email'], unique=False)
+    op.create_index(op.f('ix_complaints_tracking_id'), 'complaints', ['tracking_id'], unique=True)
+    op.create_table('contractors',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('tenant_id', sa.String(length=36), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('specializations', sa.JSON(), nullable=True),
+    sa.Column('rating', sa.Float(), nullable=False),
+    sa.Column('active_workload', sa.Integer(), nullable=False),
+    sa.Column('zone', sa.String(length=100), nullable=True),
+    sa.Column('phone', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('complaint_media',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('complaint_id', sa.String(length=36), nullable=False),
+    sa.Column('file_path', sa.String(length=500), nullable=False),
+    sa.Column('media_type', sa.String(length=20), nullable=False),
+    sa.Column('original_filename', sa.String(length=255), nullable=True),
+    sa.Column('extracted_text', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaints.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('escalations',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('complaint_id', sa.String(length=36), nullable=False),
+    sa.Column('from_level', sa.String(length=50), nullable=False),
+    sa.Column('to_level', sa.String(length=50), nullable=False),
+    sa.Column('reason', sa.Text(), nullable=False),
+    sa.Column('escalated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaints.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('notifications',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('complaint_id', sa.String(length=36), nullable=True),
+    sa.Column('recipient_email', sa.String(length=255), nullable=False),
+    sa.Column('notification_type', sa.String(length=20), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('is_sent', sa.Boolean(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaints.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('work_orders',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('complaint_id', sa.String(length=36), nullable=False),
+    sa.Column('tenant_id', sa.String(length=36), nullable=True),
+    sa.Column('contractor_id', sa.String(length=36), nullable=True),
+    sa.Column('officer_id', sa.String(length=36), nullable=True),
+    sa.Column('status', sa.String(length=30), nullable=False),
+    sa.Column('sla_deadline', sa.DateTime(), nullable=True),
+    sa.Column('estimated_cost', sa.Float(), nullable=True),
+    sa.Column('materials', sa.Text(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('completion_photo', sa.String(length=500), nullable=True),
+    sa.ForeignKeyConstraint(['complaint_id'], ['complaints.id'], ),
+    sa.ForeignKeyConstraint(['contractor_id'], ['contractors.id'], ),
+    sa.ForeignKeyConstraint(['officer_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('daily_briefings',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('tenant_id', sa.String(length=36), nullable=True),
+    sa.Column('brief_date', sa.DateTime(), nullable=False),
+    sa.Column('new_complaints', sa.Integer(), nullable=False),
+    sa.Column('resolved_today', sa.Integer(), nullable=False),
+    sa.Column('sla_at_risk', sa.Integer(), nullable=False),
+    sa.Column('escalations_today', sa.Integer(), nullable=False),
+    sa.Column('clusters_detected', sa.Integer(), nullable=False),
+    sa.Column('narrative', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_briefings')
+    op.drop_table('work_orders')
+    op.drop_table('notifications')
+    op.drop_table('escalations')
+    op.drop_table('complaint_media')
+    op.drop_table('contractors')
+    op.drop_index(op.f('ix_complaints_tracking_id'), table_name='complaints')
+    op.drop_index(op.f('ix_complaints_citizen_email'), table_name='complaints')
+    op.drop_table('complaints')
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint('fk_users_department_id', 'users', type_='foreignkey')
+    op.drop_table('departments')
+    op.drop_table('users')
+    op.drop_table('tenants')
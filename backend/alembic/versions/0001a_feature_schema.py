@@ -0,0 +1,147 @@
+"""feature schema
+
+Tables and columns added on top of the baseline: resumable upload sessions,
+the geocode cache and retry queue, the KV store, canonical location codes,
+SLA milestone state, completion photo hashes and the notification outbox.
+
+Every step checks the live schema first. A database adopted by 0001 gets
+whatever it is missing, while one that create_tables() built from the
+current models already has everything and is left alone.
+
+Existing notifications become ``sent`` or ``failed`` (from is_sent), never
+``pending``, so the outbox dispatcher does not resend old mail. Existing
+complaints get their state/district codes from backfill_location_codes.py.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-19 18:05:41.220816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, SQL expression that fills existing rows before NOT NULL is applied)
+COLUMNS = [
+    ('complaints', sa.Column('state_code', sa.String(length=64), nullable=True), None),
+    ('complaints', sa.Column('district_code', sa.String(length=128), nullable=True), None),
+    ('work_orders', sa.Column('sla_warned_50', sa.Boolean(), server_default=sa.false(), nullable=False), None),
+    ('work_orders', sa.Column('sla_warned_75', sa.Boolean(), server_default=sa.false(), nullable=False), None),
+    ('work_orders', sa.Column('escalated_at', sa.DateTime(), nullable=True), None),
+    ('work_orders', sa.Column('next_milestone_at', sa.DateTime(), nullable=True), None),
+    ('work_orders', sa.Column('completion_photo_hash', sa.String(length=64), nullable=True), None),
+    ('notifications', sa.Column('body', sa.Text(), nullable=True), None),
+    ('notifications', sa.Column('status', sa.String(length=20), nullable=False),
+     "CASE WHEN is_sent THEN 'sent' ELSE 'failed' END"),
+    ('notifications', sa.Column('attempts', sa.Integer(), nullable=False), "0"),
+    ('notifications', sa.Column('next_attempt_at', sa.DateTime(), nullable=True), None),
+    ('notifications', sa.Column('last_error', sa.Text(), nullable=True), None),
+]
+
+# (name, table, columns)
+INDEXES = [
+    ('ix_complaints_state_code', 'complaints', ['state_code']),
+    ('ix_complaints_district_code', 'complaints', ['district_code']),
+    ('ix_work_orders_next_milestone_at', 'work_orders', ['next_milestone_at']),
+    ('ix_work_orders_completion_photo_hash', 'work_orders', ['completion_photo_hash']),
+    ('ix_notifications_status_next_attempt', 'notifications', ['status', 'next_attempt_at']),
+]
+
+
+def _create_tables(existing: set) -> None:
+    if 'geocode_cache' not in existing:
+        op.create_table('geocode_cache',
+        sa.Column('geohash', sa.String(length=12), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('is_negative', sa.Boolean(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('geohash')
+        )
+        op.create_index(op.f('ix_geocode_cache_expires_at'), 'geocode_cache', ['expires_at'], unique=False)
+    if 'kv_entries' not in existing:
+        op.create_table('kv_entries',
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+        )
+        op.create_index(op.f('ix_kv_entries_expires_at'), 'kv_entries', ['expires_at'], unique=False)
+    if 'upload_sessions' not in existing:
+        op.create_table('upload_sessions',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('original_filename', sa.String(length=255), nullable=True),
+        sa.Column('media_type', sa.String(length=20), nullable=False),
+        sa.Column('total_size', sa.BigInteger(), nullable=False),
+        sa.Column('received', sa.BigInteger(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=True),
+        sa.Column('complaint_id', sa.String(length=36), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_upload_sessions_expires_at'), 'upload_sessions', ['expires_at'], unique=False)
+    if 'geocode_retries' not in existing:
+        op.create_table('geocode_retries',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('complaint_id', sa.String(length=36), nullable=False),
+        sa.Column('tenant_id', sa.String(length=36), nullable=True),
+        sa.Column('latitude', sa.Float(), nullable=False),
+        sa.Column('longitude', sa.Float(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['complaint_id'], ['complaints.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('complaint_id')
+        )
+        op.create_index(op.f('ix_geocode_retries_next_attempt_at'), 'geocode_retries', ['next_attempt_at'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    _create_tables(set(inspector.get_table_names()))
+
+    for table, column, fill in COLUMNS:
+        if column.name in {c['name'] for c in inspector.get_columns(table)}:
+            continue
+        if fill is None:
+            op.add_column(table, column)
+            continue
+        # Add nullable, fill existing rows, then tighten; SQLite rebuilds the table for the last step
+        op.add_column(table, sa.Column(column.name, column.type, nullable=True))
+        op.execute(f"UPDATE {table} SET {column.name} = {fill}")
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(column.name, existing_type=column.type, nullable=False)
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for table in ('notifications', 'work_orders', 'complaints'):
+        with op.batch_alter_table(table) as batch:
+            for column_table, column, _ in reversed(COLUMNS):
+                if column_table == table:
+                    batch.drop_column(column.name)
+    op.drop_index(op.f('ix_geocode_retries_next_attempt_at'), table_name='geocode_retries')
+    op.drop_table('geocode_retries')
+    op.drop_index(op.f('ix_upload_sessions_expires_at'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
+    op.drop_index(op.f('ix_kv_entries_expires_at'), table_name='kv_entries')
+    op.drop_table('kv_entries')
+    op.drop_index(op.f('ix_geocode_cache_expires_at'), table_name='geocode_cache')
+    op.drop_table('geocode_cache')
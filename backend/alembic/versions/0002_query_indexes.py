@@ -0,0 +1,75 @@
+"""query indexes
+
+Composite and partial indexes for the hot query shapes: admin listings
+(tenant + status/category/risk, newest first), analytics and dashboard
+GROUP BYs, the SLA sweep and briefing counts, cluster detection, eager
+loads by complaint_id and the notification digest lookup.
+
+On Postgres each index is built CONCURRENTLY outside a transaction, so
+the tables stay writable while it runs. A build that fails part-way leaves
+an INVALID index behind; drop it and re-run the upgrade.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-19 10:13:10.257568
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CLUSTERABLE = "status IN ('submitted', 'validated', 'classified', 'routed')"
+RESOLVED = "status IN ('resolved', 'closed')"
+ACTIVE_WORK_ORDER = "status IN ('created', 'assigned', 'in_progress')"
+
+# (name, table, columns, partial-index predicate)
+INDEXES = [
+    ('ix_complaints_tenant_created', 'complaints', ['tenant_id', 'created_at'], None),
+    ('ix_complaints_tenant_status_created', 'complaints', ['tenant_id', 'status', 'created_at'], None),
+    ('ix_complaints_tenant_category_created', 'complaints', ['tenant_id', 'category', 'created_at'], None),
+    ('ix_complaints_tenant_risk_created', 'complaints', ['tenant_id', 'risk_level', 'created_at'], None),
+    ('ix_complaints_created_at', 'complaints', ['created_at'], None),
+    ('ix_complaints_resolved_updated', 'complaints', ['updated_at'], RESOLVED),
+    ('ix_complaints_clusterable', 'complaints', ['category', 'created_at'], CLUSTERABLE),
+    ('ix_complaint_media_complaint_id', 'complaint_media', ['complaint_id'], None),
+    ('ix_work_orders_complaint_id', 'work_orders', ['complaint_id'], None),
+    ('ix_work_orders_tenant_created', 'work_orders', ['tenant_id', 'created_at'], None),
+    ('ix_work_orders_tenant_status_created', 'work_orders', ['tenant_id', 'status', 'created_at'], None),
+    ('ix_work_orders_active_sla', 'work_orders', ['sla_deadline'], ACTIVE_WORK_ORDER),
+    ('ix_work_orders_tenant_completed', 'work_orders', ['tenant_id', 'completed_at'], "completed_at IS NOT NULL"),
+    ('ix_escalations_complaint_id', 'escalations', ['complaint_id'], None),
+    ('ix_escalations_escalated_at', 'escalations', ['escalated_at'], None),
+    ('ix_notifications_complaint_id', 'notifications', ['complaint_id'], None),
+    ('ix_notifications_pending_recipient', 'notifications', ['recipient_email'], "status = 'pending'"),
+    ('ix_users_email', 'users', ['email'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgres = op.get_bind().dialect.name == "postgresql"
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            predicate = sa.text(where) if where else None
+            op.create_index(
+                name, table, columns, unique=False, if_not_exists=True,
+                postgresql_concurrently=postgres,
+                postgresql_where=predicate, sqlite_where=predicate,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    postgres = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=postgres)
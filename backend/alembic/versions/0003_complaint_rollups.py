@@ -0,0 +1,60 @@
+"""complaint rollups
+
+Per-bucket complaint counts (tenant, day filed, state, district, category,
+status, risk level) that the analytics, public dashboard and briefing read
+instead of grouping the complaints table. Kept current by the listener in
+app/services/rollups.py; the table is filled here from existing complaints.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 15:42:08.613204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+    INSERT INTO complaint_rollups
+        (tenant_id, day, state_code, district_code, category, status, risk_level, count)
+    SELECT COALESCE(tenant_id, ''), DATE(created_at), COALESCE(state_code, ''),
+           COALESCE(district_code, ''), COALESCE(category, ''), status,
+           COALESCE(risk_level, ''), COUNT(*)
+    FROM complaints
+    GROUP BY COALESCE(tenant_id, ''), DATE(created_at), COALESCE(state_code, ''),
+             COALESCE(district_code, ''), COALESCE(category, ''), status,
+             COALESCE(risk_level, '')
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("complaint_rollups"):
+        op.create_table('complaint_rollups',
+        sa.Column('tenant_id', sa.String(length=36), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('state_code', sa.String(length=64), nullable=False),
+        sa.Column('district_code', sa.String(length=128), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=30), nullable=False),
+        sa.Column('risk_level', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'day', 'state_code', 'district_code', 'category', 'status', 'risk_level')
+        )
+    # A dev database may already have the (empty) table from create_tables()
+    if bind.execute(sa.text("SELECT COUNT(*) FROM complaint_rollups")).scalar() == 0:
+        op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('complaint_rollups')
@@ -4,11 +4,14 @@ Collects stats, uses Gemini to write a readable brief for the village officer,
 stores it in the daily_briefings table, and exposes via /admin/briefing endpoint.
 """
 from datetime import datetime, timezone, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
-async def generate_daily_briefing(db: Session):
+async def generate_daily_briefing(db: AsyncSession):
     from app.models.complaint import Complaint
+    from app.models.complaint_rollup import ComplaintRollup
+    from app.services.rollups import RESOLVED_STATUSES
     from app.models.work_order import WorkOrder
     from app.models.escalation import Escalation
     from app.models.daily_briefing import DailyBriefing
@@ -18,42 +21,46 @@ async def generate_daily_briefing(db: Session):
     sla_warning_cutoff = now + timedelta(hours=12)
 
     # --- Collect stats ---
-    new_complaints = db.query(Complaint).filter(
-        Complaint.created_at >= today_start
-    ).count()
+    # Filing counts come from the rollup buckets (day = UTC filing date)
+    new_complaints = await db.scalar(select(func.coalesce(func.sum(ComplaintRollup.count), 0)).where(
+        ComplaintRollup.day == now.date()
+    ))
 
-    resolved_today = db.query(Complaint).filter(
+    resolved_today = await db.scalar(select(func.count(Complaint.id)).where(
         Complaint.status.in_(["resolved", "closed"]),
         Complaint.updated_at >= today_start,
-    ).count()
+    ))
 
     # SLA at risk = work orders whose deadline is within 12 hours and not done
-    active_wos = db.query(WorkOrder).filter(
+    active_deadlines = await db.scalars(select(WorkOrder.sla_deadline).where(
         WorkOrder.status.in_(["created", "assigned", "in_progress"]),
         WorkOrder.sla_deadline.isnot(None),
-    ).all()
+    ))
     sla_at_risk = 0
-    for wo in active_wos:
-        deadline = wo.sla_deadline
+    for deadline in active_deadlines:
         if deadline and deadline.tzinfo is None:
             deadline = deadline.replace(tzinfo=timezone.utc)
         if deadline and deadline <= sla_warning_cutoff:
             sla_at_risk += 1
 
-    escalations_today = db.query(Escalation).filter(
+    escalations_today = await db.scalar(select(func.count(Escalation.id)).where(
         Escalation.escalated_at >= today_start
-    ).count()
+    ))
 
     # Category breakdown for context
-    open_complaints = db.query(Complaint).filter(
-        Complaint.status.not_in(["resolved", "closed"])
-    ).all()
+    open_by_category = await db.execute(
+        select(ComplaintRollup.category, func.sum(ComplaintRollup.count))
+        .where(ComplaintRollup.status.not_in(RESOLVED_STATUSES))
+        .group_by(ComplaintRollup.category)
+    )
     category_counts: dict[str, int] = {}
-    for c in open_complaints:
-        cat = c.category or "UNKNOWN"
-        category_counts[cat] = category_counts.get(cat, 0) + 1
+    for cat, count in open_by_category:
+        if not count:
+            continue
+        cat = cat or "UNKNOWN"
+        category_counts[cat] = category_counts.get(cat, 0) + count
 
-    total_open = len(open_complaints)
+    total_open = sum(category_counts.values())
 
     # --- Build prompt for Gemini ---
     stats_text = (
@@ -77,8 +84,7 @@ async def generate_daily_briefing(db: Session):
         narrative=narrative,
     )
     db.add(briefing)
-    db.commit()
-    db.refresh(briefing)
+    await db.commit()
     print(f"[BriefingAgent] Daily brief generated for {now.strftime('%d %B %Y')}")
     return briefing
 
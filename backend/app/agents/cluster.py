@@ -4,7 +4,10 @@ creates a grouped work order covering all complaints in the cluster.
 Runs on a schedule (e.g. every hour or daily).
 """
 from datetime import datetime, timezone, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import admin_events
 
 
 CLUSTER_THRESHOLD = 3          # min complaints to form a cluster
@@ -12,16 +15,16 @@ GEO_PRECISION = 2              # decimal places for lat/lng bucketing (~1 km gri
 LOOKBACK_DAYS = 7              # only look at recent unresolved complaints
 
 
-async def run_cluster_detection(db: Session):
+async def run_cluster_detection(db: AsyncSession):
     from app.models.complaint import Complaint
     from app.models.work_order import WorkOrder
 
     since = datetime.now(timezone.utc) - timedelta(days=LOOKBACK_DAYS)
-    open_complaints = db.query(Complaint).filter(
+    open_complaints = await db.scalars(select(Complaint).where(
         Complaint.status.in_(["submitted", "validated", "classified", "routed"]),
         Complaint.created_at >= since,
         Complaint.category.isnot(None),
-    ).all()
+    ))
 
     # Bucket complaints by category + geo cell
     buckets: dict[str, list[Complaint]] = {}
@@ -38,10 +41,10 @@ async def run_cluster_detection(db: Session):
 
         # Check if a cluster work order already exists for this group
         complaint_ids = [c.id for c in complaints]
-        existing_cluster_wo = db.query(WorkOrder).filter(
+        existing_cluster_wo = await db.scalar(select(WorkOrder.id).where(
             WorkOrder.complaint_id.in_(complaint_ids),
             WorkOrder.notes.like("%[CLUSTER]%"),
-        ).first()
+        ).limit(1))
         if existing_cluster_wo:
             continue  # already handled
 
@@ -56,12 +59,13 @@ async def run_cluster_detection(db: Session):
         )
 
         # Find best contractor for this cluster
-        contractor = _find_cluster_contractor(db, complaints[0].tenant_id, category, district)
+        contractor = await _find_cluster_contractor(db, complaints[0].tenant_id, category, district)
 
         # Create a single work order on the highest-priority complaint
         anchor = max(complaints, key=lambda c: c.priority_score or 0)
 
         from app.models.work_order import WorkOrder as WO
+        from app.agents.tracker import next_sla_milestone
         wo = WO(
             complaint_id=anchor.id,
             tenant_id=anchor.tenant_id,
@@ -71,32 +75,37 @@ async def run_cluster_detection(db: Session):
             estimated_cost=_estimate_cluster_cost(category, len(complaints)),
             notes=cluster_summary,
         )
+        wo.next_milestone_at = next_sla_milestone(wo)
         db.add(wo)
 
         # Mark all complaints in cluster as "grouped"
+        deltas = admin_events.work_order_deltas(None, wo.status)
         for c in complaints:
             if c.status not in ("assigned", "in_progress", "resolved", "closed"):
+                before = admin_events.complaint_state(c)
                 c.status = "grouped"
+                admin_events.complaint_deltas(before, admin_events.complaint_state(c), deltas)
 
         if contractor:
-            from app.models.contractor import Contractor
-            c = db.query(Contractor).filter(Contractor.id == contractor.id).first()
-            if c:
-                c.active_workload = (c.active_workload or 0) + 1
+            contractor.active_workload = (contractor.active_workload or 0) + 1
 
-        db.commit()
+        await db.commit()
         clusters_created += 1
+        await admin_events.publish(anchor.tenant_id, "cluster.created", {
+            "work_order_id": wo.id, "category": category, "district": district,
+            "complaint_ids": complaint_ids, "contractor_id": wo.contractor_id,
+        }, deltas)
         print(f"[ClusterAgent] Created cluster work order for {len(complaints)} {category} complaints in {district}")
 
     print(f"[ClusterAgent] Done. Clusters created: {clusters_created}")
     return clusters_created
 
 
-def _find_cluster_contractor(db, tenant_id, category, district):
+async def _find_cluster_contractor(db, tenant_id, category, district):
     from app.models.contractor import Contractor
-    contractors = db.query(Contractor).filter(
+    contractors = (await db.scalars(select(Contractor).where(
         Contractor.tenant_id == tenant_id
-    ).all()
+    ))).all()
     if not contractors:
         return None
     scored = []
@@ -1,7 +1,10 @@
+import asyncio
+
 from app.agents.base import BaseAgent, PipelineContext
 from app.services.media import media_service
 from app.services.geocoding import geocoding_service
 from app.services.llm import llm_service
+from app.utils.locations import normalize_location
 
 
 class IntakeAgent(BaseAgent):
@@ -33,6 +36,16 @@ class IntakeAgent(BaseAgent):
                 except Exception as e:
                     self.log(f"Image analysis failed: {e}")
 
+            elif media.get("media_type") == "video":
+                try:
+                    text = await self._analyze_video(media["file_path"])
+                    if text:
+                        media_texts.append(f"[Video analysis: {text}]")
+                        media["extracted_text"] = text
+                        self.log(f"Video analyzed: {text[:80]}...")
+                except Exception as e:
+                    self.log(f"Video analysis failed: {e}")
+
         full_description = description
         if media_texts:
             full_description += "\n\nVoice transcription: " + " ".join(media_texts)
@@ -41,7 +54,9 @@ class IntakeAgent(BaseAgent):
         lat = raw.get("latitude")
         lon = raw.get("longitude")
         if lat and lon:
-            location_data = await geocoding_service.reverse_geocode(lat, lon)
+            location_data = await geocoding_service.reverse_geocode(
+                lat, lon, tenant_id=context.tenant_id, need_address=not raw.get("address"),
+            )
 
         context.data["description"] = full_description
         context.data["citizen_email"] = raw.get("citizen_email", "")
@@ -54,9 +69,28 @@ class IntakeAgent(BaseAgent):
         context.data["block"] = location_data.get("block", "")
         context.data["district"] = location_data.get("district", "")
         context.data["state"] = location_data.get("state", "")
+        context.data.update(normalize_location(
+            state=context.data["state"], district=context.data["district"],
+            city=location_data.get("city"), address=context.data["address"],
+        ))
+        context.data["geocode_pending"] = bool(location_data) and not location_data.get("resolved", True)
         context.data["media_files"] = raw.get("media_files", [])
         context.data["media_texts"] = media_texts
         context.data["intake_complete"] = True
         context.status = "intake_complete"
         self.log(f"Intake complete. Description length: {len(full_description)}")
         return context
+
+    async def _analyze_video(self, file_path: str) -> str:
+        # Only a handful of sampled frames are sent to the model, never the video itself
+        frames = await media_service.extract_keyframes(file_path)
+        try:
+            results = await asyncio.gather(*(llm_service.analyze_image(f) for f in frames))
+        finally:
+            await media_service.discard_keyframes(frames)
+        findings = [
+            f"Frame {i + 1}: {text}" for i, text in enumerate(results)
+            if text and "No infrastructure issues" not in text and not text.startswith("[Image analysis failed")
+        ]
+        self.log(f"Video sampled into {len(frames)} keyframes, {len(findings)} with findings")
+        return " ".join(findings)
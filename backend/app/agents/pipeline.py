@@ -1,5 +1,5 @@
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.base import BaseAgent, PipelineContext
 
 
@@ -10,7 +10,7 @@ class ComplaintPipeline:
     def add_agent(self, agent: BaseAgent):
         self.agents.append(agent)
 
-    async def run(self, context: PipelineContext, db: Optional[Session] = None) -> PipelineContext:
+    async def run(self, context: PipelineContext, db: Optional[AsyncSession] = None) -> PipelineContext:
         for agent in self.agents:
             try:
                 agent.log(f"Processing complaint {context.complaint_id}")
@@ -1,5 +1,6 @@
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents.base import BaseAgent, PipelineContext
 from app.models.department import Department
@@ -25,7 +26,7 @@ class RoutingAgent(BaseAgent):
     def __init__(self):
         super().__init__(name="RoutingAgent")
 
-    async def process(self, context: PipelineContext, db: Optional[Session] = None) -> PipelineContext:
+    async def process(self, context: PipelineContext, db: Optional[AsyncSession] = None) -> PipelineContext:
         category = context.data.get("category", "UNKNOWN")
         tenant_id = context.tenant_id
         dept_name = CATEGORY_DEPARTMENT_MAP.get(category, "General Administration")
@@ -33,10 +34,10 @@ class RoutingAgent(BaseAgent):
         contractor = None
 
         if db and tenant_id:
-            department = db.query(Department).filter(
+            department = await db.scalar(select(Department).where(
                 Department.tenant_id == tenant_id, Department.name == dept_name
-            ).first()
-            contractor = self._find_best_contractor(db, tenant_id, category, context.data.get("district"))
+            ).limit(1))
+            contractor = await self._find_best_contractor(db, tenant_id, category, context.data.get("district"))
 
         context.routing = {
             "department_name": dept_name,
@@ -53,8 +54,8 @@ class RoutingAgent(BaseAgent):
         self.log(f"Routed to {dept_name}, contractor: {contractor.name if contractor else 'None'}")
         return context
 
-    def _find_best_contractor(self, db, tenant_id, category, district):
-        contractors = db.query(Contractor).filter(Contractor.tenant_id == tenant_id).all()
+    async def _find_best_contractor(self, db, tenant_id, category, district):
+        contractors = (await db.scalars(select(Contractor).where(Contractor.tenant_id == tenant_id))).all()
         if not contractors: return None
         scored = []
         for c in contractors:
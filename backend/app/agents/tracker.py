@@ -1,16 +1,18 @@
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.base import BaseAgent, PipelineContext
 from app.services.email import email_service
 from app.services.websocket import ws_manager
+from app.services import admin_events
 
 
 class TrackingAgent(BaseAgent):
     def __init__(self):
         super().__init__(name="TrackingAgent")
 
-    async def process(self, context: PipelineContext, db: Optional[Session] = None) -> PipelineContext:
+    async def process(self, context: PipelineContext, db: Optional[AsyncSession] = None) -> PipelineContext:
         tracking_id = context.data.get("tracking_id", context.complaint_id)
         citizen_email = context.data.get("citizen_email", "")
 
@@ -31,20 +33,20 @@ class TrackingAgent(BaseAgent):
         })
 
         context.status = "assigned"
-        self.log(f"Notifications sent for complaint {tracking_id}")
+        self.log(f"Notifications queued for complaint {tracking_id}")
         return context
 
 
 JURISDICTION_ESCALATION = {"ward": "block", "block": "district", "district": "city", "city": "state"}
 
 
-def _find_next_contractor(db, tenant_id, category, current_contractor_id, district=None):
+async def _find_next_contractor(db, tenant_id, category, current_contractor_id, district=None):
     """Find the next best contractor, excluding the currently assigned one."""
     from app.models.contractor import Contractor
-    contractors = db.query(Contractor).filter(
+    contractors = (await db.scalars(select(Contractor).where(
         Contractor.tenant_id == tenant_id,
         Contractor.id != current_contractor_id,
-    ).all()
+    ))).all()
     if not contractors:
         return None
     scored = []
@@ -61,54 +63,76 @@ def _find_next_contractor(db, tenant_id, category, current_contractor_id, distri
     return scored[0][0] if scored else None
 
 
-async def check_sla_deadlines(db: Session):
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _sla_window(order) -> tuple[datetime, datetime]:
+    """Start and deadline of the order's current SLA.
+
+    A breach that reassigns the order opens a new window starting at the
+    escalation; one with nobody to hand it to leaves the deadline behind it.
+    """
+    start = order.escalated_at or order.created_at or datetime.now(timezone.utc)
+    return _as_utc(start), _as_utc(order.sla_deadline)
+
+
+def next_sla_milestone(order) -> Optional[datetime]:
+    """When the next 50% / 75% / breach milestone falls due, or None if all are done."""
+    if not order.sla_deadline:
+        return None
+    start, deadline = _sla_window(order)
+    total = deadline - start
+    if total.total_seconds() <= 0:
+        # Already escalated with no new deadline — nothing further to chase
+        return None if order.escalated_at else deadline
+    if not order.sla_warned_50:
+        return start + total * 0.50
+    if not order.sla_warned_75:
+        return start + total * 0.75
+    return deadline
+
+
+async def check_sla_deadlines(db: AsyncSession):
+    """Act on work orders whose next SLA milestone has passed.
+
+    Only rows with ``next_milestone_at <= now`` are loaded, and every
+    milestone is recorded on the work order, so each warning or escalation is
+    sent exactly once however often the sweep runs. A breach that reassigns
+    the order gives the new contractor a fresh deadline and milestones.
+    """
+    from sqlalchemy import or_, and_
     from app.models.work_order import WorkOrder
     from app.models.complaint import Complaint
     from app.models.contractor import Contractor
     from app.models.escalation import Escalation
 
     now = datetime.now(timezone.utc)
-    active_orders = db.query(WorkOrder).filter(
-        WorkOrder.status.in_(["created", "assigned", "in_progress"])
-    ).all()
-
-    for order in active_orders:
-        if not order.sla_deadline:
+    active_statuses = ("created", "assigned", "in_progress")
+    due_orders = (await db.scalars(select(WorkOrder).where(or_(
+        WorkOrder.next_milestone_at <= now,
+        # Rows created before milestone tracking existed
+        and_(WorkOrder.next_milestone_at.is_(None), WorkOrder.escalated_at.is_(None),
+             WorkOrder.sla_deadline.isnot(None), WorkOrder.status.in_(active_statuses)),
+    )))).all()
+
+    for order in due_orders:
+        if order.status not in active_statuses:
+            order.next_milestone_at = None  # finished — drop out of the sweep
             continue
-        complaint = db.query(Complaint).filter(Complaint.id == order.complaint_id).first()
+        complaint = await db.get(Complaint, order.complaint_id)
         if not complaint:
+            order.next_milestone_at = None
             continue
 
-        sla_deadline = order.sla_deadline
-        if sla_deadline.tzinfo is None:
-            sla_deadline = sla_deadline.replace(tzinfo=timezone.utc)
-        created_at = order.created_at
-        if created_at.tzinfo is None:
-            created_at = created_at.replace(tzinfo=timezone.utc)
-
+        window_start, sla_deadline = _sla_window(order)
         time_remaining = (sla_deadline - now).total_seconds()
-        total_time = (sla_deadline - created_at).total_seconds()
-        if total_time <= 0:
-            continue
-        elapsed_pct = 1 - (time_remaining / total_time)
+        total_time = (sla_deadline - window_start).total_seconds()
+        elapsed_pct = 1 - (time_remaining / total_time) if total_time > 0 else 1.0
 
-        if 0.50 <= elapsed_pct < 0.75:
-            # 50% elapsed: early warning to citizen
-            await email_service.send_status_update(
-                complaint.citizen_email, complaint.tracking_id,
-                "Your complaint is being actively worked on — SLA deadline approaching",
-                complaint_id=complaint.id, db=db,
-            )
-
-        elif 0.75 <= elapsed_pct < 1.0:
-            # 75% elapsed: urgent SLA warning
-            await email_service.send_status_update(
-                complaint.citizen_email, complaint.tracking_id,
-                "SLA warning — escalating priority",
-                complaint_id=complaint.id, db=db,
-            )
-
-        elif elapsed_pct >= 1.0:
+        escalated = None
+        if elapsed_pct >= 1.0:
+            escalated = (admin_events.complaint_state(complaint), order.status)
             current_level = (
                 "ward" if complaint.ward else
                 "block" if complaint.block else
@@ -117,7 +141,7 @@ async def check_sla_deadlines(db: Session):
             next_level = JURISDICTION_ESCALATION.get(current_level, "state")
 
             # Auto-reassign to next best contractor
-            new_contractor = _find_next_contractor(
+            new_contractor = await _find_next_contractor(
                 db,
                 complaint.tenant_id,
                 complaint.category or "",
@@ -128,7 +152,7 @@ async def check_sla_deadlines(db: Session):
             if new_contractor:
                 # Decrement old contractor workload
                 if order.contractor_id:
-                    old_contractor = db.query(Contractor).filter(Contractor.id == order.contractor_id).first()
+                    old_contractor = await db.get(Contractor, order.contractor_id)
                     if old_contractor:
                         old_contractor.active_workload = max(0, (old_contractor.active_workload or 1) - 1)
 
@@ -147,10 +171,49 @@ async def check_sla_deadlines(db: Session):
             )
             db.add(escalation)
             complaint.status = "escalated"
-            db.commit()
-
+            order.escalated_at = now
+            if new_contractor and total_time > 0:
+                # The new contractor gets the same time budget, with its own 50% / 75% / breach milestones
+                order.sla_deadline = now + (sla_deadline - window_start)
+                order.sla_warned_50 = order.sla_warned_75 = False
+            else:
+                order.sla_warned_50 = order.sla_warned_75 = True
+            # Queued in the same transaction as the escalation it announces
             await email_service.send_status_update(
                 complaint.citizen_email, complaint.tracking_id,
                 f"Escalated to {next_level} level — SLA breached. New contractor assigned automatically.",
                 complaint_id=complaint.id, db=db,
             )
+
+        elif elapsed_pct >= 0.75 and not order.sla_warned_75:
+            # 75% elapsed: urgent SLA warning (supersedes a missed 50% warning)
+            await email_service.send_status_update(
+                complaint.citizen_email, complaint.tracking_id,
+                "SLA warning — escalating priority",
+                complaint_id=complaint.id, db=db,
+            )
+            order.sla_warned_50 = order.sla_warned_75 = True
+
+        elif elapsed_pct >= 0.50 and not order.sla_warned_50:
+            # 50% elapsed: early warning to citizen
+            await email_service.send_status_update(
+                complaint.citizen_email, complaint.tracking_id,
+                "Your complaint is being actively worked on — SLA deadline approaching",
+                complaint_id=complaint.id, db=db,
+            )
+            order.sla_warned_50 = True
+
+        order.next_milestone_at = next_sla_milestone(order)
+        # Milestone flags and the queued notification commit together
+        await db.commit()
+
+        if escalated:
+            before, prev_wo_status = escalated
+            deltas = admin_events.complaint_deltas(before, admin_events.complaint_state(complaint))
+            admin_events.work_order_deltas(prev_wo_status, order.status, deltas)
+            await admin_events.publish(complaint.tenant_id, "complaint.escalated", {
+                "id": complaint.id, "tracking_id": complaint.tracking_id, "work_order_id": order.id,
+                "to_level": next_level, "contractor_id": order.contractor_id,
+            }, deltas)
+
+    await db.commit()
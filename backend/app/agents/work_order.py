@@ -1,6 +1,6 @@
 from datetime import datetime, timezone, timedelta
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.base import BaseAgent, PipelineContext
 
 SLA_HOURS = {"critical": 4, "high": 24, "medium": 72, "low": 168}
@@ -10,7 +10,7 @@ class WorkOrderAgent(BaseAgent):
     def __init__(self):
         super().__init__(name="WorkOrderAgent")
 
-    async def process(self, context: PipelineContext, db: Optional[Session] = None) -> PipelineContext:
+    async def process(self, context: PipelineContext, db: Optional[AsyncSession] = None) -> PipelineContext:
         risk_level = context.data.get("risk_level", "medium")
         sla_hours = SLA_HOURS.get(risk_level, 72)
         now = datetime.now(timezone.utc)
@@ -4,9 +4,33 @@ from typing import Optional
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./civicai.db"
+    async_database_url: Optional[str] = None  # default: DATABASE_URL with aiosqlite/asyncpg swapped in
+    database_replica_urls: str = ""  # comma-separated read replicas for get_read_db
+    replica_max_lag_seconds: float = 5.0  # replicas further behind are skipped
+    replica_lag_check_seconds: int = 5
+    read_your_writes_seconds: int = 15  # after a write the client reads from the primary this long
+    db_pool_size: int = 5  # per engine (async API engine and sync script/thread engine)
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800  # -1 keeps connections forever
+    db_pool_pre_ping: bool = True
+    sqlite_busy_timeout_ms: int = 5000  # wait this long on a locked database before failing
+    sqlite_cache_size_kb: int = 64 * 1024
+    sqlite_mmap_size_mb: int = 256
+    rollup_reconcile_recent_days: int = 3  # checked on every hourly reconcile
+    rollup_reconcile_slice_days: int = 30  # older history checked per run, walking backwards
+    admin_list_total_cache_seconds: int = 60  # list totals may lag writes by this much unless exact_total=true
     secret_key: str = "change-me-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 480
+    auth_principal_cache_seconds: int = 60  # 0 disables; user changes invalidate every worker via the backplane
+    auth_principal_cache_size: int = 10000
+    auth_trust_token_claims: bool = False  # skip the user lookup and use the principal claims in the token
+    bcrypt_rounds: int = 12  # existing hashes are upgraded on the next successful login
+    password_hash_workers: int = 2
+    login_max_failures_per_account: int = 5  # per LOGIN_THROTTLE_WINDOW_MINUTES
+    login_max_attempts_per_ip: int = 30
+    login_throttle_window_minutes: int = 15
 
     anthropic_api_key: Optional[str] = None
     openai_api_key: Optional[str] = None
@@ -17,9 +41,60 @@ class Settings(BaseSettings):
     smtp_port: int = 1025
     smtp_user: str = ""
     smtp_password: str = ""
+    smtp_use_tls: bool = False  # implicit TLS (port 465); STARTTLS is negotiated automatically
+    smtp_pool_size: int = 2
+    smtp_timeout_seconds: float = 10.0
+    smtp_keepalive_seconds: float = 60.0
+    notification_dispatch_seconds: int = 5
+    notification_batch_size: int = 50
+    notification_max_attempts: int = 6
+    notification_retry_base_seconds: int = 30
+    notification_send_lease_seconds: int = 300  # a claimed row is retried if its dispatcher has not finished by then
+    notification_coalesce_seconds: int = 300  # digest window for coalescible types; 0 sends each on its own
+
+    boundaries_dir: str = "./boundaries"  # per-tenant ward/district/state GeoJSON
+    boundary_name_property: str = "name"
+    nominatim_user_agent: str = "CivicAI/1.0"
+    nominatim_rate_per_second: float = 1.0  # public Nominatim usage policy
+    nominatim_timeout_seconds: float = 5.0
+    nominatim_max_retries: int = 2
+    geocode_retry_base_minutes: int = 10
+    geocode_retry_max_attempts: int = 6
+    geocode_retry_batch_size: int = 50
+    geocode_cache_precision: int = 7  # geohash length; 7 ≈ 150 m cells
+    geocode_cache_size: int = 10000
+    geocode_cache_ttl_hours: int = 24 * 30
+    geocode_negative_ttl_seconds: int = 300
 
     upload_dir: str = "./uploads"
+    upload_chunk_size: int = 1024 * 1024
+    media_workers: int = 2  # process pool for image/audio/video work
+    completion_photo_max_bytes: int = 15 * 1024 * 1024
+    completion_photo_max_dimension: int = 2048
+    completion_photo_quality: int = 85
+    ffmpeg_binary: str = "ffmpeg"
+    video_keyframes_max: int = 4  # hard cap on image-analysis calls per video
+    video_scene_threshold: float = 0.3
+    video_keyframe_max_dimension: int = 1024
+    transcription_sample_rate: int = 16000
+    transcription_segment_seconds: int = 120  # aim to cut long voice notes near this length
+    transcription_max_segment_seconds: int = 300  # 16 kHz mono WAV stays well under Whisper's 25 MB cap
+    transcription_silence_db: int = -35
+    transcription_concurrency: int = 4
+    resumable_upload_max_bytes: int = 200 * 1024 * 1024
+    resumable_upload_expire_hours: int = 24
     otp_expire_minutes: int = 10
+    otp_max_attempts: int = 5  # wrong guesses before the code is invalidated
+    otp_max_sends_per_email: int = 5  # per OTP_THROTTLE_WINDOW_MINUTES
+    otp_max_sends_per_ip: int = 20
+    otp_throttle_window_minutes: int = 60
+    kv_store: str = "auto"  # auto | memory | database — OTPs and throttle counters
+    kv_memory_max_entries: int = 100_000
+    ws_backplane: str = "auto"  # auto | memory | postgres (LISTEN/NOTIFY across workers)
+    ws_send_queue_size: int = 32  # per socket; overflowing it disconnects the slow client
+    ws_send_timeout_seconds: float = 10.0
+    ws_idle_check_seconds: int = 20
+    ws_idle_timeout_seconds: int = 60  # only for clients that send "ping"; others rely on protocol pings
 
     class Config:
         env_file = ".env"
@@ -1,26 +1,283 @@
-from sqlalchemy import create_engine
+import asyncio
+import threading
+import time
+from datetime import timezone
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import DateTime, TypeDecorator, create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 
 from app.config import settings
 
-connect_args = {}
-if settings.database_url.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+# Async drivers for the API, scheduler jobs and pipeline
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class PoolMetrics:
+    """Checkout wait times for one engine's pool; in-use counts come from the pool itself."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            return {
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 2),
+            }
+
+
+class _TimedPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the running totals
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(0.0, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return conn
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _engine_options(url: str, pool_class) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}  # in-memory SQLite lives on a single connection — leave SQLAlchemy's pool choice alone
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the pipeline's writes; busy_timeout turns
+    # "database is locked" into a short wait instead of an immediate error.
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_mb) * 1024 * 1024}")
+    finally:
+        cursor.close()
+
+
+def _build_engines():
+    sync_url = settings.database_url
+    async_url = settings.async_database_url or _async_url(sync_url)
+
+    connect_args = {}
+    if _is_sqlite(sync_url):
+        connect_args = {"check_same_thread": False}
+
+    sync_engine = create_engine(sync_url, connect_args=connect_args,
+                                **_engine_options(sync_url, TimedQueuePool))
+    async_engine = create_async_engine(async_url, **_engine_options(async_url, TimedAsyncQueuePool))
+
+    for eng, url in ((sync_engine, sync_url), (async_engine.sync_engine, async_url)):
+        if _is_sqlite(url):
+            event.listen(eng, "connect", _sqlite_pragmas)
+    return sync_engine, async_engine
 
-engine = create_engine(settings.database_url, connect_args=connect_args)
+
+# Synchronous engine: scripts, create_tables(), seeding and helpers that run in a worker thread
+engine, async_engine = _build_engines()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+# Set on responses to writes; while present the client's reads stay on the primary
+READ_YOUR_WRITES_COOKIE = "civicai_recent_write"
+
+# Seconds a streaming replica is behind; 0 when it has replayed everything it received
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class _Replica:
+    def __init__(self, index: int, url: str):
+        self.name = f"replica-{index}"
+        url = _async_url(url)
+        self.engine = create_async_engine(url, **_engine_options(url, TimedAsyncQueuePool))
+        self.sessionmaker = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False,
+                                               info={"replica": self.name})
+        self.lag: Optional[float] = None  # None until the first successful check, or while unreachable
+
+
+class ReplicaRouter:
+    """Send read-only sessions to replicas that are keeping up with the primary.
+
+    A background task measures each replica's replay lag every
+    REPLICA_LAG_CHECK_SECONDS. Replicas that are unreachable or more than
+    REPLICA_MAX_LAG_SECONDS behind are skipped, and with none left reads
+    fall back to the primary.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.replicas = [_Replica(i, url) for i, url in enumerate(urls)]
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def pick(self) -> Optional[_Replica]:
+        usable = [r for r in self.replicas if r.lag is not None and r.lag <= settings.replica_max_lag_seconds]
+        if not usable:
+            return None
+        self._next = (self._next + 1) % len(usable)
+        return usable[self._next]
+
+    async def _measure(self, replica: _Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                if replica.engine.dialect.name == "postgresql":
+                    replica.lag = float(await conn.scalar(_REPLICA_LAG_SQL))
+                else:
+                    await conn.execute(text("SELECT 1"))
+                    replica.lag = 0.0
+        except Exception as e:
+            if replica.lag is not None:
+                print(f"[Database] {replica.name} unavailable, reading from primary: {e}")
+            replica.lag = None
+
+    async def _monitor(self):
+        while True:
+            await asyncio.gather(*(self._measure(r) for r in self.replicas))
+            await asyncio.sleep(settings.replica_lag_check_seconds)
+
+    async def start(self):
+        if self.replicas and self._task is None:
+            await asyncio.gather(*(self._measure(r) for r in self.replicas))
+            self._task = asyncio.create_task(self._monitor())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        return {r.name: {"lag_seconds": r.lag, "usable": r.lag is not None and r.lag <= settings.replica_max_lag_seconds}
+                for r in self.replicas}
+
+
+replica_router = ReplicaRouter([u.strip() for u in settings.database_replica_urls.split(",") if u.strip()])
+
+
+def pool_stats() -> dict:
+    """Connection pool usage per engine, for /health."""
+    stats = {}
+    pools = [("async", async_engine.sync_engine.pool), ("sync", engine.pool)]
+    pools += [(r.name, r.engine.sync_engine.pool) for r in replica_router.replicas]
+    for name, pool in pools:
+        if isinstance(pool, _TimedPoolMixin):
+            stats[name] = pool.metrics.snapshot(pool)
+    return stats
+
+
+class UTCDateTime(TypeDecorator):
+    """A naive ``timestamp`` column that accepts timezone-aware datetimes.
+
+    The app works in ``datetime.now(timezone.utc)`` while the columns are
+    ``timestamp without time zone``. asyncpg refuses to bind an aware value
+    to such a column (psycopg2 and SQLite quietly dropped the offset), so
+    aware values are converted to UTC and stripped here, for inserts and
+    comparisons alike. Values read back are naive UTC, as before.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """Session for read-only endpoints: a healthy replica, or the primary.
+
+    Clients that wrote within READ_YOUR_WRITES_SECONDS (see
+    READ_YOUR_WRITES_COOKIE) read from the primary so they see their own
+    changes. ``db.info.get("replica")`` tells handlers which one they got.
+    """
+    replica = None if request.cookies.get(READ_YOUR_WRITES_COOKIE) else replica_router.pick()
+    maker = replica.sessionmaker if replica else AsyncSessionLocal
+    async with maker() as db:
         yield db
-    finally:
-        db.close()
 
 
 def create_tables():
@@ -1,11 +1,12 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import os
 
@@ -15,52 +16,109 @@ UPLOADS_DIR = BASE_DIR / "uploads"
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
 from app.config import settings
-from app.database import get_db, SessionLocal, create_tables
+from app.database import (
+    AsyncSessionLocal, SessionLocal, async_engine, create_tables, pool_stats,
+    replica_router, READ_YOUR_WRITES_COOKIE,
+)
 from app.routers import auth, complaints, admin, public
 from app.agents.tracker import check_sla_deadlines
 from app.agents.cluster import run_cluster_detection as _cluster_detect
 from app.agents.briefing import generate_daily_briefing
 from app.models import *  # noqa: F401,F403 - ensure all models are loaded
 from app.models.daily_briefing import DailyBriefing  # noqa: F401 - register model
-from app.utils.auth import require_officer_or_admin
+from app.utils.auth import on_backplane_message, require_officer_or_admin
+from app.services.media import media_service
+from app.services.geocoding import geocoding_service
+from app.services.smtp import smtp_pool
+from app.services.websocket import ws_manager
 
 scheduler = AsyncIOScheduler()
 
 
 async def run_sla_check():
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         await check_sla_deadlines(db)
-    finally:
-        db.close()
 
 
 async def run_cluster_detection():
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         await _cluster_detect(db)
-    finally:
-        db.close()
+
+
+async def run_upload_cleanup():
+    async with AsyncSessionLocal() as db:
+        purged = await media_service.purge_expired_uploads(db)
+        if purged:
+            print(f"[Uploads] Purged {purged} expired resumable uploads")
+
+
+async def run_geocode_cache_cleanup():
+    await geocoding_service.purge_expired()
+
+
+async def run_kv_cleanup():
+    from app.services.kv_store import kv_store
+    await kv_store.purge_expired()
+
+
+async def run_geocode_retries():
+    async with AsyncSessionLocal() as db:
+        fixed = await geocoding_service.process_retry_queue(db)
+        if fixed:
+            print(f"[Geocoding] Re-resolved {fixed} complaint locations")
+
+
+async def run_notification_dispatch():
+    from app.services.email import email_service
+    async with AsyncSessionLocal() as db:
+        # Drain the backlog in batches, but yield to the next scheduled run eventually
+        for _ in range(20):
+            if not await email_service.dispatch_outbox(db):
+                break
+
+
+async def run_rollup_reconcile():
+    from app.services.rollups import reconcile
+    async with AsyncSessionLocal() as db:
+        repaired = await db.run_sync(reconcile)
+        if repaired:
+            print(f"[Rollups] Repaired {repaired} drifted complaint rollup buckets")
 
 
 async def run_daily_briefing():
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         await generate_daily_briefing(db)
-    finally:
-        db.close()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create tables (for SQLite dev mode)
-    create_tables()
+    # SQLite dev databases are created on the fly; Postgres is managed by
+    # `alembic upgrade head` (run by the Docker image before the server starts)
+    if settings.database_url.startswith("sqlite"):
+        create_tables()
     scheduler.add_job(run_sla_check, "interval", minutes=5)
     scheduler.add_job(run_cluster_detection, "interval", hours=1)
     scheduler.add_job(run_daily_briefing, "cron", hour=8, minute=0)
+    scheduler.add_job(run_upload_cleanup, "interval", minutes=30)
+    scheduler.add_job(run_geocode_cache_cleanup, "interval", hours=6)
+    scheduler.add_job(run_geocode_retries, "interval", minutes=10)
+    scheduler.add_job(run_kv_cleanup, "interval", minutes=15)
+    scheduler.add_job(run_rollup_reconcile, "interval", hours=1, next_run_time=datetime.now())
+    scheduler.add_job(run_notification_dispatch, "interval", seconds=settings.notification_dispatch_seconds)
     scheduler.start()
+    await geocoding_service.start()
+    await smtp_pool.start()
+    ws_manager.backplane.subscribe(on_backplane_message)  # principal cache invalidations from other workers
+    await ws_manager.start()
+    await replica_router.start()
     yield
     scheduler.shutdown()
+    await geocoding_service.close()
+    await smtp_pool.close()
+    await ws_manager.close()
+    media_service.shutdown()
+    await replica_router.close()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -73,11 +131,25 @@ app = FastAPI(
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],
-    allow_credentials=True,
+    allow_credentials=True,  # the SPA sends withCredentials so the read-your-writes cookie round-trips
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Location", "Upload-Offset", "Upload-Length"],
 )
 
+
+
+@app.middleware("http")
+async def pin_reads_after_writes(request: Request, call_next):
+    # A client that just wrote reads from the primary for a while (see get_read_db)
+    response = await call_next(request)
+    if (replica_router.replicas and request.method in ("POST", "PUT", "PATCH", "DELETE")
+            and response.status_code < 400):
+        response.set_cookie(READ_YOUR_WRITES_COOKIE, "1", max_age=settings.read_your_writes_seconds,
+                            httponly=True, samesite="lax")
+    return response
+
+
 app.include_router(auth.router)
 app.include_router(complaints.router)
 app.include_router(admin.router)
@@ -90,7 +162,12 @@ app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "websockets": ws_manager.stats(),
+        "database": pool_stats(),
+        "replicas": replica_router.stats(),
+    }
 
 
 @app.get("/media/{filename}")
@@ -106,6 +183,15 @@ async def serve_media(filename: str):
 
 
 @app.post("/admin/seed")
-async def seed_data(db: Session = Depends(get_db)):
+async def seed_data():
     from app.mock_data.seed import seed_database
-    return seed_database(db)
+
+    def _seed():
+        db = SessionLocal()
+        try:
+            return seed_database(db)
+        finally:
+            db.close()
+
+    # Seeding hashes demo passwords — run it on a sync session off the event loop
+    return await asyncio.to_thread(_seed)
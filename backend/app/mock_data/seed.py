@@ -32,9 +32,10 @@ def seed_database(db: Session):
         ("Education Department", ["EDUCATION"], "Officer Deepa"),
     ]
 
+    officer_password_hash = hash_password("officer123")  # one bcrypt run for all demo officers
     for dept_name, categories, officer_name in departments_data:
         officer = User(tenant_id=tenant.id, email=f"{officer_name.lower().replace(' ', '.')}@civicai.gov",
-            name=officer_name, role="officer", password_hash=hash_password("officer123"))
+            name=officer_name, role="officer", password_hash=officer_password_hash)
         db.add(officer)
         db.flush()
         dept = Department(tenant_id=tenant.id, name=dept_name, category_mapping=categories, head_officer_id=officer.id)
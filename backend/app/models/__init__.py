@@ -6,3 +6,12 @@ from app.models.department import Department
 from app.models.contractor import Contractor
 from app.models.escalation import Escalation
 from app.models.notification import Notification
+from app.models.daily_briefing import DailyBriefing
+from app.models.upload_session import UploadSession
+from app.models.geocode_cache import GeocodeCache
+from app.models.geocode_retry import GeocodeRetry
+from app.models.kv_entry import KVEntry
+from app.models.complaint_rollup import ComplaintRollup
+
+# Registers the listener that keeps complaint_rollups in step with complaints
+import app.services.rollups  # noqa: E402,F401
@@ -1,33 +1,55 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Float, Integer, Text, JSON, ForeignKey, Boolean
+from sqlalchemy import String, Float, Integer, Text, JSON, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Base
+from app.database import Base, UTCDateTime
 
 
 def gen_uuid():
     return str(uuid.uuid4())
 
 
+# Statuses the cluster detector groups (see agents/cluster.py)
+CLUSTERABLE_STATUSES = "status IN ('submitted', 'validated', 'classified', 'routed')"
+
+
 class Complaint(Base):
     __tablename__ = "complaints"
+    __table_args__ = (
+        # Admin listing: tenant + optional status/category/risk filter, newest first;
+        # the same prefixes serve the analytics and dashboard GROUP BYs
+        Index("ix_complaints_tenant_created", "tenant_id", "created_at"),
+        Index("ix_complaints_tenant_status_created", "tenant_id", "status", "created_at"),
+        Index("ix_complaints_tenant_category_created", "tenant_id", "category", "created_at"),
+        Index("ix_complaints_tenant_risk_created", "tenant_id", "risk_level", "created_at"),
+        # Daily briefing: "new today" and "resolved today"
+        Index("ix_complaints_created_at", "created_at"),
+        Index("ix_complaints_resolved_updated", "updated_at",
+              postgresql_where=text("status IN ('resolved', 'closed')"),
+              sqlite_where=text("status IN ('resolved', 'closed')")),
+        # Cluster detection: recent open complaints by category
+        Index("ix_complaints_clusterable", "category", "created_at",
+              postgresql_where=text(CLUSTERABLE_STATUSES), sqlite_where=text(CLUSTERABLE_STATUSES)),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=gen_uuid)
-    tenant_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=True)
+    # active_history on the rollup bucket fields (see services/rollups.py): the
+    # previous value is loaded before an overwrite so its bucket can be decremented
+    tenant_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=True, active_history=True)
     tracking_id: Mapped[str] = mapped_column(String(20), unique=True, nullable=False, index=True)
     citizen_email: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     citizen_phone: Mapped[str | None] = mapped_column(String(50), nullable=True)
     citizen_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     description: Mapped[str] = mapped_column(Text, nullable=False)
-    status: Mapped[str] = mapped_column(String(30), nullable=False, default="submitted")
+    status: Mapped[str] = mapped_column(String(30), nullable=False, default="submitted", active_history=True)
 
-    category: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    category: Mapped[str | None] = mapped_column(String(50), nullable=True, active_history=True)
     subcategory: Mapped[str | None] = mapped_column(String(100), nullable=True)
     priority_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    risk_level: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    risk_level: Mapped[str | None] = mapped_column(String(20), nullable=True, active_history=True)
 
     latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
     longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
@@ -36,6 +58,8 @@ class Complaint(Base):
     block: Mapped[str | None] = mapped_column(String(100), nullable=True)
     district: Mapped[str | None] = mapped_column(String(100), nullable=True)
     state: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    state_code: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True, active_history=True)  # canonical, see utils.locations
+    district_code: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True, active_history=True)
 
     classification_confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
     ai_analysis: Mapped[dict | None] = mapped_column(JSON, nullable=True)
@@ -47,8 +71,8 @@ class Complaint(Base):
     email_draft: Mapped[str | None] = mapped_column(Text, nullable=True)
     email_approved: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, server_default="0")
 
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     tenant = relationship("Tenant", back_populates="complaints")
     media = relationship("ComplaintMedia", back_populates="complaint")
@@ -60,11 +84,11 @@ class ComplaintMedia(Base):
     __tablename__ = "complaint_media"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=gen_uuid)
-    complaint_id: Mapped[str] = mapped_column(String(36), ForeignKey("complaints.id"), nullable=False)
+    complaint_id: Mapped[str] = mapped_column(String(36), ForeignKey("complaints.id"), nullable=False, index=True)
     file_path: Mapped[str] = mapped_column(String(500), nullable=False)
     media_type: Mapped[str] = mapped_column(String(20), nullable=False)
     original_filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
     extracted_text: Mapped[str | None] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
 
     complaint = relationship("Complaint", back_populates="media")
@@ -0,0 +1,24 @@
+from datetime import date
+
+from sqlalchemy import String, Date, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ComplaintRollup(Base):
+    """Complaint counts per bucket, kept in step by app.services.rollups.
+
+    ``day`` is the UTC day the complaint was filed. Missing tenant, location,
+    category or risk values are stored as "" so every bucket has a real key.
+    """
+    __tablename__ = "complaint_rollups"
+
+    tenant_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    state_code: Mapped[str] = mapped_column(String(64), primary_key=True)
+    district_code: Mapped[str] = mapped_column(String(128), primary_key=True)
+    category: Mapped[str] = mapped_column(String(50), primary_key=True)
+    status: Mapped[str] = mapped_column(String(30), primary_key=True)
+    risk_level: Mapped[str] = mapped_column(String(20), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
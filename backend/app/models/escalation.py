@@ -1,10 +1,10 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Text, ForeignKey
+from sqlalchemy import String, Text, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Base
+from app.database import Base, UTCDateTime
 
 
 def gen_uuid():
@@ -15,10 +15,10 @@ class Escalation(Base):
     __tablename__ = "escalations"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=gen_uuid)
-    complaint_id: Mapped[str] = mapped_column(String(36), ForeignKey("complaints.id"), nullable=False)
+    complaint_id: Mapped[str] = mapped_column(String(36), ForeignKey("complaints.id"), nullable=False, index=True)
     from_level: Mapped[str] = mapped_column(String(50), nullable=False)
     to_level: Mapped[str] = mapped_column(String(50), nullable=False)
     reason: Mapped[str] = mapped_column(Text, nullable=False)
-    escalated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    escalated_at: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(timezone.utc), index=True)
 
     complaint = relationship("Complaint", back_populates="escalations")
@@ -0,0 +1,17 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import String, JSON, Boolean
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base, UTCDateTime
+
+
+class GeocodeCache(Base):
+    """Persisted reverse-geocoding results, keyed by geohash cell."""
+    __tablename__ = "geocode_cache"
+
+    geohash: Mapped[str] = mapped_column(String(12), primary_key=True)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    is_negative: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)  # lookup failed
+    expires_at: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
@@ -1,10 +1,10 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import String, Text, ForeignKey, Boolean, Integer, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
-from app.database import Base
+from app.database import Base, UTCDateTime
 
 
 def gen_uuid():
@@ -12,13 +12,31 @@ def gen_uuid():
 
 
 class Notification(Base):
+    """Email audit trail and transactional outbox.
+
+    Rows are inserted as ``pending`` in the same transaction as the state
+    change that triggered them; the dispatcher job claims them as ``sending``
+    (next_attempt_at then holds the claim's lease expiry) and sends them
+    afterwards. OTPs are sent inline and logged here already sent or failed.
+    """
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_status_next_attempt", "status", "next_attempt_at"),
+        # Digest grouping pulls a recipient's other pending rows
+        Index("ix_notifications_pending_recipient", "recipient_email",
+              postgresql_where=text("status = 'pending'"), sqlite_where=text("status = 'pending'")),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=gen_uuid)
-    complaint_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("complaints.id"), nullable=True)
+    complaint_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("complaints.id"), nullable=True, index=True)
     recipient_email: Mapped[str] = mapped_column(String(255), nullable=False)
     notification_type: Mapped[str] = mapped_column(String(20), nullable=False)
-    message: Mapped[str] = mapped_column(Text, nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)  # subject line
+    body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending | sending | sent | failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime | None] = mapped_column(UTCDateTime, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_sent: Mapped[bool] = mapped_column(Boolean, default=False)
-    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    sent_at: Mapped[datetime | None] = mapped_column(UTCDateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import String, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base, UTCDateTime
+
+
+def gen_uuid():
+    return str(uuid.uuid4())
+
+
+class UploadSession(Base):
+    """A resumable (tus-style) upload: created, filled by PATCHed chunks, then finalized."""
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=gen_uuid)
+    original_filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    media_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    total_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    received: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending | complete | consumed
+    file_path: Mapped[str | None] = mapped_column(String(500), nullable=True)  # set once finalized
+    complaint_id: Mapped[str | None] = mapped_column(String(36), nullable=True)  # set once attached
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False, index=True)
@@ -1,32 +1,52 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Float, Text, ForeignKey
+from sqlalchemy import String, Float, Text, ForeignKey, Boolean, Index, false, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Base
+from app.database import Base, UTCDateTime
 
 
 def gen_uuid():
     return str(uuid.uuid4())
 
 
+ACTIVE_STATUSES = "status IN ('created', 'assigned', 'in_progress')"
+
+
 class WorkOrder(Base):
     __tablename__ = "work_orders"
+    __table_args__ = (
+        # Admin listing: tenant + optional status, newest first
+        Index("ix_work_orders_tenant_created", "tenant_id", "created_at"),
+        Index("ix_work_orders_tenant_status_created", "tenant_id", "status", "created_at"),
+        # SLA-at-risk counts and the tracker's pre-milestone fallback only look at open orders
+        Index("ix_work_orders_active_sla", "sla_deadline",
+              postgresql_where=text(ACTIVE_STATUSES), sqlite_where=text(ACTIVE_STATUSES)),
+        # Performance analytics: completed orders per tenant
+        Index("ix_work_orders_tenant_completed", "tenant_id", "completed_at",
+              postgresql_where=text("completed_at IS NOT NULL"), sqlite_where=text("completed_at IS NOT NULL")),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=gen_uuid)
-    complaint_id: Mapped[str] = mapped_column(String(36), ForeignKey("complaints.id"), nullable=False)
+    complaint_id: Mapped[str] = mapped_column(String(36), ForeignKey("complaints.id"), nullable=False, index=True)
     tenant_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=True)
     contractor_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("contractors.id"), nullable=True)
     officer_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("users.id"), nullable=True)
     status: Mapped[str] = mapped_column(String(30), nullable=False, default="created")
-    sla_deadline: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    sla_deadline: Mapped[datetime | None] = mapped_column(UTCDateTime, nullable=True)
     estimated_cost: Mapped[float | None] = mapped_column(Float, nullable=True)
     materials: Mapped[str | None] = mapped_column(Text, nullable=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
-    completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at: Mapped[datetime | None] = mapped_column(UTCDateTime, nullable=True)
+    # SLA milestones already acted on, so each warning/escalation happens once
+    sla_warned_50: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, server_default=false())
+    sla_warned_75: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, server_default=false())
+    escalated_at: Mapped[datetime | None] = mapped_column(UTCDateTime, nullable=True)
+    next_milestone_at: Mapped[datetime | None] = mapped_column(UTCDateTime, nullable=True, index=True)  # when the SLA sweep should next look
     completion_photo: Mapped[str | None] = mapped_column(String(500), nullable=True)  # path to proof photo
+    completion_photo_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)  # sha256 of oriented pixels
 
     complaint = relationship("Complaint", back_populates="work_order")
     contractor = relationship("Contractor")
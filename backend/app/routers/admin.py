@@ -1,17 +1,23 @@
 from typing import Optional
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, WebSocket, WebSocketDisconnect
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db, AsyncSessionLocal
 from app.models.complaint import Complaint
+from app.models.complaint_rollup import ComplaintRollup
 from app.models.work_order import WorkOrder
 from app.models.contractor import Contractor
 from app.models.user import User
 from app.schemas.work_order import WorkOrderUpdate
-from app.utils.auth import require_officer_or_admin
+from app.utils.auth import require_officer_or_admin, user_from_token
+from app.utils.pagination import fetch_page, list_total
+from app.services import admin_events
+from app.services.rollups import rollup_counts
+from app.services.websocket import ws_manager
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -21,23 +27,26 @@ async def list_complaints(
     status: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     risk_level: Optional[str] = Query(None),
-    limit: int = Query(50, le=200),
-    offset: int = Query(0),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    exact_total: bool = Query(False, description="Count exactly instead of using a cached or estimated total"),
     user: User = Depends(require_officer_or_admin),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    query = db.query(Complaint)
+    query = select(Complaint)
     if user.tenant_id:
-        query = query.filter(Complaint.tenant_id == user.tenant_id)
+        query = query.where(Complaint.tenant_id == user.tenant_id)
     if status:
-        query = query.filter(Complaint.status == status)
+        query = query.where(Complaint.status == status)
     if category:
-        query = query.filter(Complaint.category == category)
+        query = query.where(Complaint.category == category)
     if risk_level:
-        query = query.filter(Complaint.risk_level == risk_level)
+        query = query.where(Complaint.risk_level == risk_level)
 
-    total = query.count()
-    complaints = query.order_by(Complaint.created_at.desc()).offset(offset).limit(limit).all()
+    total, estimated = await list_total(
+        db, query, ("complaints", user.tenant_id, status, category, risk_level), exact=exact_total
+    )
+    complaints, next_cursor = await fetch_page(db, query, Complaint, cursor, limit)
 
     return {
         "complaints": [
@@ -54,6 +63,8 @@ async def list_complaints(
             for c in complaints
         ],
         "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": next_cursor,
     }
 
 
@@ -61,16 +72,15 @@ async def list_complaints(
 async def get_complaint_detail(
     complaint_id: str,
     user: User = Depends(require_officer_or_admin),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    from sqlalchemy.orm import joinedload
     from app.agents.router import CATEGORY_DEPARTMENT_MAP
     from app.services.llm import llm_service
 
-    complaint = db.query(Complaint).options(
-        joinedload(Complaint.media),
-        joinedload(Complaint.work_order),
-    ).filter(Complaint.id == complaint_id).first()
+    complaint = await db.scalar(select(Complaint).options(
+        selectinload(Complaint.media),
+        selectinload(Complaint.work_order),
+    ).where(Complaint.id == complaint_id))
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
 
@@ -159,49 +169,59 @@ async def approve_complaint_email(
     complaint_id: str,
     body: dict,
     user: User = Depends(require_officer_or_admin),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    complaint = await db.get(Complaint, complaint_id)
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
 
     complaint.email_draft = body.get("email_draft", complaint.email_draft or "")
     complaint.email_approved = True
-    db.commit()
+    await db.commit()
     return {"message": "Email approved successfully", "email_approved": True}
 
 
 @router.patch("/complaints/{complaint_id}")
 async def update_complaint(
     complaint_id: str, status: Optional[str] = None, contractor_id: Optional[str] = None,
-    user: User = Depends(require_officer_or_admin), db: Session = Depends(get_db),
+    user: User = Depends(require_officer_or_admin), db: AsyncSession = Depends(get_db),
 ):
-    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    complaint = await db.get(Complaint, complaint_id)
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
+    before = admin_events.complaint_state(complaint)
     if status:
         complaint.status = status
     if contractor_id:
-        wo = db.query(WorkOrder).filter(WorkOrder.complaint_id == complaint.id).first()
+        wo = await db.scalar(select(WorkOrder).where(WorkOrder.complaint_id == complaint.id))
         if wo:
             wo.contractor_id = contractor_id
             wo.officer_id = user.id
-    db.commit()
+    await db.commit()
+    await admin_events.publish(
+        complaint.tenant_id, "complaint.updated",
+        {"id": complaint.id, "tracking_id": complaint.tracking_id, "status": complaint.status},
+        admin_events.complaint_deltas(before, admin_events.complaint_state(complaint)),
+    )
     return {"message": "Complaint updated"}
 
 
 @router.get("/work-orders")
 async def list_work_orders(
     status: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    exact_total: bool = Query(False, description="Count exactly instead of using a cached or estimated total"),
     user: User = Depends(require_officer_or_admin),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    query = db.query(WorkOrder)
+    query = select(WorkOrder)
     if user.tenant_id:
-        query = query.filter(WorkOrder.tenant_id == user.tenant_id)
+        query = query.where(WorkOrder.tenant_id == user.tenant_id)
     if status:
-        query = query.filter(WorkOrder.status == status)
-    orders = query.order_by(WorkOrder.created_at.desc()).all()
+        query = query.where(WorkOrder.status == status)
+    total, estimated = await list_total(db, query, ("work_orders", user.tenant_id, status), exact=exact_total)
+    orders, next_cursor = await fetch_page(db, query, WorkOrder, cursor, limit)
     return {
         "work_orders": [
             {
@@ -214,21 +234,26 @@ async def list_work_orders(
                 "completion_photo": f"media/{wo.completion_photo}" if wo.completion_photo else None,
             }
             for wo in orders
-        ]
+        ],
+        "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": next_cursor,
     }
 
 
 @router.patch("/work-orders/{work_order_id}")
 async def update_work_order(
     work_order_id: str, data: WorkOrderUpdate,
-    user: User = Depends(require_officer_or_admin), db: Session = Depends(get_db),
+    user: User = Depends(require_officer_or_admin), db: AsyncSession = Depends(get_db),
 ):
-    wo = db.query(WorkOrder).filter(WorkOrder.id == work_order_id).first()
+    wo = await db.get(WorkOrder, work_order_id)
     if not wo:
         raise HTTPException(status_code=404, detail="Work order not found")
 
     prev_status = wo.status
     prev_contractor_id = wo.contractor_id
+    complaint = await db.get(Complaint, wo.complaint_id)
+    complaint_before = admin_events.complaint_state(complaint) if complaint else None
 
     if data.status:
         wo.status = data.status
@@ -241,16 +266,13 @@ async def update_work_order(
             from datetime import datetime, timezone
             wo.completed_at = datetime.now(timezone.utc)
             # Sync complaint → resolved
-            complaint = db.query(Complaint).filter(Complaint.id == wo.complaint_id).first()
             if complaint:
                 complaint.status = "resolved"
         elif data.status == "in_progress":
             # Sync complaint → in_progress
-            complaint = db.query(Complaint).filter(Complaint.id == wo.complaint_id).first()
             if complaint and complaint.status not in ("resolved", "closed"):
                 complaint.status = "in_progress"
         elif data.status == "assigned":
-            complaint = db.query(Complaint).filter(Complaint.id == wo.complaint_id).first()
             if complaint and complaint.status not in ("resolved", "closed", "in_progress"):
                 complaint.status = "assigned"
         # Sync contractor active_workload
@@ -258,12 +280,12 @@ async def update_work_order(
         was_active = prev_status in active_statuses
         is_active = data.status in active_statuses
         if was_active and not is_active and prev_contractor_id:
-            contractor = db.query(Contractor).filter(Contractor.id == prev_contractor_id).first()
+            contractor = await db.get(Contractor, prev_contractor_id)
             if contractor and contractor.active_workload > 0:
                 contractor.active_workload -= 1
         elif not was_active and is_active and (data.contractor_id or wo.contractor_id):
             cid = data.contractor_id or wo.contractor_id
-            contractor = db.query(Contractor).filter(Contractor.id == cid).first()
+            contractor = await db.get(Contractor, cid)
             if contractor:
                 contractor.active_workload += 1
 
@@ -272,15 +294,24 @@ async def update_work_order(
     if data.contractor_id:
         # Transferring contractor — decrement old, increment new
         if prev_contractor_id and prev_contractor_id != data.contractor_id and wo.status in {"assigned", "in_progress"}:
-            old_c = db.query(Contractor).filter(Contractor.id == prev_contractor_id).first()
+            old_c = await db.get(Contractor, prev_contractor_id)
             if old_c and old_c.active_workload > 0:
                 old_c.active_workload -= 1
-            new_c = db.query(Contractor).filter(Contractor.id == data.contractor_id).first()
+            new_c = await db.get(Contractor, data.contractor_id)
             if new_c:
                 new_c.active_workload += 1
         wo.contractor_id = data.contractor_id
         wo.officer_id = user.id
-    db.commit()
+    await db.commit()
+    if wo.status != prev_status:
+        deltas = admin_events.work_order_deltas(prev_status, wo.status)
+        if complaint:
+            admin_events.complaint_deltas(complaint_before, admin_events.complaint_state(complaint), deltas)
+        await admin_events.publish(
+            wo.tenant_id, "work_order.status_changed",
+            {"id": wo.id, "complaint_id": wo.complaint_id, "from": prev_status, "to": wo.status},
+            deltas,
+        )
     return {"message": "Work order updated"}
 
 
@@ -289,56 +320,101 @@ async def upload_completion_photo(
     work_order_id: str,
     photo: UploadFile = File(...),
     user: User = Depends(require_officer_or_admin),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Upload a before/after completion proof photo for a work order."""
-    wo = db.query(WorkOrder).filter(WorkOrder.id == work_order_id).first()
+    wo = await db.get(WorkOrder, work_order_id)
     if not wo:
         raise HTTPException(status_code=404, detail="Work order not found")
     from app.services.media import media_service
-    import shutil, os
-    from pathlib import Path
-    ext = os.path.splitext(photo.filename or "photo.jpg")[1] or ".jpg"
-    import uuid
-    filename = f"completion_{uuid.uuid4().hex}{ext}"
-    save_path = media_service.upload_dir / filename
-    with open(save_path, "wb") as f:
-        shutil.copyfileobj(photo.file, f)
-    wo.completion_photo = filename
-    db.commit()
+    try:
+        saved = await media_service.save_completion_photo(photo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Reject proof photos already used on a different work order
+    duplicate = (await db.execute(select(WorkOrder.id).where(
+        WorkOrder.completion_photo_hash == saved["hash"],
+        WorkOrder.id != wo.id,
+    ).limit(1))).first()
+    if duplicate:
+        await media_service.delete_file(media_service.upload_dir / saved["filename"])
+        raise HTTPException(
+            status_code=409,
+            detail=f"This photo was already submitted as proof for work order {duplicate.id}",
+        )
+
+    wo.completion_photo = saved["filename"]
+    wo.completion_photo_hash = saved["hash"]
+    await db.commit()
+    filename = saved["filename"]
     return {"message": "Completion photo uploaded", "filename": filename, "url": f"media/{filename}"}
 
 
+async def _analytics_counts(db: AsyncSession, tenant_id: Optional[str]) -> dict:
+    return await rollup_counts(db, *([ComplaintRollup.tenant_id == tenant_id] if tenant_id else []))
+
+
 @router.get("/analytics")
-async def get_analytics(user: User = Depends(require_officer_or_admin), db: Session = Depends(get_db)):
-    query = db.query(Complaint)
-    if user.tenant_id:
-        query = query.filter(Complaint.tenant_id == user.tenant_id)
-    total = query.count()
-    by_status = dict(query.with_entities(Complaint.status, func.count(Complaint.id)).group_by(Complaint.status).all())
-    by_category = dict(query.with_entities(Complaint.category, func.count(Complaint.id)).filter(Complaint.category.isnot(None)).group_by(Complaint.category).all())
-    by_risk = dict(query.with_entities(Complaint.risk_level, func.count(Complaint.id)).filter(Complaint.risk_level.isnot(None)).group_by(Complaint.risk_level).all())
-    return {"total_complaints": total, "by_status": by_status, "by_category": by_category, "by_risk_level": by_risk}
+async def get_analytics(user: User = Depends(require_officer_or_admin), db: AsyncSession = Depends(get_read_db)):
+    return await _analytics_counts(db, user.tenant_id)
+
+
+@router.websocket("/live")
+async def admin_live(websocket: WebSocket, token: str = Query(...)):
+    """Live operations feed: a counter snapshot, then events with counter deltas.
+
+    Browsers cannot set headers on a WebSocket, so the bearer token is passed
+    as ``?token=``. Events are scoped to the user's tenant.
+    """
+    # Not a Depends(get_db) session: don't hold a connection for the socket's lifetime
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await user_from_token(token, db)
+        except HTTPException:
+            await websocket.close(code=4401)
+            return
+        if user.role not in ("admin", "officer"):
+            await websocket.close(code=4403)
+            return
+        wo_query = select(WorkOrder.status, func.count(WorkOrder.id))
+        if user.tenant_id:
+            wo_query = wo_query.where(WorkOrder.tenant_id == user.tenant_id)
+        snapshot = {
+            "type": "snapshot",
+            "tenant_id": user.tenant_id,
+            "counters": {
+                **await _analytics_counts(db, user.tenant_id),
+                "work_orders_by_status": dict((await db.execute(wo_query.group_by(WorkOrder.status))).all()),
+            },
+        }
+
+    conn = await ws_manager.connect_admin(user.tenant_id, websocket, snapshot=snapshot)
+    try:
+        while True:
+            ws_manager.received(conn, await websocket.receive_text())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        ws_manager.disconnect(conn)
 
 
 @router.get("/analytics/performance")
-async def get_performance_metrics(user: User = Depends(require_officer_or_admin), db: Session = Depends(get_db)):
+async def get_performance_metrics(user: User = Depends(require_officer_or_admin), db: AsyncSession = Depends(get_read_db)):
     from datetime import datetime, timezone
     from app.models.escalation import Escalation
 
-    wo_query = db.query(WorkOrder)
-    c_query = db.query(Complaint)
+    wo_query = select(WorkOrder).options(selectinload(WorkOrder.complaint), selectinload(WorkOrder.contractor))
     if user.tenant_id:
-        wo_query = wo_query.filter(WorkOrder.tenant_id == user.tenant_id)
-        c_query = c_query.filter(Complaint.tenant_id == user.tenant_id)
+        wo_query = wo_query.where(WorkOrder.tenant_id == user.tenant_id)
 
     # Average resolution time (hours) per category
-    completed_orders = wo_query.filter(WorkOrder.completed_at.isnot(None)).all()
+    completed_orders = (await db.scalars(wo_query.where(WorkOrder.completed_at.isnot(None)))).all()
     resolution_times: dict[str, list[float]] = {}
     sla_breaches = 0
     sla_total = 0
     for wo in completed_orders:
-        complaint = db.query(Complaint).filter(Complaint.id == wo.complaint_id).first()
+        complaint = wo.complaint
         if not complaint:
             continue
         created = wo.created_at
@@ -371,7 +447,7 @@ async def get_performance_metrics(user: User = Depends(require_officer_or_admin)
             continue
         cid = str(wo.contractor_id)
         if cid not in contractor_stats:
-            contractor = db.query(Contractor).filter(Contractor.id == cid).first()
+            contractor = wo.contractor
             contractor_stats[cid] = {
                 "name": contractor.name if contractor else cid,
                 "completed": 0,
@@ -397,9 +473,12 @@ async def get_performance_metrics(user: User = Depends(require_officer_or_admin)
     ]
 
     # Escalation count
-    escalation_count = db.query(Escalation).join(
-        Complaint, Escalation.complaint_id == Complaint.id
-    ).filter(Complaint.tenant_id == user.tenant_id).count() if user.tenant_id else db.query(Escalation).count()
+    escalation_query = select(func.count(Escalation.id))
+    if user.tenant_id:
+        escalation_query = escalation_query.join(
+            Complaint, Escalation.complaint_id == Complaint.id
+        ).where(Complaint.tenant_id == user.tenant_id)
+    escalation_count = await db.scalar(escalation_query)
 
     return {
         "avg_resolution_hours_by_category": avg_resolution_by_category,
@@ -412,11 +491,11 @@ async def get_performance_metrics(user: User = Depends(require_officer_or_admin)
 
 
 @router.get("/contractors")
-async def list_contractors(user: User = Depends(require_officer_or_admin), db: Session = Depends(get_db)):
-    query = db.query(Contractor)
+async def list_contractors(user: User = Depends(require_officer_or_admin), db: AsyncSession = Depends(get_db)):
+    query = select(Contractor)
     if user.tenant_id:
-        query = query.filter(Contractor.tenant_id == user.tenant_id)
-    contractors = query.all()
+        query = query.where(Contractor.tenant_id == user.tenant_id)
+    contractors = (await db.scalars(query)).all()
     return {
         "contractors": [
             {"id": str(c.id), "name": c.name, "specializations": c.specializations,
@@ -427,10 +506,10 @@ async def list_contractors(user: User = Depends(require_officer_or_admin), db: S
 
 
 @router.get("/briefing")
-async def get_latest_briefing(user: User = Depends(require_officer_or_admin), db: Session = Depends(get_db)):
+async def get_latest_briefing(user: User = Depends(require_officer_or_admin), db: AsyncSession = Depends(get_db)):
     """Return the most recent daily officer briefing."""
     from app.models.daily_briefing import DailyBriefing
-    briefing = db.query(DailyBriefing).order_by(DailyBriefing.created_at.desc()).first()
+    briefing = await db.scalar(select(DailyBriefing).order_by(DailyBriefing.created_at.desc()).limit(1))
     if not briefing:
         return {"briefing": None, "message": "No briefing generated yet. Trigger one via POST /admin/briefing/generate"}
     return {
@@ -448,7 +527,7 @@ async def get_latest_briefing(user: User = Depends(require_officer_or_admin), db
 
 
 @router.post("/briefing/generate")
-async def trigger_briefing(user: User = Depends(require_officer_or_admin), db: Session = Depends(get_db)):
+async def trigger_briefing(user: User = Depends(require_officer_or_admin), db: AsyncSession = Depends(get_db)):
     """Manually trigger a daily briefing generation (for demo/testing)."""
     from app.agents.briefing import generate_daily_briefing
     briefing = await generate_daily_briefing(db)
@@ -465,7 +544,7 @@ async def trigger_briefing(user: User = Depends(require_officer_or_admin), db: S
 
 
 @router.post("/cluster/detect")
-async def trigger_cluster_detection(user: User = Depends(require_officer_or_admin), db: Session = Depends(get_db)):
+async def trigger_cluster_detection(user: User = Depends(require_officer_or_admin), db: AsyncSession = Depends(get_db)):
     """Manually trigger cluster detection (for demo/testing)."""
     from app.agents.cluster import run_cluster_detection
     clusters_created = await run_cluster_detection(db)
@@ -1,22 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.schemas.auth import AdminLogin, TokenResponse
-from app.utils.auth import verify_password, create_access_token
+from app.services.kv_store import kv_store
+from app.utils.auth import verify_password_async, hash_password_async, needs_rehash, create_access_token, principal_claims
 
 router = APIRouter(prefix="/admin", tags=["auth"])
 
 
+async def _too_many_attempts(key: str):
+    window = settings.login_throttle_window_minutes * 60
+    raise HTTPException(
+        status_code=429, detail="Too many login attempts. Try again later.",
+        headers={"Retry-After": str(await kv_store.ttl(key) or window)},
+    )
+
+
 @router.post("/login", response_model=TokenResponse)
-async def admin_login(data: AdminLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not user.password_hash:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not verify_password(data.password, user.password_hash):
+async def admin_login(data: AdminLogin, request: Request, db: AsyncSession = Depends(get_db)):
+    # Throttle before touching bcrypt so a credential-stuffing burst can't eat the CPU
+    window = settings.login_throttle_window_minutes * 60
+    if request.client:
+        ip_key = f"login:ip:{request.client.host}"
+        if await kv_store.incr(ip_key, window) > settings.login_max_attempts_per_ip:
+            await _too_many_attempts(ip_key)
+    # Only failed verifies count against the account; a burst of parallel guesses can
+    # overshoot the limit by at most the burst size, which the IP limit above bounds
+    account_key = f"login:account:{data.email.strip().lower()}"
+    if int(await kv_store.get(account_key) or 0) >= settings.login_max_failures_per_account:
+        await _too_many_attempts(account_key)
+
+    user = await db.scalar(select(User).where(User.email == data.email))
+    if not user or not user.password_hash or not await verify_password_async(data.password, user.password_hash):
+        await kv_store.incr(account_key, window)
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    await kv_store.delete(account_key)
     if user.role not in ("admin", "officer"):
         raise HTTPException(status_code=403, detail="Not authorized")
-    token = create_access_token({"sub": str(user.id), "role": user.role})
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(data.password)
+        await db.commit()
+    token = create_access_token(principal_claims(user))
     return TokenResponse(access_token=token, role=user.role)
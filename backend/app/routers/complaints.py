@@ -3,19 +3,24 @@ import string
 import random
 from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, Response, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.database import get_db, SessionLocal
+from app.database import get_db, get_read_db, AsyncSessionLocal
 from app.models.complaint import Complaint, ComplaintMedia
 from app.models.work_order import WorkOrder as WorkOrderModel
+from app.models.upload_session import UploadSession
 from app.schemas.complaint import ComplaintResponse, ComplaintTrackResponse, ComplaintListResponse, OTPRequest, OTPVerify
 from app.schemas.common import MessageResponse
+from app.schemas.upload import UploadCreate, UploadStatusResponse
 from app.agents import create_pipeline, PipelineContext
-from app.services.media import media_service
-from app.services.otp import otp_service
+from app.services.media import media_service, UploadOffsetMismatch
+from app.services.otp import otp_service, OTPThrottled
 from app.services.email import email_service
 from app.services.websocket import ws_manager
+from app.services import admin_events
 
 router = APIRouter(prefix="/complaints", tags=["complaints"])
 
@@ -31,7 +36,7 @@ async def _run_pipeline_background(
     raw_input: dict,
 ):
     """Run the AI pipeline in the background after the response has been sent."""
-    db = SessionLocal()
+    db = AsyncSessionLocal()
     try:
         pipeline = create_pipeline()
         context = PipelineContext(complaint_id=complaint_id, tenant_id=tenant_id)
@@ -40,9 +45,11 @@ async def _run_pipeline_background(
 
         result = await pipeline.run(context, db)
 
-        complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+        complaint = await db.get(Complaint, complaint_id)
         if not complaint:
             return
+        before = admin_events.complaint_state(complaint)
+        wo = None
 
         complaint.status = result.status if not result.errors else "submitted"
         complaint.category = result.data.get("category")
@@ -61,10 +68,43 @@ async def _run_pipeline_background(
         complaint.district = result.data.get("district") or complaint.district
         complaint.address = result.data.get("address") or complaint.address
         complaint.state = result.data.get("state") or complaint.state
+        complaint.state_code = result.data.get("state_code") or complaint.state_code
+        complaint.district_code = result.data.get("district_code") or complaint.district_code
+
+        from app.models.geocode_retry import GeocodeRetry
+        retry = await db.scalar(select(GeocodeRetry).where(GeocodeRetry.complaint_id == complaint_id))
+        if result.data.get("geocode_pending"):
+            # Provider was down or throttling us — re-resolve later instead of keeping the placeholder.
+            # A rerun of the pipeline reuses the complaint's row (complaint_id is unique) and restarts its schedule.
+            from datetime import datetime, timezone, timedelta
+            from app.config import settings
+            if retry is None:
+                retry = GeocodeRetry(complaint_id=complaint_id)
+                db.add(retry)
+            retry.tenant_id = tenant_id
+            retry.latitude = result.data["latitude"]
+            retry.longitude = result.data["longitude"]
+            retry.attempts = 0
+            retry.next_attempt_at = datetime.now(timezone.utc) + timedelta(minutes=settings.geocode_retry_base_minutes)
+        elif retry is not None:
+            await db.delete(retry)  # this run resolved the location
+
+        # Persist what intake extracted from voice notes, images and video keyframes
+        extracted = {
+            m["file_path"]: m["extracted_text"]
+            for m in result.data.get("media_files", []) if m.get("extracted_text")
+        }
+        if extracted:
+            for media in await db.scalars(select(ComplaintMedia).where(
+                ComplaintMedia.complaint_id == complaint_id,
+                ComplaintMedia.file_path.in_(list(extracted)),
+            )):
+                media.extracted_text = extracted[media.file_path]
 
         if result.work_order and not result.errors:
             from datetime import datetime
             from app.models.contractor import Contractor
+            from app.agents.tracker import next_sla_milestone
             assigned_contractor_id = result.work_order.get("contractor_id") or result.data.get("recommended_contractor_id")
             wo_status = "assigned" if assigned_contractor_id else "created"
             wo = WorkOrderModel(
@@ -77,22 +117,32 @@ async def _run_pipeline_background(
                 materials=result.work_order.get("materials"),
                 notes=result.work_order.get("summary"),
             )
+            wo.next_milestone_at = next_sla_milestone(wo)
             db.add(wo)
             if assigned_contractor_id:
-                contractor = db.query(Contractor).filter(Contractor.id == assigned_contractor_id).first()
+                contractor = await db.get(Contractor, assigned_contractor_id)
                 if contractor:
                     contractor.active_workload = (contractor.active_workload or 0) + 1
                 complaint.status = "assigned"
 
-        db.commit()
+        await db.commit()
         print(f"[Pipeline] Completed for {tracking_id} → status={complaint.status} category={complaint.category}")
 
+        deltas = admin_events.complaint_deltas(before, admin_events.complaint_state(complaint))
+        if wo is not None:
+            admin_events.work_order_deltas(None, wo.status, deltas)
+        await admin_events.publish(tenant_id, "complaint.classified", {
+            "id": complaint_id, "tracking_id": tracking_id, "status": complaint.status,
+            "category": complaint.category, "risk_level": complaint.risk_level,
+            "priority_score": complaint.priority_score, "work_order_id": wo.id if wo is not None else None,
+        }, deltas)
+
     except Exception as e:
         import traceback
         print(f"[Pipeline] Error for {tracking_id}: {e}")
         traceback.print_exc()
     finally:
-        db.close()
+        await db.close()
 
 
 @router.post("/", response_model=ComplaintResponse)
@@ -107,7 +157,8 @@ async def submit_complaint(
     address: Optional[str] = Form(None),
     tenant_id: Optional[str] = Form(None),
     files: list[UploadFile] = File(default=[]),
-    db: Session = Depends(get_db),
+    upload_ids: list[str] = Form(default=[]),
+    db: AsyncSession = Depends(get_db),
 ):
     tracking_id = generate_tracking_id()
     complaint_id = str(uuid.uuid4())
@@ -115,11 +166,18 @@ async def submit_complaint(
     # Auto-assign default tenant if none provided
     if not tenant_id:
         from app.models.tenant import Tenant
-        default_tenant = db.query(Tenant).first()
+        default_tenant = await db.scalar(select(Tenant).limit(1))
         if default_tenant:
             tenant_id = str(default_tenant.id)
 
     media_files = []
+    # Media already delivered through the resumable upload endpoints
+    for upload_id in upload_ids:
+        try:
+            media_files.append(await media_service.claim_upload(db, upload_id, complaint_id))
+        except ValueError as e:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
     for f in files:
         saved = await media_service.save_file(f, complaint_id)
         media_files.append(saved)
@@ -136,20 +194,24 @@ async def submit_complaint(
         longitude=longitude,
         address=address,
         status="submitted",
+        # Set up front so the response can read the collection after commit without a lazy load
+        media=[
+            ComplaintMedia(
+                complaint_id=complaint_id,
+                file_path=mf["file_path"],
+                media_type=mf["media_type"],
+                original_filename=mf.get("original_filename"),
+            )
+            for mf in media_files
+        ],
     )
     db.add(complaint)
 
-    for mf in media_files:
-        media = ComplaintMedia(
-            complaint_id=complaint_id,
-            file_path=mf["file_path"],
-            media_type=mf["media_type"],
-            original_filename=mf.get("original_filename"),
-        )
-        db.add(media)
-
-    db.commit()
-    db.refresh(complaint)
+    await db.commit()
+    await admin_events.publish(complaint.tenant_id, "complaint.created", {
+        "id": complaint_id, "tracking_id": tracking_id, "status": complaint.status,
+        "created_at": complaint.created_at.isoformat() if complaint.created_at else None,
+    }, admin_events.complaint_deltas(None, admin_events.complaint_state(complaint)))
 
     # Kick off AI pipeline in background — respond instantly to citizen
     raw_input = {
@@ -173,10 +235,96 @@ async def submit_complaint(
     return complaint
 
 
+def _upload_status(upload: UploadSession) -> UploadStatusResponse:
+    return UploadStatusResponse(
+        upload_id=upload.id, offset=upload.received, size=upload.total_size,
+        status=upload.status, media_type=upload.media_type, expires_at=upload.expires_at,
+    )
+
+
+async def _get_upload(db: AsyncSession, upload_id: str, lock: bool = False) -> UploadSession:
+    upload = await db.get(UploadSession, upload_id, with_for_update=True if lock else None)
+    if not upload or upload.status == "consumed":
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return upload
+
+
+@router.post("/uploads", response_model=UploadStatusResponse, status_code=201)
+async def create_upload(data: UploadCreate, response: Response, db: AsyncSession = Depends(get_db)):
+    """Start a resumable upload for large voice/video evidence."""
+    try:
+        upload = await media_service.create_upload(db, data.filename, data.size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Location"] = f"/complaints/uploads/{upload.id}"
+    response.headers["Upload-Offset"] = "0"
+    return _upload_status(upload)
+
+
+@router.head("/uploads/{upload_id}")
+async def upload_offset(upload_id: str, db: AsyncSession = Depends(get_db)):
+    """Report how many bytes the server holds so the client knows where to resume."""
+    upload = await _get_upload(db, upload_id)
+    return Response(headers={
+        "Upload-Offset": str(upload.received),
+        "Upload-Length": str(upload.total_size),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatusResponse)
+async def get_upload(upload_id: str, db: AsyncSession = Depends(get_db)):
+    return _upload_status(await _get_upload(db, upload_id))
+
+
+@router.patch("/uploads/{upload_id}", response_model=UploadStatusResponse)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Append the request body at Upload-Offset. The body is streamed, never buffered whole."""
+    # One PATCH per upload at a time; a concurrent one then sees the new offset and gets 409
+    async with media_service.upload_lock(upload_id):
+        upload = await _get_upload(db, upload_id, lock=True)
+        if upload.status != "pending":
+            raise HTTPException(status_code=409, detail="Upload already finalized")
+        try:
+            offset = await media_service.append_chunk(db, upload, upload_offset, request.stream())
+        except UploadOffsetMismatch as e:
+            await db.rollback()  # release the row lock
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Upload-Offset"] = str(offset)
+    return _upload_status(upload)
+
+
+@router.post("/uploads/{upload_id}/finalize", response_model=UploadStatusResponse)
+async def finalize_upload(upload_id: str, db: AsyncSession = Depends(get_db)):
+    """Seal a fully received upload so its ID can be passed to submit_complaint."""
+    async with media_service.upload_lock(upload_id):
+        upload = await _get_upload(db, upload_id, lock=True)
+        try:
+            upload = await media_service.finalize_upload(db, upload)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+    return _upload_status(upload)
+
+
 @router.get("/track/{tracking_id}")
-async def track_complaint(tracking_id: str, db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    complaint = db.query(Complaint).options(joinedload(Complaint.media), joinedload(Complaint.work_order)).filter(Complaint.tracking_id == tracking_id).first()
+async def track_complaint(tracking_id: str, db: AsyncSession = Depends(get_read_db)):
+    query = (
+        select(Complaint).options(selectinload(Complaint.media), selectinload(Complaint.work_order))
+        .where(Complaint.tracking_id == tracking_id)
+    )
+    complaint = await db.scalar(query)
+    if not complaint and db.info.get("replica"):
+        # Submitted moments ago and not replicated yet — the primary has it
+        async with AsyncSessionLocal() as primary:
+            complaint = await primary.scalar(query)
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     media_list = [
@@ -208,9 +356,12 @@ async def track_complaint(tracking_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/verify-email")
-async def request_otp(data: OTPRequest):
-    otp = otp_service.generate_otp(data.email)
-    sent = await email_service.send_otp(data.email, otp)
+async def request_otp(data: OTPRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    try:
+        otp = await otp_service.generate_otp(data.email, client_ip=request.client.host if request.client else None)
+    except OTPThrottled as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    sent = await email_service.send_otp(data.email, otp, db=db)
     if not sent:
         # SMTP not configured — return OTP directly for dev/demo use
         print(f"[DEV] OTP for {data.email}: {otp}")
@@ -220,7 +371,7 @@ async def request_otp(data: OTPRequest):
 
 @router.post("/verify-otp")
 async def verify_otp(data: OTPVerify):
-    if not otp_service.verify_otp(data.email, data.otp):
+    if not await otp_service.verify_otp(data.email, data.otp):
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
     from app.utils.auth import create_access_token
     from datetime import timedelta
@@ -229,24 +380,24 @@ async def verify_otp(data: OTPVerify):
 
 
 @router.get("/my", response_model=ComplaintListResponse)
-async def my_complaints(email: str, db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    complaints = (
-        db.query(Complaint)
-        .options(joinedload(Complaint.media))
-        .filter(Complaint.citizen_email == email)
+async def my_complaints(email: str, db: AsyncSession = Depends(get_read_db)):
+    complaints = (await db.scalars(
+        select(Complaint)
+        .options(selectinload(Complaint.media))
+        .where(Complaint.citizen_email == email)
         .order_by(Complaint.created_at.desc())
-        .all()
-    )
+    )).all()
     return ComplaintListResponse(complaints=complaints, total=len(complaints))
 
 
 @router.post("/{tracking_id}/rate")
-async def rate_complaint(tracking_id: str, rating: int, comment: str = "", db: Session = Depends(get_db)):
+async def rate_complaint(tracking_id: str, rating: int, comment: str = "", db: AsyncSession = Depends(get_db)):
     """Citizen rates a resolved complaint (1-5 stars). Auto-updates contractor rating."""
     if rating < 1 or rating > 5:
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
-    complaint = db.query(Complaint).filter(Complaint.tracking_id == tracking_id).first()
+    complaint = await db.scalar(
+        select(Complaint).options(selectinload(Complaint.work_order)).where(Complaint.tracking_id == tracking_id)
+    )
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     if complaint.status not in ("resolved", "closed", "in_progress"):
@@ -257,6 +408,7 @@ async def rate_complaint(tracking_id: str, rating: int, comment: str = "", db: S
     complaint.satisfaction_rating = rating
     complaint.satisfaction_comment = comment or None
 
+    before = admin_events.complaint_state(complaint)
     # Auto-reopen if rating is very low (1 or 2 stars) — contractor didn't actually fix it
     if rating <= 2 and complaint.status in ("resolved", "closed"):
         complaint.status = "in_progress"
@@ -266,44 +418,84 @@ async def rate_complaint(tracking_id: str, rating: int, comment: str = "", db: S
     # Update contractor rolling rating
     if complaint.work_order and complaint.work_order.contractor_id:
         from app.models.contractor import Contractor
-        contractor = db.query(Contractor).filter(Contractor.id == complaint.work_order.contractor_id).first()
+        contractor = await db.get(Contractor, complaint.work_order.contractor_id)
         if contractor:
             old_rating = contractor.rating or 0.0
             completed = max(1, contractor.active_workload or 1)
             # simple exponential moving average (alpha=0.3)
             contractor.rating = round(0.7 * old_rating + 0.3 * rating, 2)
 
-    db.commit()
+    await db.commit()
+    if complaint.status != before["status"]:
+        await _publish_reopen_or_close(complaint, before)
     return {"message": "Thank you for your feedback!", "rating": rating}
 
 
 @router.post("/{tracking_id}/verify")
-async def verify_complaint_fixed(tracking_id: str, is_fixed: bool, db: Session = Depends(get_db)):
+async def verify_complaint_fixed(tracking_id: str, is_fixed: bool, db: AsyncSession = Depends(get_db)):
     """Citizen confirms whether the issue was actually fixed after it was marked resolved."""
-    complaint = db.query(Complaint).filter(Complaint.tracking_id == tracking_id).first()
+    complaint = await db.scalar(select(Complaint).where(Complaint.tracking_id == tracking_id))
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     if complaint.status not in ("resolved", "closed"):
         raise HTTPException(status_code=400, detail="Complaint is not in resolved state")
 
+    before = admin_events.complaint_state(complaint)
     complaint.verified_fixed = is_fixed
     if not is_fixed:
         # Citizen says it's NOT fixed — auto-reopen
         complaint.status = "in_progress"
         complaint.reopen_count = (complaint.reopen_count or 0) + 1
-        db.commit()
+        await db.commit()
+        await _publish_reopen_or_close(complaint, before)
         return {"message": "Complaint reopened. We'll follow up with the contractor.", "status": "in_progress"}
     else:
         complaint.status = "closed"
-        db.commit()
+        await db.commit()
+        await _publish_reopen_or_close(complaint, before)
         return {"message": "Thank you for confirming! Complaint closed.", "status": "closed"}
 
 
+async def _publish_reopen_or_close(complaint: Complaint, before: dict):
+    await admin_events.publish(
+        complaint.tenant_id, "complaint.updated",
+        {"id": complaint.id, "tracking_id": complaint.tracking_id, "status": complaint.status,
+         "reopen_count": complaint.reopen_count},
+        admin_events.complaint_deltas(before, admin_events.complaint_state(complaint)),
+    )
+
+
+async def _status_snapshot(tracking_id: str) -> Optional[dict]:
+    async with AsyncSessionLocal() as db:
+        complaint = await db.scalar(
+            select(Complaint).options(selectinload(Complaint.work_order)).where(Complaint.tracking_id == tracking_id)
+        )
+        if not complaint:
+            return None
+        wo = complaint.work_order
+        return {
+            "type": "snapshot",
+            "tracking_id": tracking_id,
+            "status": complaint.status,
+            "category": complaint.category,
+            "risk_level": complaint.risk_level,
+            "work_order_status": wo.status if wo else None,
+            "sla_deadline": wo.sla_deadline.isoformat() if wo and wo.sla_deadline else None,
+            "updated_at": complaint.updated_at.isoformat() if complaint.updated_at else None,
+        }
+
+
 @router.websocket("/ws/{tracking_id}")
 async def complaint_websocket(websocket: WebSocket, tracking_id: str):
-    await ws_manager.connect(tracking_id, websocket)
+    snapshot = await _status_snapshot(tracking_id)
+    if snapshot is None:
+        await websocket.close(code=4404)
+        return
+    conn = await ws_manager.connect(tracking_id, websocket, snapshot=snapshot)
     try:
         while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        ws_manager.disconnect(tracking_id, websocket)
+            ws_manager.received(conn, await websocket.receive_text())
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # client went away, or the manager closed a slow/idle socket
+    finally:
+        ws_manager.disconnect(conn)
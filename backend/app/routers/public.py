@@ -1,53 +1,70 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import Optional
 
-from app.database import get_db
+from app.database import get_read_db
 from app.models.complaint import Complaint
+from app.models.complaint_rollup import ComplaintRollup
+from app.services.rollups import rollup_counts, RESOLVED_STATUSES
+from app.utils.locations import normalize_state, normalize_district, state_code, district_code
 
 router = APIRouter(prefix="/public", tags=["public"])
 
 
+def _empty_dashboard() -> dict:
+    return {
+        "total_complaints": 0, "resolved_complaints": 0, "resolution_rate": 0,
+        "by_category": {}, "by_status": {}, "heatmap_data": [], "recent_complaints": [],
+    }
+
+
 @router.get("/dashboard")
 async def public_dashboard(
     tenant_id: Optional[str] = Query(None),
     state: Optional[str] = Query(None),
     district: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Complaint)
+    """Public counts, heatmap and recent complaints, optionally filtered.
+
+    ``state`` and ``district`` accept any spelling utils.locations knows
+    (official names, aliases such as "Orissa" or "Bangalore", near-miss
+    typos) and filter on the canonical codes. A name it cannot place
+    yields an empty dashboard; there is no fallback to matching the raw
+    text, since the counts come from rollups kept only per canonical code.
+    """
+    # Counts come from the rollup buckets; the heatmap and recent list still read rows
+    filters = {}
     if tenant_id:
-        query = query.filter(Complaint.tenant_id == tenant_id)
+        filters["tenant_id"] = tenant_id
 
     if category:
-        query = query.filter(Complaint.category == category)
+        filters["category"] = category
 
-    # Filter by state using the stored state field (from geocoding)
+    # State/district are matched on canonical codes assigned at intake (indexed equality)
+    official_state = normalize_state(state) if state else None
     if state:
-        query = query.filter(Complaint.state == state)
+        if not official_state:
+            return _empty_dashboard()
+        filters["state_code"] = state_code(official_state)
 
-    # Filter by district (fuzzy match since Nominatim names differ from official names)
     if district:
-        query = query.filter(
-            Complaint.district.ilike(f"%{district}%") |
-            Complaint.address.ilike(f"%{district}%")
-        )
+        match = normalize_district(district, official_state)
+        if not match:
+            return _empty_dashboard()
+        filters["district_code"] = district_code(*match)
 
-    total = query.count()
-    resolved = query.filter(Complaint.status.in_(["resolved", "closed"])).count()
+    scope = [getattr(Complaint, field) == value for field, value in filters.items()]
+    counts = await rollup_counts(db, *(getattr(ComplaintRollup, field) == value for field, value in filters.items()))
+    total = counts["total_complaints"]
+    by_status = counts["by_status"]
+    by_category = counts["by_category"]
+    resolved = sum(by_status.get(s, 0) for s in RESOLVED_STATUSES)
     resolution_rate = (resolved / total * 100) if total > 0 else 0
 
-    by_category = dict(
-        query.with_entities(Complaint.category, func.count(Complaint.id))
-        .filter(Complaint.category.isnot(None)).group_by(Complaint.category).all()
-    )
-
-    by_status = dict(
-        query.with_entities(Complaint.status, func.count(Complaint.id)).group_by(Complaint.status).all()
-    )
-
     # Calculate colors based on risk_level/status
     RISK_COLORS = {
         "critical": "#ef4444",
@@ -56,7 +73,9 @@ async def public_dashboard(
         "low": "#22c55e",
     }
     heatmap = []
-    for c in query.filter(Complaint.latitude.isnot(None), Complaint.longitude.isnot(None)).limit(500).all():
+    for c in await db.scalars(
+        select(Complaint).where(*scope, Complaint.latitude.isnot(None), Complaint.longitude.isnot(None)).limit(500)
+    ):
         if c.status in ["resolved", "closed"]:
             color = "#22c55e"
         else:
@@ -71,7 +90,9 @@ async def public_dashboard(
         })
 
     recent_complaints = []
-    for c in query.order_by(Complaint.created_at.desc()).options(joinedload(Complaint.media)).limit(50).all():
+    for c in await db.scalars(
+        select(Complaint).where(*scope).order_by(Complaint.created_at.desc()).options(selectinload(Complaint.media)).limit(50)
+    ):
         media_url = None
         if c.media:
             # Find first image media, prefer image type
@@ -9,3 +9,4 @@ from app.schemas.complaint import (
 )
 from app.schemas.auth import AdminLogin, TokenResponse
 from app.schemas.work_order import WorkOrderResponse, WorkOrderUpdate
+from app.schemas.upload import UploadCreate, UploadStatusResponse
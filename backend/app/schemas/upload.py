@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class UploadCreate(BaseModel):
+    filename: Optional[str] = None
+    size: int
+
+
+class UploadStatusResponse(BaseModel):
+    upload_id: str
+    offset: int
+    size: int
+    status: str
+    media_type: str
+    expires_at: datetime
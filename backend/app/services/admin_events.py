@@ -0,0 +1,68 @@
+"""
+Live operations feed for the admin dashboard.
+
+State changes publish a compact event to the tenant's admin topic on the
+WebSocket backplane, together with counter deltas in the same shape as
+``/admin/analytics`` (plus ``work_orders_by_status``). A dashboard applies
+the deltas to the snapshot it received on connect instead of re-running the
+count/group-by queries. Users without a tenant watch the ``admin:*`` topic,
+which receives every tenant's events.
+
+Events are published after the commit that made the change, so a client
+never sees a change that was rolled back.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.services.websocket import ws_manager, admin_topic
+
+COMPLAINT_COUNTERS = (("status", "by_status"), ("category", "by_category"), ("risk_level", "by_risk_level"))
+
+
+def complaint_state(complaint) -> dict:
+    """The fields the dashboard counters are grouped by."""
+    return {"status": complaint.status, "category": complaint.category, "risk_level": complaint.risk_level}
+
+
+def _bump(deltas: dict, key: str, old: Optional[str], new: Optional[str]):
+    if old == new:
+        return
+    bucket = deltas.setdefault(key, {})
+    if old is not None:
+        bucket[old] = bucket.get(old, 0) - 1
+    if new is not None:
+        bucket[new] = bucket.get(new, 0) + 1
+
+
+def complaint_deltas(before: Optional[dict], after: dict, deltas: Optional[dict] = None) -> dict:
+    """Counter changes for one complaint; ``before`` is None for a new complaint."""
+    deltas = {} if deltas is None else deltas
+    if before is None:
+        deltas["total_complaints"] = deltas.get("total_complaints", 0) + 1
+    for field, key in COMPLAINT_COUNTERS:
+        _bump(deltas, key, (before or {}).get(field), after.get(field))
+    return deltas
+
+
+def work_order_deltas(old_status: Optional[str], new_status: Optional[str], deltas: Optional[dict] = None) -> dict:
+    """Counter changes for one work order; ``old_status`` is None for a new work order."""
+    deltas = {} if deltas is None else deltas
+    _bump(deltas, "work_orders_by_status", old_status, new_status)
+    return deltas
+
+
+async def publish(tenant_id: Optional[str], event: str, data: dict, deltas: Optional[dict] = None):
+    message = {
+        "type": event,
+        "tenant_id": tenant_id,
+        "at": datetime.now(timezone.utc).isoformat(),
+        "data": data,
+        # Drop buckets that netted out to zero
+        "deltas": {
+            k: v if isinstance(v, int) else {b: n for b, n in v.items() if n}
+            for k, v in (deltas or {}).items()
+        },
+    }
+    await ws_manager.send_update(admin_topic(tenant_id), message)
+    if tenant_id:
+        await ws_manager.send_update(admin_topic(None), message)
@@ -0,0 +1,128 @@
+"""
+Offline reverse geocoding against administrative boundary polygons.
+
+Each tenant can ship GeoJSON boundary layers under BOUNDARIES_DIR:
+
+    boundaries/<tenant_id>/state.geojson
+    boundaries/<tenant_id>/district.geojson
+    boundaries/<tenant_id>/block.geojson
+    boundaries/<tenant_id>/ward.geojson
+
+with ``boundaries/default/`` used when a tenant has no layers of its own.
+Features are named by their ``name`` property (BOUNDARY_NAME_PROPERTY), which
+should hold the official spelling, e.g. the districts in STATE_DISTRICT_MAP.
+Layers are loaded once into a shapely STRtree, so a lookup is an R-tree
+probe plus a handful of exact point-in-polygon tests.
+"""
+import asyncio
+import json
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+
+_BASE_DIR = Path(__file__).resolve().parent.parent.parent  # → backend/
+
+LEVELS = ("state", "district", "block", "ward")
+
+
+class _Layer:
+    def __init__(self, geometries: list, names: list[str]):
+        from shapely import STRtree
+        self.geometries = geometries
+        self.names = names
+        self.tree = STRtree(geometries)
+
+    def lookup(self, point) -> Optional[str]:
+        hits = self.tree.query(point, predicate="intersects")
+        if len(hits) == 0:
+            return None
+        # Overlapping polygons (sloppy borders, enclaves): prefer the most specific
+        best = min(hits, key=lambda i: self.geometries[i].area)
+        return self.names[best]
+
+
+def _load_layer(path: Path) -> Optional[_Layer]:
+    from shapely.geometry import shape
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+    geometries, names = [], []
+    for feature in collection.get("features", []):
+        props = feature.get("properties") or {}
+        name = props.get(settings.boundary_name_property) or props.get("name") or props.get("NAME")
+        if not name or not feature.get("geometry"):
+            continue
+        geometries.append(shape(feature["geometry"]))
+        names.append(str(name).strip())
+    return _Layer(geometries, names) if geometries else None
+
+
+class BoundaryGeocoder:
+    def __init__(self):
+        self.boundaries_dir = Path(settings.boundaries_dir)
+        if not self.boundaries_dir.is_absolute():
+            self.boundaries_dir = _BASE_DIR / self.boundaries_dir
+        self._layers: dict[str, dict[str, _Layer]] = {}
+        self._lock = asyncio.Lock()
+
+    def _tenant_dir(self, tenant_id: Optional[str]) -> Optional[Path]:
+        for name in (tenant_id, "default"):
+            if name and (self.boundaries_dir / name).is_dir():
+                return self.boundaries_dir / name
+        return None
+
+    def _load_tenant(self, directory: Path) -> dict[str, _Layer]:
+        try:
+            import shapely  # noqa: F401
+        except ImportError:
+            print("[Boundaries] shapely not installed — offline geocoding disabled")
+            return {}
+        layers = {}
+        for level in LEVELS:
+            path = directory / f"{level}.geojson"
+            if not path.exists():
+                continue
+            try:
+                layer = _load_layer(path)
+            except Exception as e:
+                print(f"[Boundaries] Failed to load {path}: {e}")
+                continue
+            if layer:
+                layers[level] = layer
+                print(f"[Boundaries] Loaded {len(layer.names)} {level} polygons from {path}")
+        return layers
+
+    async def _get_layers(self, tenant_id: Optional[str]) -> dict[str, _Layer]:
+        directory = self._tenant_dir(tenant_id)
+        if directory is None:
+            return {}
+        key = directory.name
+        if key not in self._layers:
+            async with self._lock:
+                if key not in self._layers:
+                    self._layers[key] = await asyncio.to_thread(self._load_tenant, directory)
+        return self._layers[key]
+
+    async def lookup(self, lat: float, lon: float, tenant_id: Optional[str] = None) -> dict:
+        """Return canonical state/district/block/ward names containing the point.
+
+        Levels with no layer or no containing polygon are omitted.
+        """
+        layers = await self._get_layers(tenant_id)
+        if not layers:
+            return {}
+        from shapely.geometry import Point
+        point = Point(lon, lat)  # GeoJSON order
+        result = {}
+        for level, layer in layers.items():
+            name = layer.lookup(point)
+            if name:
+                result[level] = name
+        return result
+
+    def reload(self):
+        """Drop loaded layers so updated GeoJSON is picked up on next lookup."""
+        self._layers.clear()
+
+
+boundary_geocoder = BoundaryGeocoder()
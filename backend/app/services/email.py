@@ -1,82 +1,233 @@
-import smtplib
-from datetime import datetime, timezone
+import asyncio
+from datetime import datetime, timezone, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
 
+from sqlalchemy import or_, select, update
+
 from app.config import settings
+from app.services.smtp import smtp_pool
+
+# Per-type coalescing window in seconds. Types listed here are held for the
+# window and merged with the recipient's other pending updates into a single
+# digest; anything else (confirmations, general) goes out on the next
+# dispatch. OTPs never enter the outbox; they are sent inline and only
+# audited there.
+COALESCE_WINDOWS = {
+    "status_update": settings.notification_coalesce_seconds,
+}
 
 
 class EmailService:
-    async def send_email(self, to: str, subject: str, body: str,
-                         notification_type: str = "general",
-                         complaint_id: Optional[str] = None,
-                         db=None) -> bool:
-        sent = False
+    def _build_message(self, to: str, subject: str, body: str) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg["From"] = "CivicAI <noreply@civicai.gov>"
+        msg["To"] = to
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "html"))
+        return msg
+
+    async def send_email(self, to: str, subject: str, body: str) -> bool:
+        """Send immediately, bypassing the outbox. Only for messages a request is waiting on (OTP)."""
         try:
-            msg = MIMEMultipart()
-            msg["From"] = "CivicAI <noreply@civicai.gov>"
-            msg["To"] = to
-            msg["Subject"] = subject
-            msg.attach(MIMEText(body, "html"))
-
-            with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-                if settings.smtp_user:
-                    server.login(settings.smtp_user, settings.smtp_password)
-                server.send_message(msg)
-            sent = True
+            return await smtp_pool.send(self._build_message(to, subject, body))
         except Exception as e:
             print(f"Email send failed: {e}")
+            return False
 
-        # Always log notification to DB audit trail
-        if db is not None:
+    def enqueue(self, db, to: str, subject: str, body: str,
+                notification_type: str = "general",
+                complaint_id: Optional[str] = None):
+        """Add a pending notification to the caller's session.
+
+        Nothing is committed here: the row becomes visible (and gets sent by
+        dispatch_outbox) only if the caller's transaction commits.
+        Coalescible types are held for their COALESCE_WINDOWS window first.
+        """
+        from app.models.notification import Notification
+        window = COALESCE_WINDOWS.get(notification_type, 0)
+        notif = Notification(
+            complaint_id=complaint_id,
+            recipient_email=to,
+            notification_type=notification_type,
+            message=subject,
+            body=body,
+            status="pending",
+            next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=window),
+        )
+        db.add(notif)
+        return notif
+
+    def _build_digest(self, to: str, notifications: list) -> MIMEMultipart:
+        # Identical updates (e.g. the same warning queued twice) are shown once
+        sections = list(dict.fromkeys(n.body or f"<p>{n.message}</p>" for n in notifications))
+        if len(sections) == 1:
+            return self._build_message(to, notifications[0].message, sections[0])
+        body = f"<p>You have {len(sections)} updates on your complaints:</p>" + "<hr>".join(sections)
+        return self._build_message(to, f"CivicAI - {len(sections)} Complaint Updates", body)
+
+    async def _claim(self, db, ids: list[str], *criteria) -> list:
+        """Move rows to ``sending`` under a lease and return the ones this call won.
+
+        The UPDATE re-checks ``criteria``, so when two dispatchers race for the
+        same row (SQLite has no SKIP LOCKED) only one of them gets it back.
+        """
+        from app.models.notification import Notification
+        if not ids:
+            return []
+        lease_until = datetime.now(timezone.utc) + timedelta(seconds=settings.notification_send_lease_seconds)
+        return list(await db.scalars(
+            update(Notification).where(Notification.id.in_(ids), *criteria)
+            .values(status="sending", next_attempt_at=lease_until)
+            .returning(Notification)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        ))
+
+    async def dispatch_outbox(self, db) -> int:
+        """Send one batch of due outbox rows. Returns the number of rows sent.
+
+        Due rows are first claimed — set to ``sending`` with a lease of
+        NOTIFICATION_SEND_LEASE_SECONDS — and that claim is committed before
+        any SMTP traffic, so no lock is held while mail goes out and a second
+        dispatcher skips the claimed rows. A ``sending`` row whose lease ran
+        out (the dispatcher died mid-send) becomes due again.
+
+        Coalescible rows (COALESCE_WINDOWS) are grouped per recipient into one
+        digest email, together with that recipient's other pending coalescible
+        rows that are either still in their first coalesce window or already
+        due. Rows backing off after a failed send wait for their own retry
+        time. Successes are marked in a single UPDATE; failures back off
+        exponentially until NOTIFICATION_MAX_ATTEMPTS.
+        """
+        from app.models.notification import Notification
+
+        now = datetime.now(timezone.utc)
+        due = (
+            Notification.status.in_(["pending", "sending"]),
+            Notification.next_attempt_at <= now,
+        )
+        ids = list(await db.scalars(select(Notification.id).where(*due).order_by(
+            Notification.next_attempt_at
+        ).limit(settings.notification_batch_size).with_for_update(skip_locked=True)))
+        batch = await self._claim(db, ids, *due)
+        if not batch:
+            await db.rollback()
+            return 0
+
+        digest_recipients = {n.recipient_email for n in batch if n.notification_type in COALESCE_WINDOWS}
+        if digest_recipients:
+            joinable = (
+                Notification.status == "pending",
+                Notification.notification_type.in_(COALESCE_WINDOWS),
+                Notification.recipient_email.in_(digest_recipients),
+                or_(Notification.attempts == 0, Notification.next_attempt_at <= now),
+            )
+            extra_ids = list(await db.scalars(select(Notification.id).where(
+                *joinable, Notification.id.notin_([n.id for n in batch]),
+            ).with_for_update(skip_locked=True)))
+            batch += await self._claim(db, extra_ids, *joinable)
+        await db.commit()
+
+        groups: list[list] = []
+        digests: dict[str, list] = {}
+        for notif in batch:
+            if notif.notification_type in COALESCE_WINDOWS:
+                digests.setdefault(notif.recipient_email, []).append(notif)
+            else:
+                groups.append([notif])
+        groups.extend(digests.values())
+
+        async def deliver(group):
             try:
-                from app.models.notification import Notification
-                notif = Notification(
-                    complaint_id=complaint_id,
-                    recipient_email=to,
-                    notification_type=notification_type,
-                    message=subject,
-                    is_sent=sent,
-                    sent_at=datetime.now(timezone.utc) if sent else None,
-                )
-                db.add(notif)
-                db.commit()
+                await smtp_pool.send(self._build_digest(group[0].recipient_email, group))
+                return None
             except Exception as e:
-                print(f"Notification log failed: {e}")
+                return str(e) or e.__class__.__name__
 
-        return sent
+        errors = await asyncio.gather(*(deliver(g) for g in groups))
+
+        now = datetime.now(timezone.utc)
+        sent_ids = [n.id for group, err in zip(groups, errors) if err is None for n in group]
+        if sent_ids:
+            await db.execute(
+                update(Notification).where(Notification.id.in_(sent_ids))
+                .values(status="sent", is_sent=True, sent_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        for group, err in zip(groups, errors):
+            if err is None:
+                continue
+            for notif in group:
+                notif.attempts += 1
+                notif.last_error = err[:500]
+                if notif.attempts >= settings.notification_max_attempts:
+                    notif.status = "failed"
+                else:
+                    notif.status = "pending"
+                    notif.next_attempt_at = now + timedelta(seconds=settings.notification_retry_base_seconds * 2 ** notif.attempts)
+        await db.commit()
+        if len(groups) < len(batch):
+            print(f"[Notifications] Coalesced {len(batch)} notifications into {len(groups)} emails")
+        return len(sent_ids)
 
     async def send_otp(self, email: str, otp: str, db=None) -> bool:
-        return await self.send_email(
+        """Send an OTP immediately. With a session, an ``otp`` audit row records the outcome (never the code)."""
+        subject = "CivicAI - Your Verification Code"
+        sent = await self.send_email(
             to=email,
-            subject="CivicAI - Your Verification Code",
+            subject=subject,
             body=f"<h2>Your verification code is: <strong>{otp}</strong></h2><p>This code expires in {settings.otp_expire_minutes} minutes.</p>",
-            notification_type="otp",
-            db=db,
         )
+        if db is not None:
+            try:
+                from app.models.notification import Notification
+                now = datetime.now(timezone.utc)
+                db.add(Notification(
+                    recipient_email=email,
+                    notification_type="otp",
+                    message=subject,
+                    status="sent" if sent else "failed",
+                    attempts=1,
+                    is_sent=sent,
+                    sent_at=now if sent else None,
+                ))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print(f"Notification log failed: {e}")
+        return sent
 
     async def send_complaint_confirmation(self, email: str, tracking_id: str,
                                           complaint_id: Optional[str] = None, db=None) -> bool:
-        return await self.send_email(
+        return await self._send_or_enqueue(
+            db,
             to=email,
             subject=f"CivicAI - Complaint Registered ({tracking_id})",
             body=f"<h2>Your complaint has been registered</h2><p>Tracking ID: <strong>{tracking_id}</strong></p><p>Use this ID to track your complaint status.</p>",
             notification_type="confirmation",
             complaint_id=complaint_id,
-            db=db,
         )
 
     async def send_status_update(self, email: str, tracking_id: str, status: str,
                                  complaint_id: Optional[str] = None, db=None) -> bool:
-        return await self.send_email(
+        return await self._send_or_enqueue(
+            db,
             to=email,
             subject=f"CivicAI - Complaint Update ({tracking_id})",
             body=f"<h2>Complaint Status Update</h2><p>Your complaint <strong>{tracking_id}</strong> status has been updated to: <strong>{status}</strong></p>",
             notification_type="status_update",
             complaint_id=complaint_id,
-            db=db,
         )
 
+    async def _send_or_enqueue(self, db, to: str, subject: str, body: str,
+                               notification_type: str, complaint_id: Optional[str]) -> bool:
+        # With a session the message rides the caller's transaction; without one
+        # (scripts, ad-hoc use) it is sent straight away.
+        if db is None:
+            return await self.send_email(to, subject, body)
+        self.enqueue(db, to, subject, body, notification_type=notification_type, complaint_id=complaint_id)
+        return True
+
 
 email_service = EmailService()
@@ -1,30 +1,295 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
 import httpx
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.services.boundaries import boundary_geocoder
+from app.services.kv_store import kv_store
+from app.utils import geohash
+from app.utils.locations import normalize_location
+
+
+class _LRUCache:
+    """Small in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[datetime, dict]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= datetime.now(timezone.utc):
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: dict, expires_at: datetime):
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+class _RateLimiter:
+    """Allows one call per 1/rate-second slot across every worker sharing ``store``.
+
+    Slots are claimed with an atomic ``incr`` on the KV store, so with
+    KV_STORE=database all workers together stay within Nominatim's limit; with
+    the memory store the limit is per process.
+    """
+
+    def __init__(self, rate_per_second: float, store):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._store = store
+
+    async def acquire(self):
+        if self.interval <= 0:
+            return
+        while True:
+            slot = int(time.time() // self.interval)
+            if await self._store.incr(f"nominatim-slot:{slot}", ttl_seconds=self.interval * 2 + 1) == 1:
+                return
+            await asyncio.sleep(max((slot + 1) * self.interval - time.time(), 0.0))
 
 
 class GeocodingService:
     NOMINATIM_URL = "https://nominatim.openstreetmap.org/reverse"
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
 
-    async def reverse_geocode(self, lat: float, lon: float) -> dict:
+    def __init__(self):
+        self._cache = _LRUCache(settings.geocode_cache_size)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._limiter = _RateLimiter(settings.nominatim_rate_per_second, kv_store)
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def start(self):
+        """Open the shared keep-alive client. Called from the app lifespan."""
+        if self._client is not None:
+            return
         try:
-            async with httpx.AsyncClient(timeout=3.0) as client:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(settings.nominatim_timeout_seconds),
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=60),
+            headers={"User-Agent": settings.nominatim_user_agent},
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Scripts and jobs outside the app lifespan still get a pooled client
+        if self._client is None:
+            await self.start()
+        return self._client
+
+    async def reverse_geocode(self, lat: float, lon: float, tenant_id: Optional[str] = None,
+                              need_address: bool = True) -> dict:
+        """Resolve coordinates to address and jurisdiction.
+
+        Jurisdiction (state/district/block/ward) comes from the tenant's local
+        boundary polygons when available, giving official names with no network
+        call. Nominatim is only consulted for the free-text address, or when the
+        local layers miss the state, the district, or both ward and block (the
+        levels routing needs); levels the local layers do find always win.
+        """
+        local = await boundary_geocoder.lookup(lat, lon, tenant_id)
+        covered = all(local.get(level) for level in ("state", "district")) and (local.get("ward") or local.get("block"))
+        if covered and not need_address:
+            result = {"address": "", "ward": "", "block": "", "district": "", "city": "", "state": "", "resolved": True}
+        else:
+            result = await self._cached_nominatim(lat, lon)
+        result.update(local)
+        return result
+
+    async def _cached_nominatim(self, lat: float, lon: float) -> dict:
+        """Nominatim lookup behind the geohash cache.
+
+        Lookups are keyed by geohash cell (GEOCODE_CACHE_PRECISION), checked
+        first in the in-process LRU and then in the geocode_cache table.
+        Concurrent misses for the same cell share one request. Failed lookups
+        are cached briefly so a flapping provider is not hammered; the result
+        then has ``resolved=False`` so callers can queue a retry.
+        """
+        key = geohash.encode(lat, lon, settings.geocode_cache_precision)
+        cached = self._cache.get(key)
+        if cached is None:
+            persisted = await self._load_persisted(key)
+            if persisted is not None:
+                cached, expires_at = persisted
+                self._cache.set(key, cached, expires_at)
+        if cached is not None:
+            return self._placeholder(lat, lon) if cached.get("_negative") else {**cached, "resolved": True}
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._resolve_and_cache(key, lat, lon))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        result = await asyncio.shield(inflight)
+        if result is None:
+            return self._placeholder(lat, lon)
+        return {**result, "resolved": True}
+
+    async def _resolve_and_cache(self, key: str, lat: float, lon: float) -> Optional[dict]:
+        result = await self._lookup(lat, lon)
+        if result is None:
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.geocode_negative_ttl_seconds)
+            self._cache.set(key, {"_negative": True}, expires_at)
+            await self._store_persisted(key, None, expires_at)
+            return None
+
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=settings.geocode_cache_ttl_hours)
+        self._cache.set(key, result, expires_at)
+        await self._store_persisted(key, result, expires_at)
+        return result
+
+    async def _lookup(self, lat: float, lon: float) -> Optional[dict]:
+        client = await self._get_client()
+        data = None
+        for attempt in range(settings.nominatim_max_retries + 1):
+            await self._limiter.acquire()
+            try:
                 response = await client.get(
                     self.NOMINATIM_URL,
                     params={"lat": lat, "lon": lon, "format": "json", "addressdetails": 1},
-                    headers={"User-Agent": "CivicAI/1.0"},
                 )
+                if response.status_code in self.RETRYABLE_STATUS:
+                    raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+                response.raise_for_status()
                 data = response.json()
+                break
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in self.RETRYABLE_STATUS
+                if not retryable or attempt == settings.nominatim_max_retries:
+                    print(f"[Geocoding] Nominatim lookup failed for {lat},{lon}: {e}")
+                    return None
+                await asyncio.sleep(2 ** attempt)
+            except Exception as e:
+                print(f"[Geocoding] Nominatim lookup failed for {lat},{lon}: {e}")
+                return None
+        if not data or "address" not in data:
+            return None
+
+        address_parts = data.get("address", {})
+        return {
+            "address": data.get("display_name", ""),
+            "ward": address_parts.get("suburb", address_parts.get("neighbourhood", "")),
+            "block": address_parts.get("city_block", address_parts.get("quarter", "")),
+            "district": address_parts.get("city_district", address_parts.get("county", "")),
+            "city": address_parts.get("city", address_parts.get("town", "")),
+            "state": address_parts.get("state", ""),
+        }
+
+    def _placeholder(self, lat: float, lon: float) -> dict:
+        return {"address": f"Lat: {lat}, Lon: {lon}", "ward": "", "block": "", "district": "", "city": "",
+                "state": "", "resolved": False}
+
+    async def _load_persisted(self, key: str) -> Optional[tuple[dict, datetime]]:
+        """Read a live geocode_cache row as (value, expires_at)."""
+        from app.database import AsyncSessionLocal
+        from app.models.geocode_cache import GeocodeCache
+        try:
+            async with AsyncSessionLocal() as db:
+                row = await db.get(GeocodeCache, key)
+        except Exception as e:
+            print(f"[Geocoding] Cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        expires_at = row.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at <= datetime.now(timezone.utc):
+            return None
+        value = {"_negative": True} if row.is_negative else dict(row.result or {})
+        return value, expires_at
+
+    async def _store_persisted(self, key: str, result: Optional[dict], expires_at: datetime):
+        from app.database import AsyncSessionLocal
+        from app.models.geocode_cache import GeocodeCache
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.merge(GeocodeCache(
+                    geohash=key,
+                    result=result,
+                    is_negative=result is None,
+                    expires_at=expires_at,
+                ))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print(f"[Geocoding] Cache write failed: {e}")
+
+    async def purge_expired(self) -> int:
+        from app.database import AsyncSessionLocal
+        from app.models.geocode_cache import GeocodeCache
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(GeocodeCache).where(GeocodeCache.expires_at < datetime.now(timezone.utc))
+            )
+            await db.commit()
+            return result.rowcount
+
+    async def process_retry_queue(self, db) -> int:
+        """Re-resolve complaints whose intake geocoding failed. Returns how many were fixed.
+
+        Successful lookups overwrite the ``Lat: …, Lon: …`` placeholder and fill
+        empty jurisdiction fields; failures back off exponentially until
+        GEOCODE_RETRY_MAX_ATTEMPTS, after which the placeholder is kept.
+        """
+        from app.models.complaint import Complaint
+        from app.models.geocode_retry import GeocodeRetry
+
+        now = datetime.now(timezone.utc)
+        due = (await db.scalars(select(GeocodeRetry).where(GeocodeRetry.next_attempt_at <= now).order_by(
+            GeocodeRetry.next_attempt_at
+        ).limit(settings.geocode_retry_batch_size))).all()
 
-            address_parts = data.get("address", {})
-            return {
-                "address": data.get("display_name", ""),
-                "ward": address_parts.get("suburb", address_parts.get("neighbourhood", "")),
-                "block": address_parts.get("city_block", address_parts.get("quarter", "")),
-                "district": address_parts.get("city_district", address_parts.get("county", "")),
-                "city": address_parts.get("city", address_parts.get("town", "")),
-                "state": address_parts.get("state", ""),
-            }
-        except Exception:
-            return {"address": f"Lat: {lat}, Lon: {lon}", "ward": "", "block": "", "district": "", "city": "", "state": ""}
+        fixed = 0
+        for retry in due:
+            complaint = await db.get(Complaint, retry.complaint_id)
+            if complaint is None:
+                await db.delete(retry)
+                continue
+            result = await self.reverse_geocode(retry.latitude, retry.longitude, tenant_id=retry.tenant_id)
+            if result.get("resolved"):
+                if not complaint.address or complaint.address.startswith("Lat: "):
+                    complaint.address = result.get("address") or complaint.address
+                for field in ("ward", "block", "district", "state"):
+                    if not getattr(complaint, field) and result.get(field):
+                        setattr(complaint, field, result[field])
+                codes = normalize_location(complaint.state, complaint.district, result.get("city"), complaint.address)
+                complaint.state_code = complaint.state_code or codes["state_code"]
+                complaint.district_code = complaint.district_code or codes["district_code"]
+                await db.delete(retry)
+                fixed += 1
+            elif retry.attempts + 1 >= settings.geocode_retry_max_attempts:
+                print(f"[Geocoding] Giving up on complaint {retry.complaint_id} after {retry.attempts + 1} attempts")
+                await db.delete(retry)
+            else:
+                retry.attempts += 1
+                retry.next_attempt_at = now + timedelta(minutes=settings.geocode_retry_base_minutes * 2 ** retry.attempts)
+        await db.commit()
+        return fixed
 
     def determine_jurisdiction_level(self, ward: str, block: str, district: str) -> str:
         if ward: return "ward"
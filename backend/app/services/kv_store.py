@@ -0,0 +1,201 @@
+"""
+Small TTL key-value stores for short-lived shared state: OTPs, throttle
+counters and the Nominatim rate-limit slots. Every method is a coroutine, so callers on the event loop never
+block on the store.
+
+- ``MemoryTTLStore``: per-process and bounded. Expired entries are evicted
+  in expiry order, and once KV_MEMORY_MAX_ENTRIES is reached the values
+  closest to expiry go first. Counters from ``incr`` are kept apart and only
+  ever expire, so flooding the store with keys cannot reset a throttle.
+- ``DatabaseTTLStore``: the ``kv_entries`` table, shared by every worker
+  (SQLite or Postgres) and reached through the async engine. Expired rows are ignored on read and removed by the
+  scheduled purge.
+
+Select with KV_STORE (auto | memory | database). ``auto`` uses the database
+on Postgres, where several workers are expected, and memory otherwise.
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from sqlalchemy import Integer, Text, cast, delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+
+
+class _ExpiringMap:
+    """A dict of key -> (expires_at, value) with a heap of expiry times."""
+
+    def __init__(self):
+        self.data: dict[str, tuple[float, str]] = {}
+        self._expiries: list[tuple[float, str]] = []  # heap; may hold stale entries for overwritten keys
+
+    def put(self, key: str, value: str, expires_at: float):
+        self.data[key] = (expires_at, value)
+        heapq.heappush(self._expiries, (expires_at, key))
+
+    def evict(self, now: float, max_entries: Optional[int] = None):
+        while self._expiries and (self._expiries[0][0] <= now
+                                  or (max_entries is not None and len(self.data) > max_entries)):
+            expires_at, key = heapq.heappop(self._expiries)
+            entry = self.data.get(key)
+            if entry is not None and entry[0] == expires_at:
+                del self.data[key]
+        if len(self._expiries) > 2 * len(self.data) + 1024:
+            self._expiries = [(exp, key) for key, (exp, _) in self.data.items()]
+            heapq.heapify(self._expiries)
+
+
+class MemoryTTLStore:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._values = _ExpiringMap()
+        self._counters = _ExpiringMap()  # never capacity-evicted; bounded by request rate x window
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> Optional[tuple[float, str]]:
+        entry = self._counters.data.get(key) or self._values.data.get(key)
+        if entry is None or entry[0] <= now:
+            return None
+        return entry
+
+    async def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+        return entry[1] if entry else None
+
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        now = time.monotonic()
+        with self._lock:
+            self._counters.data.pop(key, None)
+            self._values.put(key, value, now + ttl_seconds)
+            self._values.evict(now, self.max_entries)
+
+    async def delete(self, key: str):
+        with self._lock:
+            self._values.data.pop(key, None)
+            self._counters.data.pop(key, None)
+
+    async def incr(self, key: str, ttl_seconds: float) -> int:
+        """Increment a counter; the TTL starts with the first increment (fixed window)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counters.data.get(key)
+            if entry is None or entry[0] <= now:
+                self._values.data.pop(key, None)
+                self._counters.put(key, "1", now + ttl_seconds)
+                self._counters.evict(now)
+                return 1
+            count = int(entry[1]) + 1
+            self._counters.data[key] = (entry[0], str(count))
+            return count
+
+    async def ttl(self, key: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+        return max(0, int(entry[0] - now)) if entry else 0
+
+    async def purge_expired(self) -> int:
+        with self._lock:
+            before = len(self._values.data) + len(self._counters.data)
+            now = time.monotonic()
+            self._values.evict(now, self.max_entries)
+            self._counters.evict(now)
+            return before - len(self._values.data) - len(self._counters.data)
+
+
+class DatabaseTTLStore:
+    def _session(self):
+        from app.database import AsyncSessionLocal
+        return AsyncSessionLocal()
+
+    async def get(self, key: str) -> Optional[str]:
+        from app.models.kv_entry import KVEntry
+        async with self._session() as db:
+            return await db.scalar(select(KVEntry.value).where(
+                KVEntry.key == key, KVEntry.expires_at > datetime.now(timezone.utc)
+            ))
+
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        from app.models.kv_entry import KVEntry
+        async with self._session() as db:
+            await db.merge(KVEntry(key=key, value=value,
+                                   expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)))
+            await db.commit()
+
+    async def delete(self, key: str):
+        from app.models.kv_entry import KVEntry
+        async with self._session() as db:
+            await db.execute(delete(KVEntry).where(KVEntry.key == key))
+            await db.commit()
+
+    async def incr(self, key: str, ttl_seconds: float) -> int:
+        """Increment a counter; the TTL starts with the first increment (fixed window).
+
+        Each step is a single conditional UPDATE, so concurrent increments
+        from any number of workers never lose a count.
+        """
+        from app.models.kv_entry import KVEntry
+        async with self._session() as db:
+            for _ in range(3):
+                now = datetime.now(timezone.utc)
+                count = await db.scalar(
+                    update(KVEntry)
+                    .where(KVEntry.key == key, KVEntry.expires_at > now)
+                    .values(value=cast(cast(KVEntry.value, Integer) + 1, Text))
+                    .returning(KVEntry.value)
+                    .execution_options(synchronize_session=False)
+                )
+                if count is not None:
+                    await db.commit()
+                    return int(count)
+                # No live window: restart an expired one, or create it
+                expires_at = now + timedelta(seconds=ttl_seconds)
+                restarted = await db.execute(
+                    update(KVEntry)
+                    .where(KVEntry.key == key, KVEntry.expires_at <= now)
+                    .values(value="1", expires_at=expires_at)
+                    .execution_options(synchronize_session=False)
+                )
+                if restarted.rowcount == 0:
+                    db.add(KVEntry(key=key, value="1", expires_at=expires_at))
+                try:
+                    await db.commit()
+                    return 1
+                except IntegrityError:
+                    await db.rollback()  # another worker created it first — count on top of theirs
+            raise RuntimeError(f"Could not increment {key}")
+
+    async def ttl(self, key: str) -> int:
+        from app.models.kv_entry import KVEntry
+        async with self._session() as db:
+            expires_at = await db.scalar(select(KVEntry.expires_at).where(KVEntry.key == key))
+        if expires_at is None:
+            return 0
+        remaining = expires_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)
+        return max(0, int(remaining.total_seconds()))
+
+    async def purge_expired(self) -> int:
+        from app.models.kv_entry import KVEntry
+        async with self._session() as db:
+            result = await db.execute(
+                delete(KVEntry).where(KVEntry.expires_at <= datetime.now(timezone.utc))
+            )
+            await db.commit()
+            return result.rowcount
+
+
+def create_kv_store():
+    kind = settings.kv_store
+    if kind == "auto":
+        kind = "database" if settings.database_url.startswith("postgres") else "memory"
+    if kind == "database":
+        return DatabaseTTLStore()
+    return MemoryTTLStore(settings.kv_memory_max_entries)
+
+
+kv_store = create_kv_store()
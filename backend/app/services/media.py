@@ -1,18 +1,30 @@
+import asyncio
+import hashlib
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import aiofiles
 from fastapi import UploadFile
 
 from app.config import settings
+from app.services import media_workers
 
 # Always store relative to this file's location (backend/uploads/) regardless of CWD
 _BASE_DIR = Path(__file__).resolve().parent.parent.parent  # → backend/
 _DEFAULT_UPLOAD = _BASE_DIR / "uploads"
 
 
+class UploadOffsetMismatch(ValueError):
+    def __init__(self, received: int):
+        super().__init__(f"Offset mismatch: server has {received} bytes")
+        self.received = received
+
+
 class MediaService:
     def __init__(self):
         self.upload_dir = Path(settings.upload_dir)
@@ -20,15 +32,51 @@ class MediaService:
         if not self.upload_dir.is_absolute():
             self.upload_dir = _BASE_DIR / self.upload_dir
         self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir = self.upload_dir / ".partial"
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._upload_locks: dict[str, list] = {}  # upload id -> [lock, holders + waiters]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created lazily so importing the service never forks worker processes
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=settings.media_workers)
+        return self._pool
+
+    async def run_in_pool(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), fn, *args)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _stream_to_disk(self, file: UploadFile, dest: Path, max_bytes: Optional[int] = None) -> str:
+        """Copy an upload to disk in chunks without blocking the event loop. Returns its sha256."""
+        digest = hashlib.sha256()
+        written = 0
+        async with aiofiles.open(dest, "wb") as f:
+            while chunk := await file.read(settings.upload_chunk_size):
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise ValueError(f"File exceeds {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                await f.write(chunk)
+        return digest.hexdigest()
+
+    async def delete_file(self, path: Path):
+        try:
+            await asyncio.to_thread(os.remove, path)
+        except FileNotFoundError:
+            pass
 
     async def save_file(self, file: UploadFile, complaint_id: str) -> dict:
         ext = Path(file.filename).suffix if file.filename else ""
         filename = f"{complaint_id}_{uuid.uuid4().hex[:8]}{ext}"
         file_path = self.upload_dir / filename
 
-        async with aiofiles.open(file_path, "wb") as f:
-            content = await file.read()
-            await f.write(content)
+        await self._stream_to_disk(file, file_path)
 
         media_type = self._detect_media_type(ext)
         # Use forward slashes for URL compatibility
@@ -39,14 +87,222 @@ class MediaService:
             "original_filename": file.filename,
         }
 
+    async def save_completion_photo(self, file: UploadFile) -> dict:
+        """Stream a work-order proof photo to disk, then strip metadata and recompress it off-loop.
+
+        Raises ValueError if the upload is too large or is not a decodable image.
+        """
+        token = uuid.uuid4().hex
+        tmp_path = self.upload_dir / f".incoming_{token}"
+        filename = f"completion_{token}.jpg"
+        dest_path = self.upload_dir / filename
+        try:
+            await self._stream_to_disk(file, tmp_path, max_bytes=settings.completion_photo_max_bytes)
+            try:
+                result = await self.run_in_pool(
+                    media_workers.process_completion_photo,
+                    str(tmp_path), str(dest_path),
+                    settings.completion_photo_max_dimension, settings.completion_photo_quality,
+                )
+            except Exception as e:
+                await self.delete_file(dest_path)
+                raise ValueError("Uploaded file is not a valid image") from e
+        finally:
+            await self.delete_file(tmp_path)
+        return {"filename": filename, "hash": result["hash"],
+                "width": result["width"], "height": result["height"]}
+
+    # ─── Resumable uploads ──────────────────────────────────────
+    # create → PATCH chunks at the server-reported offset → finalize → attach
+    # to a complaint. Progress lives in the upload_sessions table so a client
+    # can resume against any worker after a dropped connection.
+
+    def _partial_path(self, upload_id: str) -> Path:
+        return self.partial_dir / upload_id
+
+    def _upload_expiry(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(hours=settings.resumable_upload_expire_hours)
+
+    async def create_upload(self, db, filename: Optional[str], total_size: int):
+        from app.models.upload_session import UploadSession
+        if total_size <= 0 or total_size > settings.resumable_upload_max_bytes:
+            raise ValueError(f"Upload size must be between 1 byte and {settings.resumable_upload_max_bytes // (1024 * 1024)} MB")
+        ext = Path(filename).suffix if filename else ""
+        upload = UploadSession(
+            original_filename=filename,
+            media_type=self._detect_media_type(ext),
+            total_size=total_size,
+            received=0,
+            status="pending",
+            expires_at=self._upload_expiry(),
+        )
+        db.add(upload)
+        await db.commit()
+        await asyncio.to_thread(self._partial_path(upload.id).touch)
+        return upload
+
+    @asynccontextmanager
+    async def upload_lock(self, upload_id: str):
+        """Serialize PATCHes to one upload within this worker.
+
+        Other workers are kept out by the caller's SELECT ... FOR UPDATE on
+        the session row; SQLite ignores FOR UPDATE but runs a single worker.
+        """
+        entry = self._upload_locks.setdefault(upload_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._upload_locks[upload_id]
+
+    async def append_chunk(self, db, upload, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """Append a PATCH body at ``offset`` to the partial file. Returns the new offset.
+
+        Call under upload_lock() with the row locked. Raises
+        UploadOffsetMismatch if ``offset`` is not where the server is.
+        Whatever arrived before a dropped connection is kept and counted, so
+        the client resumes from exactly the byte the server has.
+        """
+        path = self._partial_path(upload.id)
+        on_disk = (await asyncio.to_thread(os.path.getsize, path)) if path.exists() else 0
+        if on_disk > upload.received:
+            # A previous PATCH died between writing and committing — drop the uncommitted tail
+            await asyncio.to_thread(os.truncate, path, upload.received)
+        elif on_disk < upload.received:
+            upload.received = on_disk  # the partial file lost bytes; resume from what it holds
+            await db.commit()
+        if offset != upload.received:
+            raise UploadOffsetMismatch(upload.received)
+        remaining = upload.total_size - upload.received
+        try:
+            async with aiofiles.open(path, "ab") as f:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if len(chunk) > remaining:
+                        raise ValueError("Chunk extends past the declared upload size")
+                    await f.write(chunk)
+                    remaining -= len(chunk)
+                    upload.received += len(chunk)
+        finally:
+            upload.expires_at = self._upload_expiry()
+            await db.commit()
+        return upload.received
+
+    async def finalize_upload(self, db, upload):
+        if upload.status != "pending":
+            return upload
+        if upload.received != upload.total_size:
+            raise ValueError(f"Upload incomplete: {upload.received} of {upload.total_size} bytes received")
+        ext = Path(upload.original_filename).suffix if upload.original_filename else ""
+        filename = f"upload_{upload.id}{ext}"
+        await asyncio.to_thread(os.replace, self._partial_path(upload.id), self.upload_dir / filename)
+        upload.file_path = f"uploads/{filename}"
+        upload.status = "complete"
+        upload.expires_at = self._upload_expiry()
+        await db.commit()
+        return upload
+
+    async def claim_upload(self, db, upload_id: str, complaint_id: str) -> dict:
+        """Attach a finalized upload to a complaint. Caller commits with the complaint."""
+        from app.models.upload_session import UploadSession
+        upload = await db.get(UploadSession, upload_id)
+        if not upload or upload.status != "complete":
+            raise ValueError(f"Upload {upload_id} is not finalized")
+        upload.status = "consumed"
+        upload.complaint_id = complaint_id
+        return {
+            "file_path": upload.file_path,
+            "media_type": upload.media_type,
+            "original_filename": upload.original_filename,
+        }
+
+    async def purge_expired_uploads(self, db) -> int:
+        """Delete abandoned uploads (never finalized, or finalized but never attached)."""
+        from sqlalchemy import select
+        from app.models.upload_session import UploadSession
+        expired = (await db.scalars(select(UploadSession).where(
+            UploadSession.status.in_(["pending", "complete"]),
+            UploadSession.expires_at < datetime.now(timezone.utc),
+        ))).all()
+        for upload in expired:
+            await self.delete_file(self._partial_path(upload.id))
+            if upload.file_path:
+                await self.delete_file(self.upload_dir / Path(upload.file_path).name)
+            await db.delete(upload)
+        await db.commit()
+        return len(expired)
+
+    async def extract_keyframes(self, file_path: str) -> list[str]:
+        """Sample a bounded set of representative frames from a video in the worker pool.
+
+        Frames land in a scratch directory; call discard_keyframes() once
+        analysed. If extraction fails or yields nothing the directory is
+        removed here, since the caller has no frames to discard.
+        """
+        import shutil
+        out_dir = self.upload_dir / ".frames" / uuid.uuid4().hex
+        frames: list[str] = []
+        try:
+            frames = await self.run_in_pool(
+                media_workers.extract_keyframes,
+                settings.ffmpeg_binary, str(file_path), str(out_dir),
+                settings.video_keyframes_max, settings.video_scene_threshold,
+                settings.video_keyframe_max_dimension,
+            )
+            return frames
+        finally:
+            if not frames:
+                await asyncio.to_thread(shutil.rmtree, out_dir, True)
+
+    async def discard_keyframes(self, frames: list[str]):
+        import shutil
+        dirs = {str(Path(f).parent) for f in frames}
+        for d in dirs:
+            await asyncio.to_thread(shutil.rmtree, d, True)
+
     async def speech_to_text(self, file_path: str) -> str:
+        """Transcribe a voice note, splitting long recordings at pauses.
+
+        Normalisation and splitting run in the worker pool; segments are sent
+        to Whisper concurrently (bounded by TRANSCRIPTION_CONCURRENCY) and
+        stitched back in playback order.
+        """
+        import shutil
         from openai import AsyncOpenAI
         client = AsyncOpenAI(api_key=settings.openai_api_key)
-        with open(file_path, "rb") as audio_file:
-            transcript = await client.audio.transcriptions.create(
-                model="whisper-1", file=audio_file,
+        work_dir = self.upload_dir / ".audio" / uuid.uuid4().hex
+        try:
+            segments = await self.run_in_pool(
+                media_workers.prepare_audio_segments,
+                settings.ffmpeg_binary, str(file_path), str(work_dir),
+                settings.transcription_sample_rate, settings.transcription_segment_seconds,
+                settings.transcription_max_segment_seconds, settings.transcription_silence_db,
             )
-        return transcript.text
+        except Exception as e:
+            # No ffmpeg or an undecodable container — send the original as-is
+            print(f"Audio normalisation failed, transcribing original: {e}")
+            segments = [str(file_path)]
+
+        semaphore = asyncio.Semaphore(settings.transcription_concurrency)
+
+        async def transcribe(path: str) -> str:
+            async with semaphore:
+                async with aiofiles.open(path, "rb") as f:
+                    audio = await f.read()
+                transcript = await client.audio.transcriptions.create(
+                    model="whisper-1", file=(Path(path).name, audio),
+                )
+                return transcript.text.strip()
+
+        try:
+            texts = await asyncio.gather(*(transcribe(p) for p in segments))
+        finally:
+            await asyncio.to_thread(shutil.rmtree, work_dir, True)
+        return " ".join(t for t in texts if t)
 
     def _detect_media_type(self, ext: str) -> str:
         ext = ext.lower()
@@ -0,0 +1,205 @@
+"""
+CPU-bound media processing that runs inside MediaService's process pool.
+Everything here must be a plain top-level function so it can be pickled
+into worker processes — no async, no DB, no settings lookups.
+"""
+import hashlib
+import os
+import re
+import subprocess
+import wave
+
+
+def process_completion_photo(src_path: str, dest_path: str, max_dimension: int, quality: int) -> dict:
+    """Validate, normalise and recompress a proof photo.
+
+    Orientation from EXIF is applied to the pixels and the image is re-saved
+    as a fresh JPEG without any metadata, so GPS/device tags never reach disk.
+    The returned hash is taken over the oriented pixel data, so the same photo
+    re-uploaded with different metadata still matches.
+    """
+    from PIL import Image, ImageOps
+
+    # verify() catches truncated/corrupt files but leaves the image unusable
+    with Image.open(src_path) as probe:
+        probe.verify()
+
+    with Image.open(src_path) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        content_hash = hashlib.sha256(img.tobytes()).hexdigest()
+        img.thumbnail((max_dimension, max_dimension))
+        img.save(dest_path, "JPEG", quality=quality, optimize=True)
+        width, height = img.size
+
+    return {"hash": content_hash, "width": width, "height": height}
+
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def _probe_duration(ffmpeg: str, src_path: str) -> float:
+    # `ffmpeg -i` with no output exits non-zero but still prints the container header
+    proc = subprocess.run([ffmpeg, "-hide_banner", "-i", src_path], capture_output=True, text=True, timeout=30)
+    match = _DURATION_RE.search(proc.stderr)
+    if not match:
+        return 0.0
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _run_ffmpeg(ffmpeg: str, args: list[str], timeout: int = 120):
+    subprocess.run([ffmpeg, "-hide_banner", "-loglevel", "error", "-y", *args],
+                   check=True, capture_output=True, timeout=timeout)
+
+
+_SCENE_RE = re.compile(r"pts_time:(\d+(?:\.\d+)?)|lavfi\.scene_score=(\d+(?:\.\d+)?)")
+
+
+def _scene_cuts(ffmpeg: str, src_path: str, scene_threshold: float) -> list[tuple[float, float]]:
+    """Every scene change above ``scene_threshold`` in the clip, as (time, score)."""
+    # Scores are computed on a small copy of each frame; nothing is written out
+    proc = subprocess.run(
+        [ffmpeg, "-hide_banner", "-i", src_path, "-an",
+         "-vf", f"scale=320:-2,select='gt(scene,{scene_threshold})',metadata=print",
+         "-f", "null", "-"],
+        capture_output=True, text=True, timeout=600,
+    )
+    cuts, time = [], None
+    for pts_time, score in _SCENE_RE.findall(proc.stderr):
+        if pts_time:
+            time = float(pts_time)
+        elif time is not None:
+            cuts.append((time, float(score)))
+            time = None
+    return cuts
+
+
+def pick_keyframe_times(cuts: list[tuple[float, float]], duration: float, max_frames: int) -> list[float]:
+    """Spread ``max_frames`` grab times over the whole clip.
+
+    The duration is split into equal windows and each window contributes its
+    strongest scene change, or its midpoint when nothing changes inside it,
+    so a long static stretch still gets a frame and a burst of cuts early on
+    cannot use up the whole budget. Without a known duration the strongest
+    cuts overall are used (the opening frame if there are none).
+    """
+    if duration <= 0:
+        best = sorted(cuts, key=lambda cut: cut[1], reverse=True)[:max_frames]
+        return sorted(t for t, _ in best) or [0.0]
+    step = duration / max_frames
+    times = []
+    for i in range(max_frames):
+        start, end = step * i, step * (i + 1)
+        in_window = [cut for cut in cuts if start <= cut[0] < end]
+        times.append(max(in_window, key=lambda cut: cut[1])[0] if in_window else start + step / 2)
+    return times
+
+
+def extract_keyframes(ffmpeg: str, src_path: str, out_dir: str, max_frames: int,
+                      scene_threshold: float, max_dimension: int) -> list[str]:
+    """Pull at most ``max_frames`` representative JPEG frames out of a video.
+
+    One scene-detection pass scores the whole clip, pick_keyframe_times()
+    spreads the grabs across its duration, and each frame is then decoded on
+    its own with a seek.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    scale = f"scale='min({max_dimension},iw)':-2"
+
+    times = pick_keyframe_times(
+        _scene_cuts(ffmpeg, src_path, scene_threshold), _probe_duration(ffmpeg, src_path), max_frames,
+    )
+    frames = []
+    for i, t in enumerate(times):
+        path = os.path.join(out_dir, f"frame_{i:02d}.jpg")
+        # -ss before -i seeks on keyframes, so each grab is cheap even on long clips
+        _run_ffmpeg(ffmpeg, [
+            "-ss", f"{t:.3f}", "-i", src_path,
+            "-vf", scale, "-frames:v", "1", "-q:v", "3", path,
+        ])
+        if os.path.exists(path):
+            frames.append(path)
+    return frames
+
+
+_SILENCE_RE = re.compile(r"silence_(start|end):\s*(-?\d+(?:\.\d+)?)")
+_MIN_SEGMENT_SECONDS = 0.1  # Whisper rejects shorter audio
+
+
+def _wav_seconds(path: str) -> float:
+    """Length of a PCM WAV from its header; 0.0 for an empty or unreadable file."""
+    try:
+        with wave.open(path, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return 0.0
+
+
+def _pick_cut_points(silences: list[float], duration: float, target: float, hard_max: float) -> list[float]:
+    """Choose split points at silence midpoints, aiming for ``target``-second segments."""
+    cuts = []
+    pos = 0.0
+    # Stop once the tail is close to target so the last segment isn't the slow one
+    while duration - pos > min(hard_max, target * 1.5):
+        window = [s for s in silences if pos + target / 2 <= s <= pos + hard_max]
+        cut = min(window, key=lambda s: abs(s - (pos + target))) if window else pos + hard_max
+        cuts.append(cut)
+        pos = cut
+    return cuts
+
+
+def prepare_audio_segments(ffmpeg: str, src_path: str, out_dir: str, sample_rate: int,
+                           target_seconds: float, max_seconds: float, silence_db: int) -> list[str]:
+    """Normalise a voice note and split it at pauses for parallel transcription.
+
+    The audio is downmixed to mono at a fixed sample rate with leading and
+    trailing silence trimmed. Longer recordings are cut at the detected
+    silence nearest each ``target_seconds`` boundary (never exceeding
+    ``max_seconds``), so words are not split across segments. Returns segment paths in playback order;
+    a clip that is silence throughout yields no segments at all.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    normalized = os.path.join(out_dir, "normalized.wav")
+    trim = f"silenceremove=start_periods=1:start_threshold={silence_db}dB:start_silence=0.3"
+    _run_ffmpeg(ffmpeg, [
+        "-i", src_path, "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-af", f"{trim},areverse,{trim},areverse",
+        "-c:a", "pcm_s16le", normalized,
+    ], timeout=600)
+
+    duration = _wav_seconds(normalized)
+    if duration < _MIN_SEGMENT_SECONDS:
+        os.remove(normalized)  # nothing but silence, nothing to transcribe
+        return []
+    if duration <= min(max_seconds, target_seconds * 1.5):
+        return [normalized]
+
+    proc = subprocess.run(
+        [ffmpeg, "-hide_banner", "-i", normalized, "-af", f"silencedetect=noise={silence_db}dB:d=0.4", "-f", "null", "-"],
+        capture_output=True, text=True, timeout=600,
+    )
+    silences, start = [], None
+    for kind, value in _SILENCE_RE.findall(proc.stderr):
+        if kind == "start":
+            start = float(value)
+        elif start is not None:
+            silences.append((start + float(value)) / 2)
+            start = None
+
+    cuts = _pick_cut_points(silences, duration, target_seconds, max_seconds)
+    _run_ffmpeg(ffmpeg, [
+        "-i", normalized, "-f", "segment",
+        "-segment_times", ",".join(f"{c:.3f}" for c in cuts),
+        "-c", "copy", os.path.join(out_dir, "segment_%03d.wav"),
+    ], timeout=600)
+    os.remove(normalized)
+    segments = []
+    for name in sorted(f for f in os.listdir(out_dir) if f.startswith("segment_")):
+        path = os.path.join(out_dir, name)
+        if _wav_seconds(path) < _MIN_SEGMENT_SECONDS:
+            os.remove(path)  # a cut at the very end leaves an empty tail
+        else:
+            segments.append(path)
+    return segments
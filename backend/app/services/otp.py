@@ -1,30 +1,61 @@
-import random
-import string
-from datetime import datetime, timezone, timedelta
+import hashlib
+import hmac
+import secrets
+from typing import Optional
 
 from app.config import settings
+from app.services.kv_store import kv_store
 
-_otp_store: dict[str, dict] = {}
+
+class OTPThrottled(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Too many verification codes requested. Try again later.")
+        self.retry_after = retry_after
+
+
+def _digest(otp: str) -> str:
+    # Only a keyed hash is stored, so a leaked store (e.g. kv_entries) reveals no live codes
+    return hmac.new(settings.secret_key.encode(), otp.encode(), hashlib.sha256).hexdigest()
 
 
 class OTPService:
-    def generate_otp(self, email: str) -> str:
-        otp = "".join(random.choices(string.digits, k=6))
-        _otp_store[email] = {
-            "otp": otp,
-            "expires_at": datetime.now(timezone.utc) + timedelta(minutes=settings.otp_expire_minutes),
-        }
+    async def _check_throttle(self, key: str, limit: int):
+        window = settings.otp_throttle_window_minutes * 60
+        if await kv_store.incr(key, window) > limit:
+            raise OTPThrottled(await kv_store.ttl(key) or window)
+
+    async def generate_otp(self, email: str, client_ip: Optional[str] = None) -> str:
+        """Issue a new code for ``email``, replacing any outstanding one.
+
+        Raises OTPThrottled once the email or the client IP exceeds its
+        send limit for the current window.
+        """
+        email = email.strip().lower()
+        await self._check_throttle(f"otp-send:email:{email}", settings.otp_max_sends_per_email)
+        if client_ip:
+            await self._check_throttle(f"otp-send:ip:{client_ip}", settings.otp_max_sends_per_ip)
+        otp = "".join(secrets.choice("0123456789") for _ in range(6))
+        await kv_store.delete(f"otp-attempts:{email}")
+        await kv_store.set(f"otp:{email}", _digest(otp), settings.otp_expire_minutes * 60)
         return otp
 
-    def verify_otp(self, email: str, otp: str) -> bool:
-        stored = _otp_store.get(email)
-        if not stored: return False
-        if datetime.now(timezone.utc) > stored["expires_at"]:
-            del _otp_store[email]
+    async def verify_otp(self, email: str, otp: str) -> bool:
+        email = email.strip().lower()
+        key = f"otp:{email}"
+        digest = await kv_store.get(key)
+        if not digest:
+            return False
+        # Count the guess before comparing: the increment is atomic, so parallel
+        # guesses can't all slip under the limit and 6 digits can't be brute-forced
+        attempts_key = f"otp-attempts:{email}"
+        if await kv_store.incr(attempts_key, settings.otp_expire_minutes * 60) > settings.otp_max_attempts:
+            await kv_store.delete(key)
             return False
-        if stored["otp"] != otp: return False
-        del _otp_store[email]
-        return True
+        if hmac.compare_digest(digest, _digest(otp)):
+            await kv_store.delete(key)
+            await kv_store.delete(attempts_key)
+            return True
+        return False
 
 
 otp_service = OTPService()
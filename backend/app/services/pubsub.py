@@ -0,0 +1,148 @@
+"""
+Pub/sub backplane for live updates.
+
+WebSocket connections live in whichever uvicorn worker accepted them, but
+updates are produced wherever the pipeline, an admin request or a scheduled
+job happens to run. Every message is published to the backplane, and every
+worker subscribes and delivers it to its own local sockets.
+
+- ``MemoryBackplane``: in-process hand-off, for a single worker / SQLite.
+- ``PostgresBackplane``: LISTEN/NOTIFY on the application database, so no
+  extra infrastructure is needed. A NOTIFY is also delivered back to the
+  publishing process, which therefore needs no local short-circuit.
+
+Select with WS_BACKPLANE (auto | memory | postgres); ``auto`` uses Postgres
+whenever DATABASE_URL points at it. Every subscribed handler sees every
+message and ignores topics that are not its own.
+"""
+import asyncio
+import json
+from typing import Awaitable, Callable, Optional
+
+from app.config import settings
+
+Handler = Callable[[str, dict], Awaitable[None]]
+
+PG_CHANNEL = "civicai_live"
+PG_PAYLOAD_LIMIT = 7900  # NOTIFY payloads must stay under 8000 bytes
+
+
+class MemoryBackplane:
+    def __init__(self):
+        self._handlers: list[Handler] = []
+
+    def subscribe(self, handler: Handler):
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def publish(self, topic: str, message: dict):
+        for handler in self._handlers:
+            await handler(topic, message)
+
+
+class PostgresBackplane:
+    """LISTEN on a dedicated asyncpg connection; NOTIFY through the app's async engine pool."""
+
+    def __init__(self, database_url: str):
+        from sqlalchemy.engine import make_url
+        # asyncpg takes a libpq URI; strip any SQLAlchemy driver suffix
+        self._dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._handlers: list[Handler] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, handler: Handler):
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, topic: str, message: dict):
+        payload = json.dumps({"topic": topic, "message": message}, default=str)
+        if len(payload.encode()) > PG_PAYLOAD_LIMIT:
+            # Too big for NOTIFY — at least reach this worker's sockets
+            print(f"[Backplane] Payload for {topic} exceeds NOTIFY limit, delivering locally only")
+            for handler in self._handlers:
+                await handler(topic, message)
+            return
+        from sqlalchemy import text
+        from app.database import async_engine
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": PG_CHANNEL, "payload": payload})
+            await conn.commit()
+
+    async def _listen_loop(self):
+        import asyncpg
+        delay = 1
+        while True:
+            try:
+                conn = await asyncpg.connect(self._dsn)
+            except Exception as e:
+                print(f"[Backplane] LISTEN connection failed: {e} — retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+            delay = 1
+            # Notifications arrive in callbacks; a queue keeps them in order and
+            # a None from the termination callback ends this connection's turn
+            inbox: asyncio.Queue = asyncio.Queue()
+            conn.add_termination_listener(lambda _conn: inbox.put_nowait(None))
+            try:
+                await conn.add_listener(PG_CHANNEL, lambda _conn, _pid, _channel, payload: inbox.put_nowait(payload))
+                print(f"[Backplane] Listening on Postgres channel {PG_CHANNEL}")
+                while True:
+                    try:
+                        payload = await asyncio.wait_for(inbox.get(), timeout=30)
+                    except asyncio.TimeoutError:
+                        await conn.execute("SELECT 1")  # a quiet channel must not hide a dead socket
+                        continue
+                    if payload is None:
+                        raise ConnectionError("connection closed")
+                    await self._dispatch(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Backplane] LISTEN connection lost: {e} — reconnecting")
+            finally:
+                try:
+                    await asyncio.wait_for(conn.close(), timeout=5)
+                except Exception:
+                    conn.terminate()
+
+    async def _dispatch(self, payload: str):
+        try:
+            event = json.loads(payload)
+            topic, message = event["topic"], event["message"]
+        except Exception as e:
+            print(f"[Backplane] Malformed notification: {e}")
+            return
+        for handler in self._handlers:
+            try:
+                await handler(topic, message)
+            except Exception as e:
+                print(f"[Backplane] Failed to deliver notification on {topic}: {e}")
+
+
+def create_backplane():
+    kind = settings.ws_backplane
+    if kind == "auto":
+        kind = "postgres" if settings.database_url.startswith("postgres") else "memory"
+    if kind == "postgres":
+        return PostgresBackplane(settings.database_url)
+    return MemoryBackplane()
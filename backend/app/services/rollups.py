@@ -0,0 +1,215 @@
+"""
+Complaint count rollups for dashboards.
+
+``complaint_rollups`` holds one row per (tenant, day filed, state, district,
+category, status, risk level) bucket. An ``after_flush`` listener moves each
+inserted, changed or deleted complaint between buckets in the same
+transaction, so the counts commit or roll back with the change itself.
+Analytics, the public dashboard and the daily briefing sum these buckets
+instead of grouping the complaints table.
+
+Bulk ``update(Complaint)`` statements bypass the ORM and therefore the
+listener; the scheduled ``reconcile`` repairs drifted buckets, recent days
+on every run and older history a slice at a time.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import Date, delete, event, func, inspect, select, union_all, and_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.complaint import Complaint
+from app.models.complaint_rollup import ComplaintRollup
+
+BUCKET_FIELDS = ("tenant_id", "day", "state_code", "district_code", "category", "status", "risk_level")
+RESOLVED_STATUSES = ("resolved", "closed")
+
+
+def _day(created_at: Optional[datetime]) -> date:
+    if created_at is None:
+        return datetime.now(timezone.utc).date()
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def _bucket(values: dict) -> tuple:
+    return tuple(
+        values["day"] if field == "day" else (values[field] or "")
+        for field in BUCKET_FIELDS
+    )
+
+
+def _current_bucket(complaint: Complaint) -> tuple:
+    values = {f: getattr(complaint, f) for f in BUCKET_FIELDS if f != "day"}
+    values["day"] = _day(complaint.created_at)
+    return _bucket(values)
+
+
+def _previous_bucket(complaint: Complaint) -> tuple:
+    state = inspect(complaint)
+    values = {}
+    for field in BUCKET_FIELDS:
+        attr = "created_at" if field == "day" else field
+        history = state.attrs[attr].history
+        value = history.deleted[0] if history.deleted else getattr(complaint, attr)
+        values[field] = _day(value) if field == "day" else value
+    return _bucket(values)
+
+
+def _write(connection, counts: dict[tuple, int]):
+    """Add ``counts`` (signed deltas) to their buckets."""
+    table = ComplaintRollup.__table__
+    rows = [dict(zip(BUCKET_FIELDS, key), count=n) for key, n in counts.items()]
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(rows)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=list(BUCKET_FIELDS), set_={"count": table.c.count + stmt.excluded.count}
+        ))
+        return
+    for row in rows:
+        key = and_(*(table.c[f] == row[f] for f in BUCKET_FIELDS))
+        if connection.execute(table.update().where(key).values(count=table.c.count + row["count"])).rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_complaint_deltas(session: Session, flush_context):
+    deltas: dict[tuple, int] = {}
+
+    def bump(key: tuple, n: int):
+        deltas[key] = deltas.get(key, 0) + n
+
+    for obj in session.new:
+        if isinstance(obj, Complaint):
+            bump(_current_bucket(obj), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Complaint) and session.is_modified(obj, include_collections=False):
+            before, after = _previous_bucket(obj), _current_bucket(obj)
+            if before != after:
+                bump(before, -1)
+                bump(after, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Complaint):
+            bump(_previous_bucket(obj), -1)
+
+    deltas = {k: n for k, n in deltas.items() if n}
+    if deltas:
+        _write(session.connection(), deltas)
+
+
+# Last day of the older slice the next reconcile() run checks; walks back
+# through history one slice per run and wraps to the newest older day.
+_older_cursor: Optional[date] = None
+
+
+def _drift(session: Session, first_day: Optional[date], last_day: Optional[date]) -> dict[tuple, int]:
+    """Per-bucket ``expected - stored`` for the given days, read in one statement."""
+    table = ComplaintRollup.__table__
+    day = func.date(Complaint.created_at, type_=Date)
+    expected = select(
+        func.coalesce(Complaint.tenant_id, "").label("tenant_id"),
+        day.label("day"),
+        func.coalesce(Complaint.state_code, "").label("state_code"),
+        func.coalesce(Complaint.district_code, "").label("district_code"),
+        func.coalesce(Complaint.category, "").label("category"),
+        Complaint.status.label("status"),
+        func.coalesce(Complaint.risk_level, "").label("risk_level"),
+        func.count(Complaint.id).label("n"),
+    )
+    stored = select(*(table.c[f] for f in BUCKET_FIELDS), (-table.c.count).label("n"))
+    if first_day is not None:
+        expected = expected.where(Complaint.created_at >= datetime.combine(first_day, time.min, tzinfo=timezone.utc))
+        stored = stored.where(table.c.day >= first_day)
+    if last_day is not None:
+        expected = expected.where(Complaint.created_at < datetime.combine(last_day + timedelta(days=1), time.min, tzinfo=timezone.utc))
+        stored = stored.where(table.c.day <= last_day)
+    expected = expected.group_by(*(expected.selected_columns[f] for f in BUCKET_FIELDS))
+
+    # One statement, so both sides come from the same snapshot
+    both = union_all(expected, stored).subquery()
+    keys = [both.c[f] for f in BUCKET_FIELDS]
+    rows = session.execute(select(*keys, func.sum(both.c.n)).group_by(*keys).having(func.sum(both.c.n) != 0))
+    return {tuple(row[:-1]): int(row[-1]) for row in rows}
+
+
+def reconcile_days(session: Session, first_day: Optional[date] = None, last_day: Optional[date] = None) -> int:
+    """Repair drifted buckets for complaints filed between ``first_day`` and ``last_day`` (inclusive).
+
+    Either bound may be None for an open range. The drift is applied as a
+    delta rather than an absolute count and nothing is locked, so writers
+    that commit in the meantime keep their own deltas. Returns how many
+    buckets changed.
+    """
+    drift = _drift(session, first_day, last_day)
+    if drift:
+        _write(session.connection(), drift)
+        emptied = delete(ComplaintRollup).where(ComplaintRollup.count == 0)
+        if first_day is not None:
+            emptied = emptied.where(ComplaintRollup.day >= first_day)
+        if last_day is not None:
+            emptied = emptied.where(ComplaintRollup.day <= last_day)
+        session.execute(emptied)
+    session.commit()
+    return len(drift)
+
+
+def reconcile(session: Session) -> int:
+    """Scheduled drift repair over a bounded set of days. Returns how many buckets changed.
+
+    Each run checks the last ROLLUP_RECONCILE_RECENT_DAYS days, where bulk
+    updates usually land, plus one ROLLUP_RECONCILE_SLICE_DAYS slice of older
+    history; successive runs walk the slices back to the oldest complaint and
+    start over. Sync so it can run from scripts as well as the scheduler (via
+    ``AsyncSession.run_sync``); scripts that touched arbitrary history call
+    ``reconcile_days`` with no bounds instead.
+    """
+    global _older_cursor
+    today = datetime.now(timezone.utc).date()
+    recent_start = today - timedelta(days=max(settings.rollup_reconcile_recent_days, 1) - 1)
+    repaired = reconcile_days(session, recent_start, None)
+
+    oldest = session.scalar(select(func.min(Complaint.created_at)))
+    if oldest is None:
+        return repaired
+    newest_older = recent_start - timedelta(days=1)
+    if _older_cursor is None or _older_cursor < _day(oldest) or _older_cursor > newest_older:
+        _older_cursor = newest_older
+    slice_start = _older_cursor - timedelta(days=max(settings.rollup_reconcile_slice_days, 1) - 1)
+    repaired += reconcile_days(session, slice_start, _older_cursor)
+    _older_cursor = slice_start - timedelta(days=1)
+    return repaired
+
+
+async def rollup_counts(db, *criteria) -> dict:
+    """Totals and status/category/risk breakdowns over the buckets matching ``criteria``.
+
+    Same shape as the old GROUP BY results: unset categories and risk
+    levels are left out of their breakdowns but still counted in the total.
+    """
+    rows = await db.execute(
+        select(ComplaintRollup.status, ComplaintRollup.category, ComplaintRollup.risk_level,
+               func.sum(ComplaintRollup.count))
+        .where(*criteria)
+        .group_by(ComplaintRollup.status, ComplaintRollup.category, ComplaintRollup.risk_level)
+    )
+    total = 0
+    by_status: dict[str, int] = {}
+    by_category: dict[str, int] = {}
+    by_risk: dict[str, int] = {}
+    for status, category, risk_level, n in rows:
+        if not n:
+            continue
+        total += n
+        by_status[status] = by_status.get(status, 0) + n
+        if category:
+            by_category[category] = by_category.get(category, 0) + n
+        if risk_level:
+            by_risk[risk_level] = by_risk.get(risk_level, 0) + n
+    return {"total_complaints": total, "by_status": by_status, "by_category": by_category, "by_risk_level": by_risk}
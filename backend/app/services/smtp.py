@@ -0,0 +1,110 @@
+"""
+Async SMTP transport with a small pool of persistent, authenticated connections.
+
+Sends never block the event loop, and most skip the TCP/TLS/AUTH handshake
+because an idle connection is reused. Idle connections are kept warm with
+NOOP; a connection that fails to open or fails mid-send is dropped and the
+message is retried once on a fresh one.
+
+For local development any plain SMTP sink works, e.g. MailHog (see
+.env.example) or ``python -m aiosmtpd -n -l localhost:1025`` (aiosmtpd is in
+requirements.txt).
+"""
+import asyncio
+from collections import deque
+from email.message import Message
+from typing import Optional
+
+from app.config import settings
+
+
+class SMTPPool:
+    def __init__(self, size: int, timeout: float, keepalive_seconds: float):
+        self.size = size
+        self.timeout = timeout
+        self.keepalive_seconds = keepalive_seconds
+        self._idle: deque = deque()
+        self._slots = asyncio.Semaphore(size)
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._keepalive_task is None and self.keepalive_seconds > 0:
+            self._keepalive_task = asyncio.create_task(self._keepalive_loop())
+
+    async def close(self):
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        while self._idle:
+            await self._discard(self._idle.popleft())
+
+    async def _connect(self):
+        import aiosmtplib
+        client = aiosmtplib.SMTP(
+            hostname=settings.smtp_host,
+            port=settings.smtp_port,
+            timeout=self.timeout,
+            use_tls=settings.smtp_use_tls,
+        )
+        await client.connect()
+        if settings.smtp_user:
+            await client.login(settings.smtp_user, settings.smtp_password)
+        return client
+
+    async def _discard(self, client):
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    async def _checkout(self):
+        while self._idle:
+            client = self._idle.popleft()
+            if client.is_connected:
+                return client
+        return await self._connect()
+
+    async def send(self, message: Message) -> bool:
+        """Send one message. Raises on failure after one reconnect attempt."""
+        async with self._slots:
+            try:
+                await self._send_once(message)
+            except Exception:
+                # Usually a pooled connection the server dropped; a second failure propagates
+                await self._send_once(message)
+        return True
+
+    async def _send_once(self, message: Message):
+        client = None
+        try:
+            # A failed connect or login counts as an attempt too
+            client = await self._checkout()
+            await asyncio.wait_for(client.send_message(message), timeout=self.timeout)
+        except Exception:
+            if client is not None:
+                await self._discard(client)
+            raise
+        self._idle.append(client)
+
+    async def _keepalive_loop(self):
+        while True:
+            await asyncio.sleep(self.keepalive_seconds)
+            for _ in range(len(self._idle)):
+                # Take a slot so a ping never races a send on the same connection
+                async with self._slots:
+                    if not self._idle:
+                        break
+                    client = self._idle.popleft()
+                    try:
+                        await asyncio.wait_for(client.noop(), timeout=self.timeout)
+                    except Exception:
+                        await self._discard(client)
+                        continue
+                    self._idle.append(client)
+
+
+smtp_pool = SMTPPool(
+    size=settings.smtp_pool_size,
+    timeout=settings.smtp_timeout_seconds,
+    keepalive_seconds=settings.smtp_keepalive_seconds,
+)
@@ -1,30 +1,198 @@
-from typing import Dict, List
+"""
+Live complaint-status sockets for this worker.
+
+Every socket gets a bounded send queue drained by its own writer task, so a
+broadcast is just a non-blocking enqueue per socket and one slow client
+never holds up the others. A client whose queue overflows, or whose writes
+stall past WS_SEND_TIMEOUT_SECONDS, is disconnected. Updates reach other
+workers through the pub/sub backplane.
+
+Dead peers are found by protocol-level ping/pong, which uvicorn runs for
+every socket (--ws-ping-interval / --ws-ping-timeout), so listen-only
+clients need not send anything. A client that sends ``ping`` itself gets
+``{"type": "pong"}`` back and opts into an application-level idle check:
+once it stops pinging for WS_IDLE_TIMEOUT_SECONDS it is dropped.
+
+Citizen sockets are keyed by tracking ID and admin sockets by tenant, in
+separate maps. Only topics built by ``admin_topic()`` reach admin sockets,
+so a tracking ID can never name an admin feed.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional
 from fastapi import WebSocket
 
+from app.config import settings
+from app.services.pubsub import create_backplane
+
+CLOSE_SLOW_CONSUMER = 1013  # "try again later"
+CLOSE_IDLE = 1001
+
+ADMIN_TOPIC_PREFIX = "admin:"
+
+
+def admin_topic(tenant_id: Optional[str]) -> str:
+    """Backplane topic for a tenant's admin feed; ``admin:*`` carries every tenant."""
+    return f"{ADMIN_TOPIC_PREFIX}{tenant_id or '*'}"
+
+
+class _Connection:
+    def __init__(self, registry: Dict[str, List["_Connection"]], key: str, websocket: WebSocket, queue_size: int):
+        self.registry = registry  # the manager map this socket is listed in
+        self.key = key  # tracking ID, or tenant ID / "*" for admin sockets
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.last_seen = time.monotonic()
+        self.heartbeat = False  # client sends its own pings, so idle means gone
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+
 
 class WebSocketManager:
+    """Tracks this worker's sockets; updates fan out through the pub/sub backplane."""
+
     def __init__(self):
-        self.connections: Dict[str, List[WebSocket]] = {}
+        self.connections: Dict[str, List[_Connection]] = {}  # tracking ID -> citizen sockets
+        self.admin_connections: Dict[str, List[_Connection]] = {}  # tenant ID or "*" -> admin sockets
+        self.backplane = create_backplane()
+        self.backplane.subscribe(self._deliver)
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.counters = {
+            "messages_sent": 0,
+            "slow_consumer_disconnects": 0,
+            "idle_disconnects": 0,
+            "send_failures": 0,
+        }
+
+    async def start(self):
+        await self.backplane.start()
+        if self._heartbeat_task is None and settings.ws_idle_timeout_seconds > 0:
+            self._heartbeat_task = asyncio.create_task(self._idle_loop())
+
+    async def close(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        await self.backplane.close()
+        for conn in list(self._all_connections()):
+            await self._close(conn, CLOSE_IDLE)
+
+    def _all_connections(self):
+        for registry in (self.connections, self.admin_connections):
+            for conns in list(registry.values()):
+                yield from list(conns)
 
-    async def connect(self, tracking_id: str, websocket: WebSocket):
+    async def _register(self, registry: Dict[str, List[_Connection]], key: str, websocket: WebSocket,
+                        snapshot: Optional[dict]) -> _Connection:
         await websocket.accept()
-        if tracking_id not in self.connections:
-            self.connections[tracking_id] = []
-        self.connections[tracking_id].append(websocket)
-
-    def disconnect(self, tracking_id: str, websocket: WebSocket):
-        if tracking_id in self.connections:
-            self.connections[tracking_id].remove(websocket)
-            if not self.connections[tracking_id]:
-                del self.connections[tracking_id]
-
-    async def send_update(self, tracking_id: str, message: dict):
-        if tracking_id in self.connections:
-            for ws in self.connections[tracking_id]:
-                try:
-                    await ws.send_json(message)
-                except Exception:
-                    self.disconnect(tracking_id, ws)
+        conn = _Connection(registry, key, websocket, settings.ws_send_queue_size)
+        if snapshot is not None:
+            conn.queue.put_nowait(snapshot)
+        conn.writer = asyncio.create_task(self._writer(conn))
+        registry.setdefault(key, []).append(conn)
+        return conn
+
+    async def connect(self, tracking_id: str, websocket: WebSocket,
+                      snapshot: Optional[dict] = None) -> _Connection:
+        """Accept a citizen socket and start its writer; ``snapshot`` is sent before any update."""
+        return await self._register(self.connections, tracking_id, websocket, snapshot)
+
+    async def connect_admin(self, tenant_id: Optional[str], websocket: WebSocket,
+                            snapshot: Optional[dict] = None) -> _Connection:
+        """Accept an (already authorized) admin socket for a tenant's feed, or every tenant's."""
+        return await self._register(self.admin_connections, tenant_id or "*", websocket, snapshot)
+
+    def disconnect(self, conn: _Connection):
+        conn.closed = True
+        conns = conn.registry.get(conn.key)
+        if conns and conn in conns:
+            conns.remove(conn)
+            if not conns:
+                del conn.registry[conn.key]
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+
+    def received(self, conn: _Connection, text: str):
+        """Handle a client frame: ``ping`` is answered and opts the socket into the idle check."""
+        conn.last_seen = time.monotonic()
+        if text == "ping":
+            conn.heartbeat = True
+            self.enqueue(conn, {"type": "pong"})
+
+    def enqueue(self, conn: _Connection, message: dict):
+        if conn.closed:
+            return
+        try:
+            conn.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.counters["slow_consumer_disconnects"] += 1
+            print(f"[WebSocket] Slow consumer on {conn.key} — disconnecting")
+            self.disconnect(conn)  # synchronously, so later broadcasts skip it
+            asyncio.create_task(self._close_socket(conn, CLOSE_SLOW_CONSUMER))
+
+    async def send_update(self, topic: str, message: dict):
+        """Publish an update for a tracking ID (or ``admin_topic()``); every worker delivers it to its own sockets."""
+        try:
+            await self.backplane.publish(topic, message)
+        except Exception as e:
+            print(f"[WebSocket] Publish failed for {topic}: {e}")
+
+    async def _deliver(self, topic: str, message: dict):
+        if topic.startswith(ADMIN_TOPIC_PREFIX):
+            conns = self.admin_connections.get(topic[len(ADMIN_TOPIC_PREFIX):], ())
+        else:
+            conns = self.connections.get(topic, ())
+        # Enqueue only — each socket's writer sends at its own pace
+        for conn in list(conns):
+            self.enqueue(conn, message)
+
+    async def _writer(self, conn: _Connection):
+        try:
+            while True:
+                message = await conn.queue.get()
+                await asyncio.wait_for(conn.websocket.send_json(message), timeout=settings.ws_send_timeout_seconds)
+                self.counters["messages_sent"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.counters["send_failures"] += 1
+            await self._close(conn, CLOSE_SLOW_CONSUMER)
+
+    async def _close(self, conn: _Connection, code: int):
+        if conn.closed:
+            return
+        self.disconnect(conn)
+        await self._close_socket(conn, code)
+
+    async def _close_socket(self, conn: _Connection, code: int):
+        try:
+            await conn.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _idle_loop(self):
+        while True:
+            await asyncio.sleep(settings.ws_idle_check_seconds)
+            await self.close_idle()
+
+    async def close_idle(self):
+        """Drop heartbeat clients that stopped pinging; listen-only sockets are left to protocol pings."""
+        cutoff = time.monotonic() - settings.ws_idle_timeout_seconds
+        for conn in list(self._all_connections()):
+            if conn.heartbeat and conn.last_seen < cutoff:
+                self.counters["idle_disconnects"] += 1
+                await self._close(conn, CLOSE_IDLE)
+
+    def stats(self) -> dict:
+        depths = [conn.queue.qsize() for conn in self._all_connections()]
+        return {
+            "connections": len(depths),
+            "tracking_ids": len(self.connections),
+            "admin_feeds": len(self.admin_connections),
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            **self.counters,
+        }
 
 
 ws_manager = WebSocketManager()
@@ -1,3 +1,6 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
@@ -5,7 +8,10 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 import bcrypt
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
 
 from app.config import settings
 from app.database import get_db
@@ -14,36 +20,165 @@ from app.models.user import User
 security = HTTPBearer()
 
 
+# bcrypt releases the GIL, so a few threads give real parallelism; the pool
+# size caps how much CPU a burst of logins can take from request handling.
+_hash_pool = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt")
+
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=settings.bcrypt_rounds)).decode("utf-8")
 
 
 def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
 
 
+def needs_rehash(hashed: str) -> bool:
+    """True when a stored hash was made with a different BCRYPT_ROUNDS."""
+    try:
+        return int(hashed.split("$")[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return True
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, verify_password, plain, hashed)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
     to_encode["exp"] = expire
+    to_encode.setdefault("iat", int(time.time()))
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
+# Resolved principals, keyed by user id then token issue time: user_id → {iat: (expires, fields)}.
+# Entries are snapshots of the columns routes read, never the session-bound row.
+_principal_cache: dict[str, dict[int, tuple[float, dict]]] = {}
+PRINCIPAL_FIELDS = ("id", "tenant_id", "email", "name", "role", "department_id")
+
+# Backplane topic on which a committed user change tells every worker to drop its cached principal
+PRINCIPAL_TOPIC = "auth:principals"
+
+
+def _cache_get(user_id: str, iat: int) -> Optional[dict]:
+    entry = _principal_cache.get(user_id, {}).get(iat)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry[1]
+
+
+def _cache_put(user_id: str, iat: int, fields: dict):
+    if len(_principal_cache) >= settings.auth_principal_cache_size:
+        _principal_cache.pop(next(iter(_principal_cache)))  # oldest user first
+    _principal_cache.setdefault(user_id, {})[iat] = (
+        time.monotonic() + settings.auth_principal_cache_seconds, fields,
+    )
+
+
+def invalidate_principal(user_id: str):
+    """Drop this worker's cached principals for a user, e.g. after a role or password change."""
+    _principal_cache.pop(user_id, None)
+
+
+def principal_claims(user: User) -> dict:
+    """Token claims that let AUTH_TRUST_TOKEN_CLAIMS rebuild the principal without a lookup."""
+    return {"sub": str(user.id), **{f: getattr(user, f) for f in PRINCIPAL_FIELDS if f != "id"}}
+
+
+async def on_backplane_message(topic: str, message: dict):
+    if topic == PRINCIPAL_TOPIC:
+        for user_id in message["user_ids"]:
+            invalidate_principal(user_id)
+
+
+async def _publish_invalidation(user_ids: list[str]):
+    from app.services.websocket import ws_manager
+    try:
+        await ws_manager.backplane.publish(PRINCIPAL_TOPIC, {"user_ids": user_ids})
+    except Exception as e:
+        print(f"[Auth] Principal invalidation publish failed: {e}")
+
+
+def _stale(target: User):
+    # Drop it here at once; other workers hear about it once the change commits
+    invalidate_principal(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("stale_principals", set()).add(target.id)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_change(mapper, connection, target):
+    if any(get_history(target, attr).has_changes() for attr in (*PRINCIPAL_FIELDS, "password_hash")):
+        _stale(target)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target):
+    _stale(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _broadcast_stale_principals(session):
+    user_ids = session.info.pop("stale_principals", None)
+    if not user_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # sync scripts have no backplane; other workers expire within AUTH_PRINCIPAL_CACHE_SECONDS
+    loop.create_task(_publish_invalidation(sorted(user_ids)))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_principals(session):
+    session.info.pop("stale_principals", None)
+
+
+async def user_from_token(token: str, db: AsyncSession) -> User:
+    """Resolve a bearer token to its user; raises 401 if it is invalid or stale.
+
+    The result is a detached ``User`` carrying only PRINCIPAL_FIELDS. It is
+    served from a short-lived per-process cache when possible, or built from
+    the token's own claims (see ``principal_claims``) when
+    AUTH_TRUST_TOKEN_CLAIMS is on; role changes then apply only once the
+    token is reissued, and tokens missing any claim fall back to the lookup.
+    """
     try:
-        payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+
+    claims = [f for f in PRINCIPAL_FIELDS if f != "id"]
+    if settings.auth_trust_token_claims and all(f in payload for f in claims):
+        return User(id=user_id, **{f: payload[f] for f in claims})
+
+    iat = int(payload.get("iat") or 0)
+    fields = _cache_get(user_id, iat)
+    if fields is None:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        fields = {f: getattr(user, f) for f in PRINCIPAL_FIELDS}
+        if settings.auth_principal_cache_seconds > 0:
+            _cache_put(user_id, iat, fields)
+    return User(**fields)
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    return await user_from_token(credentials.credentials, db)
 
 
 async def require_admin(user: User = Depends(get_current_user)) -> User:
@@ -1,3 +1,8 @@
+import difflib
+import re
+from functools import lru_cache
+from typing import Optional
+
 STATE_DISTRICT_MAP = {
     "Andaman and Nicobar Islands": ["Nicobar", "North and Middle Andaman", "South Andaman"],
     "Andhra Pradesh": ["Anantapur", "Chittoor", "East Godavari", "Guntur", "Krishna", "Kurnool", "Prakasam", "Srikakulam", "Sri Potti Sriramulu Nellore", "Visakhapatnam", "Vizianagaram", "West Godavari", "YSR District, Kadapa (Cuddapah)"],
@@ -35,3 +40,159 @@ STATE_DISTRICT_MAP = {
     "Uttarakhand": ["Almora", "Bageshwar", "Chamoli", "Champawat", "Dehradun", "Haridwar", "Nainital", "Pauri Garhwal", "Pithoragarh", "Rudraprayag", "Tehri Garhwal", "Udham Singh Nagar", "Uttarkashi"],
     "West Bengal": ["Alipurduar", "Bankura", "Birbhum", "Cooch Behar", "Dakshin Dinajpur (South Dinajpur)", "Darjeeling", "Hooghly", "Howrah", "Jalpaiguri", "Jhargram", "Kalimpong", "Kolkata", "Malda", "Murshidabad", "Nadia", "North 24 Parganas", "Paschim Medinipur (West Medinipur)", "Paschim (West) Burdwan (Bardhaman)", "Purba Burdwan (Bardhaman)", "Purba Medinipur (East Medinipur)", "Purulia", "South 24 Parganas", "Uttar Dinajpur (North Dinajpur)"]
 }
+
+
+# ─── Canonical normalisation ───────────────────────────────────────────────
+# Geocoders spell places their own way ("Bangalore Urban", "Orissa",
+# "Gurugram"). normalize_location() maps such names onto stable codes derived
+# from STATE_DISTRICT_MAP so dashboards can filter with indexed equality.
+
+STATE_ALIASES = {
+    "orissa": "Odisha",
+    "pondicherry": "Puducherry",
+    "nct of delhi": "Delhi",
+    "national capital territory of delhi": "Delhi",
+    "new delhi": "Delhi",
+    "uttaranchal": "Uttarakhand",
+    "ladakh": "Jammu and Kashmir",
+    "dadra and nagar haveli": "Dadra and Nagar Haveli and Daman and Diu",
+    "daman and diu": "Dadra and Nagar Haveli and Daman and Diu",
+}
+
+DISTRICT_ALIASES = {
+    "Karnataka": {
+        "bangalore": "Bengaluru (Bangalore) Urban",
+        "bengaluru": "Bengaluru (Bangalore) Urban",
+        "mangaluru": "Dakshina Kannada",
+        "mangalore": "Dakshina Kannada",
+        "karwar": "Uttara Kannada (Karwar)",
+    },
+    "Haryana": {"gurugram": "Gurgaon"},
+    "Uttar Pradesh": {"prayagraj": "Allahabad", "ayodhya": "Faizabad", "noida": "Gautam Buddha Nagar"},
+    "Kerala": {"trivandrum": "Thiruvananthapuram", "cochin": "Ernakulam", "kochi": "Ernakulam", "calicut": "Kozhikode"},
+    "Maharashtra": {"mumbai": "Mumbai City", "bombay": "Mumbai City", "poona": "Pune"},
+    "Tamil Nadu": {"madras": "Chennai", "trichy": "Tiruchirappalli", "ooty": "Nilgiris"},
+    "West Bengal": {"calcutta": "Kolkata"},
+    "Odisha": {"khurda": "Khordha", "bhubaneswar": "Khordha"},
+}
+
+_FUZZY_CUTOFF = 0.85
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def _clean(name: str) -> str:
+    name = name.lower().replace("&", "and")
+    name = re.sub(r"\b(district|division|taluk|tehsil|urban district)\b", " ", name)
+    return re.sub(r"[^a-z0-9]+", " ", name).strip()
+
+
+def state_code(state: str) -> str:
+    return _slug(state)
+
+
+def district_code(state: str, district: str) -> str:
+    return f"{_slug(state)}.{_slug(district)}"
+
+
+def _variants(official: str) -> set[str]:
+    """Spellings an official name is known by: 'Mysuru (Mysore)' → mysuru, mysore, mysuru mysore."""
+    variants = {_clean(official)}
+    match = re.match(r"^(.*?)\s*\((.*?)\)\s*(.*)$", official)
+    if match:
+        before, inside, after = match.groups()
+        variants.add(_clean(f"{before} {after}"))
+        variants.add(_clean(f"{inside} {after}"))
+    for part in re.split(r"[,/]", official):
+        variants.add(_clean(part))
+    return {v for v in variants if v}
+
+
+@lru_cache(maxsize=1)
+def _indexes() -> tuple[dict[str, str], dict[str, dict[str, str]], dict[str, list[str]]]:
+    states: dict[str, str] = {_clean(s): s for s in STATE_DISTRICT_MAP}
+    states.update({_clean(alias): s for alias, s in STATE_ALIASES.items()})
+    districts: dict[str, dict[str, str]] = {}
+    owners: dict[str, list[str]] = {}  # cleaned district name → states that have it
+    for state, names in STATE_DISTRICT_MAP.items():
+        table = districts.setdefault(state, {})
+        for official in names:
+            for v in _variants(official):
+                table.setdefault(v, official)
+        for alias, official in DISTRICT_ALIASES.get(state, {}).items():
+            table[_clean(alias)] = official
+        for v in table:
+            owners.setdefault(v, []).append(state)
+    return states, districts, owners
+
+
+@lru_cache(maxsize=4096)
+def normalize_state(name: Optional[str]) -> Optional[str]:
+    """Return the official state name for a geocoder/user spelling, or None."""
+    if not name:
+        return None
+    states, _, _ = _indexes()
+    key = _clean(name)
+    if key in states:
+        return states[key]
+    close = difflib.get_close_matches(key, states.keys(), n=1, cutoff=_FUZZY_CUTOFF)
+    return states[close[0]] if close else None
+
+
+@lru_cache(maxsize=4096)
+def normalize_district(name: Optional[str], state: Optional[str] = None) -> Optional[tuple[str, str]]:
+    """Return (official state, official district) for a district spelling, or None.
+
+    Without a state, names shared by several states (e.g. Aurangabad) are
+    treated as ambiguous and left unmatched.
+    """
+    if not name:
+        return None
+    _, districts, owners = _indexes()
+    key = _clean(name)
+    if state:
+        table = districts.get(state, {})
+        if key in table:
+            return state, table[key]
+        close = difflib.get_close_matches(key, table.keys(), n=1, cutoff=_FUZZY_CUTOFF)
+        return (state, table[close[0]]) if close else None
+    candidates = owners.get(key)
+    if not candidates:
+        close = difflib.get_close_matches(key, owners.keys(), n=1, cutoff=_FUZZY_CUTOFF)
+        if not close:
+            return None
+        key = close[0]
+        candidates = owners[key]
+    if len(candidates) != 1:
+        return None
+    return candidates[0], districts[candidates[0]][key]
+
+
+def normalize_location(state: Optional[str] = None, district: Optional[str] = None,
+                       city: Optional[str] = None, address: Optional[str] = None) -> dict:
+    """Map raw geocoder output to canonical codes.
+
+    Tries the district field first, then the city, then each comma-separated
+    part of the free-text address (Nominatim's display_name usually contains
+    the official district). Returns state_code/district_code, either may be None.
+    """
+    official_state = normalize_state(state)
+    if not official_state and address:
+        for part in reversed(address.split(",")):
+            official_state = normalize_state(part.strip())
+            if official_state:
+                break
+
+    candidates = [district, city] + ([p.strip() for p in address.split(",")] if address else [])
+    for candidate in candidates:
+        if not candidate or candidate.strip().isdigit():
+            continue
+        match = normalize_district(candidate, official_state)
+        if match:
+            matched_state, matched_district = match
+            return {"state_code": state_code(matched_state),
+                    "district_code": district_code(matched_state, matched_district)}
+
+    return {"state_code": state_code(official_state) if official_state else None, "district_code": None}
@@ -0,0 +1,99 @@
+"""
+Keyset pagination and cheap totals for the admin list endpoints.
+
+Pages are ordered newest first on (created_at, id) and continue from an
+opaque cursor holding the last row's key, so page 500 costs the same index
+range scan as page 1. Totals come from a short-lived per-filter cache; on a
+miss Postgres answers with the planner's row estimate, and an exact COUNT
+runs only when the caller asks for it (or when no estimate is available,
+as on SQLite). Estimates and counts are cached alike, so paging through a
+list costs at most one EXPLAIN or COUNT per filter per cache window.
+"""
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, func, literal, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+_totals_cache: dict[tuple, tuple[float, int, bool]] = {}
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def fetch_page(db: AsyncSession, query, model, cursor: Optional[str], limit: int):
+    """Return one page of ``query`` (newest first) and the cursor for the next one."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Bind with the column's type so an offset-carrying cursor is normalised like any other timestamp
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(literal(created_at, model.created_at.type), row_id))
+    rows = (await db.scalars(
+        query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    )).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def _explain(query):
+    """``EXPLAIN (FORMAT JSON)`` over ``query`` with its filter values as bound parameters."""
+    compiled = query.compile(dialect=postgresql.dialect(paramstyle="named"))
+    return text("EXPLAIN (FORMAT JSON) " + compiled.string).bindparams(
+        *(bindparam(name, value, type_=compiled.binds[name].type) for name, value in compiled.params.items())
+    )
+
+
+async def _planner_estimate(db: AsyncSession, query) -> Optional[int]:
+    if db.bind.dialect.name != "postgresql":
+        return None
+    plan = await db.scalar(_explain(query))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _remember(cache_key: tuple, total: int, is_estimate: bool, now: float) -> None:
+    if len(_totals_cache) >= 1024:
+        _totals_cache.pop(next(iter(_totals_cache)))
+    _totals_cache[cache_key] = (now + settings.admin_list_total_cache_seconds, total, is_estimate)
+
+
+async def list_total(db: AsyncSession, query, cache_key: tuple, exact: bool = False) -> tuple[int, bool]:
+    """Total rows matching ``query`` as ``(total, is_estimate)``.
+
+    Totals are cached for ADMIN_LIST_TOTAL_CACHE_SECONDS per filter
+    combination, so paging through a list neither re-counts nor re-plans
+    it. ``exact`` skips the cache and any estimate, and refreshes the entry.
+    """
+    now = time.monotonic()
+    if not exact:
+        entry = _totals_cache.get(cache_key)
+        if entry is not None and entry[0] > now:
+            return entry[1], entry[2]
+        estimate = await _planner_estimate(db, query)
+        if estimate is not None:
+            _remember(cache_key, estimate, True, now)
+            return estimate, True
+
+    total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+    _remember(cache_key, total, False, now)
+    return total, False
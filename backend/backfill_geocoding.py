@@ -0,0 +1,134 @@
+"""Bulk repair: fill missing ward/district on complaints that have coordinates.
+
+Complaints are streamed in keyset batches, coordinates are de-duplicated by
+geohash cell, each distinct cell is resolved once through GeocodingService
+(cache, boundary polygons, rate-limited Nominatim) with bounded concurrency,
+and results are written back with one executemany UPDATE per batch.
+
+    python backfill_geocoding.py [--batch-size 1000] [--concurrency 4] [--tenant ID] [--dry-run]
+"""
+import sys
+import time
+import asyncio
+import argparse
+sys.path.insert(0, ".")
+
+from sqlalchemy import or_, update, func
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.complaint import Complaint
+from app.models.geocode_retry import GeocodeRetry
+from app.services.geocoding import geocoding_service
+from app.services.rollups import reconcile_days
+from app.utils import geohash
+from app.utils.locations import normalize_location
+
+FIELDS = ("address", "ward", "block", "district", "state", "state_code", "district_code")
+
+
+def _missing_filter():
+    return [
+        Complaint.latitude.isnot(None),
+        Complaint.longitude.isnot(None),
+        or_(
+            Complaint.ward.is_(None), Complaint.ward == "",
+            Complaint.district.is_(None), Complaint.district == "",
+        ),
+    ]
+
+
+async def _resolve_cells(cells: dict, resolved: dict, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(key, lat, lon, tenant_id):
+        async with semaphore:
+            result = await geocoding_service.reverse_geocode(lat, lon, tenant_id=tenant_id)
+        resolved[key] = result if result.get("resolved") else None
+
+    await asyncio.gather(*(
+        resolve(key, lat, lon, tenant_id)
+        for key, (lat, lon, tenant_id) in cells.items() if key not in resolved
+    ))
+
+
+def _merge(row, result: dict) -> dict:
+    """Only fill blanks — never overwrite data a citizen or officer entered."""
+    values = {"id": row.id}
+    codes = normalize_location(
+        row.state or result.get("state"), row.district or result.get("district"),
+        result.get("city"), row.address or result.get("address"),
+    )
+    incoming = {**result, **{k: v for k, v in codes.items() if v}}
+    for field in FIELDS:
+        current = getattr(row, field)
+        blank = not current or (field == "address" and current.startswith("Lat: "))  # failed-lookup placeholder
+        values[field] = (incoming.get(field) or current) if blank else current
+    return values
+
+
+async def backfill(batch_size: int, concurrency: int, tenant_id: str | None, dry_run: bool):
+    db = SessionLocal()
+    await geocoding_service.start()
+    try:
+        base_filter = _missing_filter()
+        if tenant_id:
+            base_filter.append(Complaint.tenant_id == tenant_id)
+        total = db.query(func.count(Complaint.id)).filter(*base_filter).scalar()
+        print(f"Found {total} complaints with coordinates but missing jurisdiction")
+
+        resolved: dict[str, dict | None] = {}  # geohash cell → result, shared across batches
+        last_id = ""
+        scanned = updated = 0
+        started = time.monotonic()
+        while True:
+            rows = db.query(
+                Complaint.id, Complaint.tenant_id, Complaint.latitude, Complaint.longitude,
+                *(getattr(Complaint, f) for f in FIELDS),
+            ).filter(*base_filter, Complaint.id > last_id).order_by(Complaint.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            cells = {}
+            row_cells = []
+            for row in rows:
+                key = f"{row.tenant_id}|{geohash.encode(row.latitude, row.longitude, settings.geocode_cache_precision)}"
+                cells.setdefault(key, (row.latitude, row.longitude, row.tenant_id))
+                row_cells.append((row, key))
+            await _resolve_cells(cells, resolved, concurrency)
+
+            params = [_merge(row, resolved[key]) for row, key in row_cells if resolved.get(key)]
+            if params and not dry_run:
+                db.execute(update(Complaint), params)
+                # These no longer need the scheduler's retry queue
+                db.query(GeocodeRetry).filter(
+                    GeocodeRetry.complaint_id.in_([p["id"] for p in params])
+                ).delete(synchronize_session=False)
+                db.commit()
+
+            scanned += len(rows)
+            updated += len(params)
+            elapsed = time.monotonic() - started
+            print(
+                f"  {scanned}/{total} scanned, {updated} updated, "
+                f"{len(resolved)} distinct cells ({sum(1 for r in resolved.values() if r is None)} unresolved), "
+                f"{scanned / elapsed:.0f} rows/s"
+            )
+        if updated and not dry_run:
+            # The executemany UPDATE bypasses the ORM, so move the rollup buckets here
+            print(f"  Rebuilt {reconcile_days(db)} complaint rollup buckets")
+        print("Dry run complete — no rows written." if dry_run else "Backfill complete!")
+    finally:
+        await geocoding_service.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.concurrency, args.tenant, args.dry_run))
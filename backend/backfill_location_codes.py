@@ -0,0 +1,45 @@
+"""One-time backfill: assign canonical state_code/district_code to existing complaints."""
+import sys
+sys.path.insert(0, ".")
+
+from sqlalchemy import or_
+
+from app.database import SessionLocal
+from app.models.complaint import Complaint
+from app.utils.locations import normalize_location
+
+BATCH_SIZE = 500
+
+
+def backfill():
+    db = SessionLocal()
+    try:
+        last_id = ""
+        updated = scanned = 0
+        while True:
+            # Keyset on id so each batch is an index range scan, not a growing OFFSET
+            batch = db.query(Complaint).filter(
+                Complaint.id > last_id,
+                or_(Complaint.state_code.is_(None), Complaint.district_code.is_(None)),
+            ).order_by(Complaint.id).limit(BATCH_SIZE).all()
+            if not batch:
+                break
+            for c in batch:
+                codes = normalize_location(c.state, c.district, None, c.address)
+                changed = False
+                for field in ("state_code", "district_code"):
+                    if codes[field] and not getattr(c, field):
+                        setattr(c, field, codes[field])
+                        changed = True
+                updated += changed
+            db.commit()
+            scanned += len(batch)
+            last_id = batch[-1].id
+            print(f"  Scanned {scanned} complaints, {updated} updated")
+        print("Backfill complete!")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill()
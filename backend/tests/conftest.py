@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read at import time: point the app at a throwaway SQLite file first
+_TMP = tempfile.mkdtemp(prefix="civicai-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/civicai.db"
+os.environ["UPLOAD_DIR"] = f"{_TMP}/uploads"
+os.environ["KV_STORE"] = "memory"
+os.environ["SMTP_HOST"] = ""
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import pytest  # noqa: E402
+from sqlalchemy.dialects.sqlite import DATETIME  # noqa: E402
+
+from app.database import Base, engine  # noqa: E402
+import app.models  # noqa: E402,F401
+
+_sqlite_datetime_bind = DATETIME.bind_processor
+
+
+def _naive_only_bind(self, dialect):
+    # Production runs on asyncpg, which rejects timezone-aware values for
+    # "timestamp without time zone" columns; SQLite would silently drop the
+    # offset. Fail the same way asyncpg does so the suite catches it.
+    process = _sqlite_datetime_bind(self, dialect)
+
+    def bind(value):
+        if value is not None and getattr(value, "tzinfo", None) is not None:
+            raise TypeError("can't subtract offset-naive and offset-aware datetimes")
+        return process(value)
+    return bind
+
+
+DATETIME.bind_processor = _naive_only_bind
+
+
+@pytest.fixture
+def tables():
+    """Fresh tables in the test database, dropped again afterwards."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import WebSocketDisconnect
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, SessionLocal
+from app.main import app
+from app.models.complaint import Complaint
+from app.models.user import User
+from app.models.work_order import WorkOrder
+from app.routers.admin import admin_live
+from app.utils.auth import hash_password
+from tests.test_websocket import FakeSocket
+
+
+class LiveSocket(FakeSocket):
+    """A dashboard socket that stays open until ``hang_up()``."""
+
+    def __init__(self):
+        super().__init__()
+        self._gone = asyncio.Event()
+
+    async def receive_text(self):
+        await self._gone.wait()
+        raise WebSocketDisconnect()
+
+    def hang_up(self):
+        self._gone.set()
+
+
+@pytest.fixture
+def seeded(tables):
+    db = SessionLocal()
+    db.add(User(email="officer@civic.test", name="Officer", role="officer", password_hash=hash_password("s3cret")))
+    pothole = Complaint(tracking_id="CIV-L1", citizen_email="c@example.com", description="Pothole",
+                        status="assigned", category="ROADS", risk_level="high")
+    leak = Complaint(tracking_id="CIV-L2", citizen_email="c@example.com", description="Leak",
+                     status="submitted", category="WATER", risk_level="low")
+    db.add_all([pothole, leak])
+    db.flush()
+    order = WorkOrder(complaint_id=pothole.id, status="assigned")
+    db.add(order)
+    db.commit()
+    ids = pothole.id, leak.id, order.id
+    db.close()
+    return ids
+
+
+def _apply(counters: dict, deltas: dict):
+    for key, delta in deltas.items():
+        if isinstance(delta, int):
+            counters[key] += delta
+            continue
+        bucket = counters.setdefault(key, {})
+        for name, n in delta.items():
+            bucket[name] = bucket.get(name, 0) + n
+            if not bucket[name]:
+                del bucket[name]
+
+
+async def _wait_for(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_plus_deltas_matches_a_fresh_count(seeded):
+    pothole_id, leak_id, order_id = seeded
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        login = await client.post("/admin/login", json={"email": "officer@civic.test", "password": "s3cret"})
+        token = login.json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        socket = LiveSocket()
+        feed = asyncio.create_task(admin_live(socket, token))
+        try:
+            await asyncio.wait_for(_wait_for(lambda: socket.sent), 5)
+            assert socket.sent[0]["type"] == "snapshot"
+
+            assert (await client.patch(f"/admin/complaints/{leak_id}", params={"status": "categorized"})).status_code == 200
+            assert (await client.patch(f"/admin/work-orders/{order_id}", json={"status": "in_progress"})).status_code == 200
+            await asyncio.wait_for(_wait_for(lambda: len(socket.sent) == 3), 5)
+
+            expected = (await client.get("/admin/analytics")).json()
+        finally:
+            socket.hang_up()
+            await asyncio.wait_for(feed, 5)
+
+    async with AsyncSessionLocal() as db:
+        expected["work_orders_by_status"] = dict((await db.execute(
+            select(WorkOrder.status, func.count(WorkOrder.id)).group_by(WorkOrder.status)
+        )).all())
+
+    snapshot, *events = socket.sent
+    assert [e["type"] for e in events] == ["complaint.updated", "work_order.status_changed"]
+    counters = snapshot["counters"]
+    for event in events:
+        _apply(counters, event["deltas"])
+    assert counters == expected
+    assert counters["by_status"] == {"categorized": 1, "in_progress": 1}
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import wave
+
+from app.services import media_workers
+
+RATE = 16000
+
+
+def _write_wav(path, seconds):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(b"\0\0" * int(seconds * RATE))
+
+
+def _fake_ffmpeg(monkeypatch, normalized_seconds, segment_seconds=(), silences=()):
+    """Stand in for ffmpeg: write WAVs of the given lengths and report the given silences."""
+    calls = []
+
+    def run_ffmpeg(ffmpeg, args, timeout=120):
+        calls.append(args)
+        if "segment" in args:
+            pattern = args[-1]
+            for i, seconds in enumerate(segment_seconds):
+                _write_wav(pattern % i, seconds)
+        else:
+            _write_wav(args[-1], normalized_seconds)
+
+    stderr = "".join(f"[silencedetect] silence_start: {s - 0.5}\n[silencedetect] silence_end: {s + 0.5}\n"
+                     for s in silences)
+    monkeypatch.setattr(media_workers, "_run_ffmpeg", run_ffmpeg)
+    monkeypatch.setattr(subprocess, "run", lambda *a, **kw: subprocess.CompletedProcess(a, 0, "", stderr))
+    return calls
+
+
+def _segments(tmp_path):
+    return media_workers.prepare_audio_segments(
+        "ffmpeg", "note.ogg", str(tmp_path / "work"), RATE,
+        target_seconds=30, max_seconds=60, silence_db=-35,
+    )
+
+
+def test_cuts_land_on_the_pause_nearest_each_target():
+    assert media_workers._pick_cut_points([12.0, 28.0, 33.0, 61.0, 95.0], 100.0, 30, 60) == [28.0, 61.0]
+
+
+def test_cuts_fall_back_to_the_hard_limit_without_pauses():
+    assert media_workers._pick_cut_points([], 150.0, 30, 40) == [40, 80, 120]
+
+
+def test_short_clip_is_not_cut():
+    assert media_workers._pick_cut_points([10.0, 20.0], 40.0, 30, 60) == []
+
+
+def test_all_silence_clip_yields_no_segments(tmp_path, monkeypatch):
+    calls = _fake_ffmpeg(monkeypatch, normalized_seconds=0)
+    assert _segments(tmp_path) == []
+    assert os.listdir(tmp_path / "work") == []
+    assert len(calls) == 1  # trimmed, then nothing left to split
+
+
+def test_short_clip_is_sent_whole(tmp_path, monkeypatch):
+    _fake_ffmpeg(monkeypatch, normalized_seconds=20)
+    assert _segments(tmp_path) == [str(tmp_path / "work" / "normalized.wav")]
+
+
+def test_long_clip_is_split_at_pauses_and_empty_tail_dropped(tmp_path, monkeypatch):
+    calls = _fake_ffmpeg(monkeypatch, normalized_seconds=100, segment_seconds=(28, 33, 39, 0),
+                         silences=(12, 28, 33, 61, 95))
+    work = tmp_path / "work"
+    assert _segments(tmp_path) == [str(work / f"segment_{i:03d}.wav") for i in range(3)]
+    assert sorted(os.listdir(work)) == ["segment_000.wav", "segment_001.wav", "segment_002.wav"]
+    split = calls[1]
+    assert split[split.index("-segment_times") + 1] == "28.000,61.000"
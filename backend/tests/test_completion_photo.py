@@ -0,0 +1,101 @@
+import io
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.complaint import Complaint
+from app.models.user import User
+from app.models.work_order import WorkOrder
+from app.services import media_workers
+from app.services.media import media_service
+from app.utils.auth import hash_password
+
+ORIENTATION, GPS_IFD = 0x0112, 0x8825
+
+
+def _jpeg(width=300, height=200, **exif_tags) -> bytes:
+    img = Image.new("RGB", (width, height), "white")
+    img.paste((200, 30, 30), (0, 0, width // 3, height // 2))  # asymmetric, so rotation shows
+    exif = Image.Exif()
+    for tag, value in exif_tags.items():
+        exif[{"orientation": ORIENTATION, "gps": GPS_IFD}[tag]] = value
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def _process(tmp_path, data: bytes, max_dimension=2048) -> tuple[dict, Image.Image]:
+    src, dest = tmp_path / f"{uuid.uuid4().hex}.jpg", tmp_path / f"{uuid.uuid4().hex}-out.jpg"
+    src.write_bytes(data)
+    result = media_workers.process_completion_photo(str(src), str(dest), max_dimension, 85)
+    return result, Image.open(dest)
+
+
+def test_metadata_is_stripped_and_orientation_applied(tmp_path):
+    gps = {1: "N", 2: (9.0, 55.0, 52.0), 3: "E", 4: (76.0, 16.0, 2.0)}
+    result, out = _process(tmp_path, _jpeg(orientation=6, gps=gps))
+    assert (result["width"], result["height"]) == out.size == (200, 300)  # rotated upright
+    assert not out.getexif()
+    assert "exif" not in out.info
+
+
+def test_hash_ignores_metadata_and_output_is_bounded(tmp_path):
+    plain, _ = _process(tmp_path, _jpeg())
+    tagged, _ = _process(tmp_path, _jpeg(gps={1: "S", 2: (1.0, 2.0, 3.0)}))
+    assert plain["hash"] == tagged["hash"]
+    small, out = _process(tmp_path, _jpeg(width=1200, height=600), max_dimension=400)
+    assert max(out.size) == 400 and small["hash"] != plain["hash"]
+
+
+def test_undecodable_upload_is_rejected(tmp_path):
+    with pytest.raises(Exception):
+        _process(tmp_path, b"\xff\xd8not really a jpeg")
+
+
+@pytest.fixture
+def client(tables, monkeypatch):
+    async def inline(fn, *args):  # no worker processes in tests
+        return fn(*args)
+
+    monkeypatch.setattr(media_service, "run_in_pool", inline)
+    db = SessionLocal()
+    db.add(User(email="officer@civic.test", name="Officer", role="officer", password_hash=hash_password("s3cret")))
+    complaint = Complaint(tracking_id="CIV-PHOTO", citizen_email="c@example.com", description="Pothole")
+    db.add(complaint)
+    db.flush()
+    orders = [WorkOrder(complaint_id=complaint.id, status="in_progress") for _ in range(2)]
+    db.add_all(orders)
+    db.commit()
+    ids = [wo.id for wo in orders]
+    db.close()
+    client = TestClient(app)
+    token = client.post("/admin/login", json={"email": "officer@civic.test", "password": "s3cret"}).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    client.work_order_ids = ids
+    return client
+
+
+def _upload(client, work_order_id, data: bytes):
+    return client.post(f"/admin/work-orders/{work_order_id}/completion-photo",
+                       files={"photo": ("proof.jpg", data, "image/jpeg")})
+
+
+def test_proof_photo_is_stored_and_reuse_is_rejected(client):
+    first, second = client.work_order_ids
+    response = _upload(client, first, _jpeg(gps={1: "N", 2: (9.0, 55.0, 52.0)}))
+    assert response.status_code == 200
+    stored = media_service.upload_dir / response.json()["filename"]
+    assert stored.exists() and not Image.open(stored).getexif()
+
+    # Same picture, different metadata, on another work order
+    duplicate = _upload(client, second, _jpeg())
+    assert duplicate.status_code == 409 and first in duplicate.json()["detail"]
+    assert _upload(client, first, _jpeg()).status_code == 200  # re-uploading to the same order is fine
+
+
+def test_non_image_upload_returns_400(client):
+    assert _upload(client, client.work_order_ids[0], b"plain text").status_code == 400
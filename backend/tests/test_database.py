@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.config import settings
+from app.database import (
+    TimedAsyncQueuePool, TimedQueuePool, _async_url, _engine_options, async_engine, engine,
+)
+from app.main import app
+
+
+def test_engines_use_the_configured_timed_pools():
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert isinstance(async_engine.sync_engine.pool, TimedAsyncQueuePool)
+    for pool in (engine.pool, async_engine.sync_engine.pool):
+        assert pool.size() == settings.db_pool_size
+        assert pool._timeout == settings.db_pool_timeout_seconds
+        assert pool._recycle == settings.db_pool_recycle_seconds
+        assert pool._pre_ping == settings.db_pool_pre_ping
+
+
+def test_in_memory_sqlite_keeps_the_default_pool():
+    assert _engine_options("sqlite://", TimedQueuePool) == {}
+    assert _engine_options("sqlite:///:memory:", TimedQueuePool) == {}
+
+
+def test_async_url_swaps_in_the_async_driver():
+    assert _async_url("postgresql://civic:pw@db/civicai") == "postgresql+asyncpg://civic:pw@db/civicai"
+    assert _async_url("sqlite:///./civicai.db") == "sqlite+aiosqlite:///./civicai.db"
+    assert _async_url("postgresql+asyncpg://db/civicai") == "postgresql+asyncpg://db/civicai"
+
+
+def _expected_pragmas():
+    return {"journal_mode": "wal", "synchronous": 1, "busy_timeout": settings.sqlite_busy_timeout_ms}
+
+
+def test_sqlite_pragmas_apply_to_the_sync_engine():
+    with engine.connect() as conn:
+        values = {name: conn.execute(text(f"PRAGMA {name}")).scalar() for name in _expected_pragmas()}
+    assert values == _expected_pragmas()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_apply_to_the_async_engine():
+    async with async_engine.connect() as conn:
+        values = {name: (await conn.execute(text(f"PRAGMA {name}"))).scalar() for name in _expected_pragmas()}
+    assert values == _expected_pragmas()
+
+
+def test_pool_timeouts_are_counted(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool,
+                        pool_size=1, max_overflow=0, pool_timeout=0.05)
+    try:
+        with eng.connect():
+            with pytest.raises(PoolTimeoutError):
+                eng.connect()
+        stats = eng.pool.metrics.snapshot(eng.pool)
+        assert (stats["checkouts"], stats["timeouts"], stats["in_use"]) == (1, 1, 0)
+    finally:
+        eng.dispose()
+
+
+def test_health_reports_pools_sockets_and_replicas(tables):
+    client = TestClient(app)
+    before = client.get("/health").json()["database"]["async"]["checkouts"]
+    client.get("/public/dashboard")
+    body = client.get("/health").json()
+
+    assert body["status"] == "ok"
+    assert set(body["database"]) == {"async", "sync"}
+    pool = body["database"]["async"]
+    assert set(pool) == {"size", "in_use", "idle", "overflow", "checkouts", "timeouts", "avg_wait_ms", "max_wait_ms"}
+    assert pool["size"] == settings.db_pool_size and pool["in_use"] == 0
+    assert pool["checkouts"] > before
+    assert {"connections", "queued_messages", "max_queue_depth"} <= set(body["websockets"])
+    assert body["replicas"] == {}
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.complaint import Complaint
+from app.models.geocode_retry import GeocodeRetry
+from app.routers import complaints as complaints_router
+from app.services.geocoding import GeocodingService, _RateLimiter
+from app.services.kv_store import MemoryTTLStore
+from app.utils import geohash
+
+LAT, LON = 9.9312, 76.2673
+RESULT = {"address": "MG Road, Kochi", "ward": "Ernakulam South", "block": "", "district": "Ernakulam",
+          "city": "Kochi", "state": "Kerala"}
+
+
+@pytest.fixture
+def service(tables, monkeypatch):
+    service = GeocodingService()
+
+    async def no_network(lat, lon):
+        raise AssertionError("Nominatim should not be called")
+
+    monkeypatch.setattr(service, "_lookup", no_network)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_persisted_entry_is_served_and_cached_on_the_loop(service):
+    key = geohash.encode(LAT, LON, settings.geocode_cache_precision)
+    await service._store_persisted(key, RESULT, datetime.now(timezone.utc) + timedelta(hours=1))
+
+    value, _ = await service._load_persisted(key)
+    assert value == RESULT
+    assert service._cache.get(key) is None  # reading the table alone leaves the LRU to the caller
+
+    assert await service._cached_nominatim(LAT, LON) == {**RESULT, "resolved": True}
+    assert service._cache.get(key) == RESULT
+
+
+@pytest.mark.asyncio
+async def test_negative_entry_returns_placeholder(service):
+    key = geohash.encode(LAT, LON, settings.geocode_cache_precision)
+    await service._store_persisted(key, None, datetime.now(timezone.utc) + timedelta(minutes=5))
+
+    result = await service._cached_nominatim(LAT, LON)
+    assert result["resolved"] is False
+    assert result["address"].startswith("Lat: ")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_lookup(tables, monkeypatch):
+    service = GeocodingService()
+    calls = []
+
+    async def lookup(lat, lon):
+        calls.append((lat, lon))
+        await asyncio.sleep(0.01)
+        return dict(RESULT)
+
+    monkeypatch.setattr(service, "_lookup", lookup)
+    results = await asyncio.gather(*(service._cached_nominatim(LAT, LON) for _ in range(5)))
+    assert len(calls) == 1
+    assert all(r["district"] == "Ernakulam" for r in results)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("local, calls_nominatim", [
+    ({"state": "Kerala", "district": "Ernakulam", "ward": "Ward 12"}, False),
+    ({"state": "Kerala", "district": "Ernakulam", "block": "Vyttila"}, False),
+    ({"state": "Kerala", "district": "Ernakulam"}, True),  # no finer level for routing
+    ({}, True),
+])
+async def test_nominatim_fills_levels_local_layers_miss(monkeypatch, local, calls_nominatim):
+    from app.services import geocoding
+    service = GeocodingService()
+    calls = []
+
+    async def lookup(lat, lon, tenant_id=None):
+        return dict(local)
+
+    async def nominatim(lat, lon):
+        calls.append((lat, lon))
+        return {**RESULT, "resolved": True}
+
+    monkeypatch.setattr(geocoding.boundary_geocoder, "lookup", lookup)
+    monkeypatch.setattr(service, "_cached_nominatim", nominatim)
+    result = await service.reverse_geocode(LAT, LON, need_address=False)
+
+    assert bool(calls) == calls_nominatim
+    for level, name in local.items():
+        assert result[level] == name  # local names win
+    if calls_nominatim and "ward" not in local:
+        assert result["ward"] == RESULT["ward"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_shared_through_the_store():
+    store = MemoryTTLStore(max_entries=100)
+    workers = [_RateLimiter(20, store), _RateLimiter(20, store)]  # two processes, one shared store
+    slots = []
+
+    async def call(limiter):
+        await limiter.acquire()
+        slots.append(int(time.time() // limiter.interval))
+
+    await asyncio.gather(*(call(workers[i % 2]) for i in range(4)))
+    assert len(set(slots)) == 4
+
+
+@pytest.mark.asyncio
+async def test_pipeline_rerun_reuses_the_geocode_retry_row(tables, monkeypatch):
+    db = SessionLocal()
+    complaint = Complaint(tracking_id="CIV-RERUN", citizen_email="c@example.com", description="Pothole",
+                          latitude=LAT, longitude=LON)
+    db.add(complaint)
+    db.commit()
+    complaint_id = complaint.id
+    db.close()
+
+    pending = {"geocode_pending": True, "latitude": LAT, "longitude": LON, "category": "roads"}
+
+    class Pipeline:
+        def __init__(self, data):
+            self.data = data
+
+        async def run(self, context, session):
+            return SimpleNamespace(data=self.data, status="classified", structured_complaint={}, classification={},
+                                   risk_assessment={}, routing={}, work_order=None, errors=[])
+
+    async def run(data):
+        monkeypatch.setattr(complaints_router, "create_pipeline", lambda: Pipeline(data))
+        await complaints_router._run_pipeline_background(complaint_id, None, "CIV-RERUN", {})
+
+    await run(pending)
+    await run({**pending, "category": "water"})
+    db = SessionLocal()
+    [retry] = db.query(GeocodeRetry).all()
+    assert retry.complaint_id == complaint_id and retry.attempts == 0
+    assert db.get(Complaint, complaint_id).category == "water"  # the second run committed
+    db.close()
+
+    await run({"category": "water"})  # resolved this time
+    db = SessionLocal()
+    assert db.query(GeocodeRetry).count() == 0
+    db.close()
@@ -0,0 +1,52 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from app.services import media_workers
+from app.services.media import media_service
+
+
+def test_frames_span_the_whole_clip():
+    # A burst of cuts in the first seconds must not use up the budget
+    cuts = [(0.5, 0.9), (1.0, 0.4), (1.5, 0.8), (2.0, 0.7), (95.0, 0.5)]
+    times = media_workers.pick_keyframe_times(cuts, duration=100.0, max_frames=4)
+    assert times == [0.5, 37.5, 62.5, 95.0]
+
+
+def test_strongest_cut_wins_its_window():
+    cuts = [(10.0, 0.35), (20.0, 0.8), (60.0, 0.4)]
+    assert media_workers.pick_keyframe_times(cuts, duration=80.0, max_frames=2) == [20.0, 60.0]
+
+
+def test_unknown_duration_falls_back_to_the_strongest_cuts():
+    cuts = [(3.0, 0.4), (9.0, 0.9), (12.0, 0.6)]
+    assert media_workers.pick_keyframe_times(cuts, duration=0.0, max_frames=2) == [9.0, 12.0]
+    assert media_workers.pick_keyframe_times([], duration=0.0, max_frames=4) == [0.0]
+
+
+def test_scene_cuts_are_parsed_from_metadata_output(monkeypatch):
+    stderr = (
+        "[Parsed_metadata_2 @ 0x1] frame:0    pts:48      pts_time:1.6\n"
+        "[Parsed_metadata_2 @ 0x1] lavfi.scene_score=0.522\n"
+        "[Parsed_metadata_2 @ 0x1] frame:1    pts:1200    pts_time:40\n"
+        "[Parsed_metadata_2 @ 0x1] lavfi.scene_score=0.31\n"
+    )
+    monkeypatch.setattr(subprocess, "run", lambda *a, **kw: subprocess.CompletedProcess(a, 0, "", stderr))
+    assert media_workers._scene_cuts("ffmpeg", "clip.mp4", 0.3) == [(1.6, 0.522), (40.0, 0.31)]
+
+
+@pytest.mark.asyncio
+async def test_scratch_dir_is_removed_when_extraction_fails(monkeypatch):
+    made = []
+
+    async def failing_pool(fn, ffmpeg, src, out_dir, *args):
+        Path(out_dir).mkdir(parents=True)
+        (Path(out_dir) / "frame_00.jpg").write_bytes(b"partial")
+        made.append(Path(out_dir))
+        raise subprocess.CalledProcessError(1, ffmpeg)
+
+    monkeypatch.setattr(media_service, "run_in_pool", failing_pool)
+    with pytest.raises(subprocess.CalledProcessError):
+        await media_service.extract_keyframes("clip.mp4")
+    assert made and not made[0].exists()
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal
+from app.models.kv_entry import KVEntry
+from app.services.kv_store import DatabaseTTLStore, MemoryTTLStore
+
+
+@pytest.fixture(params=["memory", "database"])
+def store(request, tables):
+    return MemoryTTLStore(max_entries=100) if request.param == "memory" else DatabaseTTLStore()
+
+
+async def _expire(store, key):
+    if isinstance(store, DatabaseTTLStore):
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(KVEntry).where(KVEntry.key == key)
+                             .values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+            await db.commit()
+    else:
+        for entries in (store._values, store._counters):
+            if key in entries.data:
+                entries.put(key, entries.data[key][1], 0.0)
+
+
+@pytest.mark.asyncio
+async def test_set_get_delete(store):
+    await store.set("k", "v", 60)
+    assert await store.get("k") == "v"
+    assert 0 < await store.ttl("k") <= 60
+    await store.delete("k")
+    assert await store.get("k") is None
+    assert await store.ttl("k") == 0
+
+
+@pytest.mark.asyncio
+async def test_incr_is_a_fixed_window(store):
+    assert await store.incr("c", 60) == 1
+    assert await store.incr("c", 60) == 2
+    await _expire(store, "c")
+    assert await store.get("c") is None
+    assert await store.incr("c", 60) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_incr_loses_no_counts(store):
+    counts = await asyncio.gather(*(store.incr("c", 60) for _ in range(20)))
+    assert sorted(counts) == list(range(1, 21))
+
+
+@pytest.mark.asyncio
+async def test_purge_expired(store):
+    await store.set("live", "1", 60)
+    await store.set("dead", "1", 60)
+    await _expire(store, "dead")
+    assert await store.purge_expired() == 1
+    assert await store.get("live") == "1"
@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.complaint import Complaint
+from app.utils.locations import district_code, normalize_district, normalize_location, normalize_state
+
+
+def test_state_aliases_and_typos_resolve():
+    assert normalize_state("Orissa") == "Odisha"
+    assert normalize_state("NCT of Delhi") == "Delhi"
+    assert normalize_state("Tamilnadu") == "Tamil Nadu"  # fuzzy
+    assert normalize_state("Atlantis") is None
+    assert normalize_state("") is None
+
+
+def test_districts_resolve_within_a_state():
+    assert normalize_district("Bangalore", "Karnataka") == ("Karnataka", "Bengaluru (Bangalore) Urban")
+    assert normalize_district("Mysore", "Karnataka") == ("Karnataka", "Mysuru (Mysore)")
+    assert normalize_district("Ernakulum", "Kerala") == ("Kerala", "Ernakulam")  # fuzzy
+    assert normalize_district("Aurangabad District", "Bihar") == ("Bihar", "Aurangabad")
+
+
+def test_district_without_state_must_be_unambiguous():
+    assert normalize_district("Gurugram") == ("Haryana", "Gurgaon")
+    assert normalize_district("Aurangabad") is None  # Bihar and Maharashtra
+
+
+def test_location_falls_back_to_the_address():
+    assert normalize_location(address="MG Road, Kochi, Kerala, 682001, India") == {
+        "state_code": "kerala", "district_code": "kerala.ernakulam",
+    }
+    assert normalize_location(state="Karnataka", district="Nowhere") == {
+        "state_code": "karnataka", "district_code": None,
+    }
+    assert district_code("Karnataka", "Mysuru (Mysore)") == "karnataka.mysuru-mysore"
+
+
+def test_dashboard_filters_on_canonical_codes(tables):
+    db = SessionLocal()
+    db.add(Complaint(tracking_id="CIV-LOC", citizen_email="c@example.com", description="Pothole",
+                     state="Orissa", district="Khurda", state_code="odisha", district_code="odisha.khordha"))
+    db.commit()
+    db.close()
+    client = TestClient(app)
+
+    def total(**params):
+        return client.get("/public/dashboard", params=params).json()["total_complaints"]
+
+    assert total(state="Odisha", district="Bhubaneswar") == 1
+    assert total(state="Orissa") == 1
+    # An unrecognised filter matches nothing rather than falling back to every complaint
+    assert total(state="Atlantis") == 0
+    assert total(state="Odisha", district="Nowhere") == 0
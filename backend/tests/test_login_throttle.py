@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.models.user import User
+from app.routers import auth as auth_router
+from app.services.kv_store import MemoryTTLStore
+from app.utils.auth import hash_password
+
+
+@pytest.fixture
+def client(tables, monkeypatch):
+    monkeypatch.setattr(auth_router, "kv_store", MemoryTTLStore(max_entries=100))
+    monkeypatch.setattr(settings, "login_max_failures_per_account", 3)
+    monkeypatch.setattr(settings, "login_max_attempts_per_ip", 100)
+    db = SessionLocal()
+    db.add(User(email="officer@civic.test", name="Officer", role="officer", password_hash=hash_password("s3cret")))
+    db.commit()
+    db.close()
+    return TestClient(app)
+
+
+def _login(client, password, email="officer@civic.test"):
+    return client.post("/admin/login", json={"email": email, "password": password})
+
+
+def test_account_locks_after_failures(client):
+    for _ in range(3):
+        assert _login(client, "wrong").status_code == 401
+    locked = _login(client, "s3cret")
+    assert locked.status_code == 429
+    assert int(locked.headers["Retry-After"]) > 0
+
+
+def test_successful_login_clears_failures(client):
+    for _ in range(2):
+        assert _login(client, "wrong").status_code == 401
+    assert _login(client, "s3cret").status_code == 200
+    for _ in range(2):
+        assert _login(client, "wrong").status_code == 401
+    assert _login(client, "s3cret").status_code == 200
+
+
+def test_ip_limit_applies_across_accounts(client, monkeypatch):
+    monkeypatch.setattr(settings, "login_max_attempts_per_ip", 2)
+    assert _login(client, "x", email="a@civic.test").status_code == 401
+    assert _login(client, "x", email="b@civic.test").status_code == 401
+    assert _login(client, "s3cret").status_code == 429
+
+
+def _failures(email="officer@civic.test"):
+    entry = auth_router.kv_store._counters.data.get(f"login:account:{email}")
+    return int(entry[1]) if entry else 0
+
+
+def test_only_failed_verifies_are_counted(client):
+    for _ in range(2):
+        assert _login(client, "wrong").status_code == 401
+    assert _failures() == 2
+    assert _login(client, "wrong").status_code == 401
+    # The window is full now: even the right password waits it out, without adding to the count
+    for password in ("s3cret", "wrong", "s3cret"):
+        assert _login(client, password).status_code == 429
+    assert _failures() == 3
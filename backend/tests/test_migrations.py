@@ -0,0 +1,71 @@
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from app.config import settings
+from app.database import Base
+from tests.conftest import BACKEND_DIR
+
+
+def _alembic(monkeypatch, url: str) -> Config:
+    monkeypatch.setattr(settings, "database_url", url)
+    return Config(str(BACKEND_DIR / "alembic.ini"))
+
+
+def _schema_diff(engine) -> list:
+    with engine.connect() as conn:
+        return compare_metadata(MigrationContext.configure(conn), Base.metadata)
+
+
+def test_upgrade_adopts_pre_migration_database(monkeypatch, tmp_path):
+    url = f"sqlite:///{tmp_path}/legacy.db"
+    cfg = _alembic(monkeypatch, url)
+    # 0001 is the schema create_tables() built before migrations existed
+    command.upgrade(cfg, "0001")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM alembic_version"))  # a create_tables() database is unversioned
+        conn.execute(text("INSERT INTO tenants (id, name, created_at) VALUES ('t1', 'T', '2026-01-01')"))
+        conn.execute(text(
+            "INSERT INTO complaints (id, tenant_id, tracking_id, citizen_email, description, status,"
+            " category, reopen_count, email_approved, created_at, updated_at)"
+            " VALUES ('c1', 't1', 'CIV-1', 'a@b.c', 'pothole', 'submitted', 'road', 0, 0,"
+            " '2026-01-01 10:00:00', '2026-01-01 10:00:00')"
+        ))
+        conn.execute(text(
+            "INSERT INTO notifications (id, complaint_id, recipient_email, notification_type, message,"
+            " is_sent, created_at) VALUES ('n1', 'c1', 'a@b.c', 'email', 'hi', 1, '2026-01-01'),"
+            " ('n2', 'c1', 'a@b.c', 'email', 'hi', 0, '2026-01-01')"
+        ))
+
+    command.upgrade(cfg, "head")
+
+    assert _schema_diff(engine) == []
+    with engine.connect() as conn:
+        statuses = dict(conn.execute(text("SELECT id, status FROM notifications")).all())
+        rollups = conn.execute(text("SELECT tenant_id, category, status, count FROM complaint_rollups")).all()
+    assert statuses == {"n1": "sent", "n2": "failed"}  # old mail is never re-queued
+    assert rollups == [("t1", "road", "submitted", 1)]
+    engine.dispose()
+
+
+def test_upgrade_on_current_create_tables_database(monkeypatch, tmp_path):
+    url = f"sqlite:///{tmp_path}/current.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+
+    command.upgrade(_alembic(monkeypatch, url), "head")
+
+    assert _schema_diff(engine) == []
+    assert "alembic_version" in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_upgrade_from_empty_database(monkeypatch, tmp_path):
+    url = f"sqlite:///{tmp_path}/empty.db"
+    command.upgrade(_alembic(monkeypatch, url), "head")
+    engine = create_engine(url)
+    assert _schema_diff(engine) == []
+    engine.dispose()
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services import otp as otp_module
+from app.services.kv_store import MemoryTTLStore
+from app.services.otp import OTPService, OTPThrottled
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryTTLStore(max_entries=100)
+    monkeypatch.setattr(otp_module, "kv_store", store)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_code_verifies_once(store):
+    service = OTPService()
+    code = await service.generate_otp("Citizen@Example.com ")
+    assert await service.verify_otp("citizen@example.com", code)
+    assert not await service.verify_otp("citizen@example.com", code)
+
+
+@pytest.mark.asyncio
+async def test_code_is_burned_after_max_attempts(store, monkeypatch):
+    monkeypatch.setattr(settings, "otp_max_attempts", 3)
+    service = OTPService()
+    code = await service.generate_otp("a@b.c")
+    wrong = "000000" if code != "000000" else "111111"
+    for _ in range(3):
+        assert not await service.verify_otp("a@b.c", wrong)
+    assert not await service.verify_otp("a@b.c", code)
+
+
+@pytest.mark.asyncio
+async def test_parallel_guesses_share_the_attempt_budget(store, monkeypatch):
+    monkeypatch.setattr(settings, "otp_max_attempts", 5)
+    service = OTPService()
+    code = await service.generate_otp("a@b.c")
+    guesses = [f"{n:06d}" for n in range(1000) if f"{n:06d}" != code][:50] + [code]
+    results = await asyncio.gather(*(service.verify_otp("a@b.c", g) for g in guesses))
+    assert not any(results)  # the correct code came after the budget was spent
+    assert await store.get("otp:a@b.c") is None
+
+
+@pytest.mark.asyncio
+async def test_new_code_resets_attempts(store, monkeypatch):
+    monkeypatch.setattr(settings, "otp_max_attempts", 2)
+    service = OTPService()
+    await service.generate_otp("a@b.c")
+    await service.verify_otp("a@b.c", "x")
+    await service.verify_otp("a@b.c", "x")
+    code = await service.generate_otp("a@b.c")
+    assert await service.verify_otp("a@b.c", code)
+
+
+@pytest.mark.asyncio
+async def test_send_throttle_per_email_and_ip(store, monkeypatch):
+    monkeypatch.setattr(settings, "otp_max_sends_per_email", 2)
+    monkeypatch.setattr(settings, "otp_max_sends_per_ip", 3)
+    service = OTPService()
+    await service.generate_otp("a@b.c", client_ip="10.0.0.1")
+    await service.generate_otp("a@b.c", client_ip="10.0.0.1")
+    with pytest.raises(OTPThrottled) as exc:
+        await service.generate_otp("A@B.C", client_ip="10.0.0.2")
+    assert 0 < exc.value.retry_after <= settings.otp_throttle_window_minutes * 60
+
+    await service.generate_otp("other@b.c", client_ip="10.0.0.1")  # third send from this IP
+    with pytest.raises(OTPThrottled):
+        await service.generate_otp("third@b.c", client_ip="10.0.0.1")
+
+
+@pytest.mark.asyncio
+async def test_key_flood_does_not_evict_counters(store):
+    assert await store.incr("otp-send:ip:attacker", 60) == 1
+    for n in range(500):
+        await store.set(f"otp:flood{n}@x", "digest", 60)
+    assert await store.incr("otp-send:ip:attacker", 60) == 2
+    assert len(store._values.data) <= store.max_entries
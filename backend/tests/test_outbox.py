@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.notification import Notification
+from app.services import email as email_module
+from app.services.email import EmailService
+
+
+@pytest.fixture
+def outbox(tables, monkeypatch):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+        return True
+
+    monkeypatch.setattr(email_module.smtp_pool, "send", send)
+    return sent
+
+
+def _row(recipient="citizen@example.com", notification_type="status_update", due_in=0, attempts=0, **fields):
+    return Notification(
+        recipient_email=recipient, notification_type=notification_type, message=fields.pop("message", "Update"),
+        body=fields.pop("body", None), status="pending", attempts=attempts,
+        next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=due_in), **fields,
+    )
+
+
+async def _add(*rows):
+    async with AsyncSessionLocal() as db:
+        db.add_all(rows)
+        await db.commit()
+        return [r.id for r in rows]
+
+
+async def _statuses():
+    async with AsyncSessionLocal() as db:
+        return dict((await db.execute(select(Notification.id, Notification.status))).all())
+
+
+@pytest.mark.asyncio
+async def test_digest_takes_rows_in_their_first_window_but_not_backing_off(outbox):
+    due, waiting, backing_off = await _add(
+        _row(body="<p>due</p>"),
+        _row(body="<p>waiting</p>", due_in=200),
+        _row(body="<p>retry</p>", due_in=200, attempts=1),
+    )
+    async with AsyncSessionLocal() as db:
+        assert await EmailService().dispatch_outbox(db) == 2
+
+    assert len(outbox) == 1
+    digest = outbox[0].as_string()
+    assert "due" in digest and "waiting" in digest and "retry" not in digest
+    statuses = await _statuses()
+    assert statuses[due] == statuses[waiting] == "sent"
+    assert statuses[backing_off] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_failed_send_backs_off(outbox, monkeypatch):
+    async def fail(message):
+        raise ConnectionError("smtp down")
+
+    monkeypatch.setattr(email_module.smtp_pool, "send", fail)
+    [row_id] = await _add(_row(notification_type="confirmation"))
+    async with AsyncSessionLocal() as db:
+        assert await EmailService().dispatch_outbox(db) == 0
+        row = await db.get(Notification, row_id)
+        assert (row.status, row.attempts, row.last_error) == ("pending", 1, "smtp down")  # lease released
+        next_attempt = row.next_attempt_at.replace(tzinfo=timezone.utc)
+        assert next_attempt > datetime.now(timezone.utc) + timedelta(seconds=settings.notification_retry_base_seconds)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_dispatchers_send_each_row_once(tables, monkeypatch):
+    sent = []
+
+    async def slow_send(message):
+        await asyncio.sleep(0.05)  # the other dispatcher runs while this one is "on the wire"
+        sent.append(message["To"])
+        return True
+
+    monkeypatch.setattr(email_module.smtp_pool, "send", slow_send)
+    await _add(*(_row(recipient=f"c{i}@example.com", notification_type="confirmation") for i in range(6)))
+
+    async def dispatcher():
+        async with AsyncSessionLocal() as db:
+            return await EmailService().dispatch_outbox(db)
+
+    counts = await asyncio.gather(dispatcher(), dispatcher())
+    assert sum(counts) == 6
+    assert sorted(sent) == sorted(f"c{i}@example.com" for i in range(6))
+    assert set((await _statuses()).values()) == {"sent"}
+
+
+@pytest.mark.asyncio
+async def test_claim_is_committed_before_sending_and_expired_lease_is_reclaimed(tables, monkeypatch):
+    [row_id] = await _add(_row(notification_type="confirmation"))
+    seen = []
+
+    async def crash(message):
+        seen.append((await _statuses())[row_id])  # read from another connection mid-send
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(email_module.smtp_pool, "send", crash)
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(asyncio.CancelledError):
+            await EmailService().dispatch_outbox(db)
+    assert seen == ["sending"]
+
+    async def ok(message):
+        return True
+
+    monkeypatch.setattr(email_module.smtp_pool, "send", ok)
+    async with AsyncSessionLocal() as db:
+        assert await EmailService().dispatch_outbox(db) == 0  # lease still running
+        row = await db.get(Notification, row_id)
+        row.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await db.commit()
+        assert await EmailService().dispatch_outbox(db) == 1
+    assert (await _statuses())[row_id] == "sent"
+
+
+@pytest.mark.asyncio
+async def test_otp_send_is_audited_without_the_code(tables, monkeypatch):
+    async def ok(message):
+        return True
+
+    monkeypatch.setattr(email_module.smtp_pool, "send", ok)
+    async with AsyncSessionLocal() as db:
+        assert await EmailService().send_otp("citizen@example.com", "482913", db=db)
+        [row] = (await db.scalars(select(Notification))).all()
+    assert (row.notification_type, row.status, row.is_sent) == ("otp", "sent", True)
+    assert "482913" not in (row.message + (row.body or ""))
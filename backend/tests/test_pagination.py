@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.complaint import Complaint
+from app.models.user import User
+from app.models.work_order import WorkOrder
+from app.utils import pagination
+from app.utils.auth import hash_password
+from app.utils.pagination import _explain, decode_cursor, encode_cursor
+
+
+@pytest.fixture(autouse=True)
+def _clear_totals():
+    pagination._totals_cache.clear()
+    yield
+    pagination._totals_cache.clear()
+
+
+@pytest.fixture
+def client(tables):
+    db = SessionLocal()
+    db.add(User(email="officer@civic.test", name="Officer", role="officer", password_hash=hash_password("s3cret")))
+    complaint = Complaint(tracking_id="CIV-PAGE", citizen_email="c@example.com", description="Pothole")
+    db.add(complaint)
+    db.flush()
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(7):
+        # Pairs share a created_at, so the id tiebreak decides the order inside them
+        db.add(WorkOrder(complaint_id=complaint.id, status="completed" if i % 3 == 0 else "assigned",
+                         created_at=base + timedelta(minutes=i // 2)))
+    db.commit()
+    db.close()
+    client = TestClient(app)
+    token = client.post("/admin/login", json={"email": "officer@civic.test", "password": "s3cret"}).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def _walk(client, **params):
+    ids, cursor = [], None
+    while True:
+        page = client.get("/admin/work-orders", params={**params, "limit": 2, "cursor": cursor}).json()
+        assert len(page["work_orders"]) <= 2
+        ids += [wo["id"] for wo in page["work_orders"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, page["total"]
+
+
+def test_cursor_walks_every_row_once_newest_first(client):
+    ids, total = _walk(client)
+    db = SessionLocal()
+    expected = [wo.id for wo in db.query(WorkOrder).order_by(WorkOrder.created_at.desc(), WorkOrder.id.desc())]
+    db.close()
+    assert ids == expected and total == 7
+
+
+def test_cursor_respects_filters(client):
+    ids, total = _walk(client, status="completed")
+    assert len(ids) == len(set(ids)) == total == 3
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 4, 5, 6, 7, 890000)
+    assert decode_cursor(encode_cursor(created_at, "abc")) == (created_at, "abc")
+
+
+def test_garbage_cursor_is_rejected(client):
+    assert client.get("/admin/work-orders", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_total_is_counted_once_per_cache_window(client, monkeypatch):
+    counts = []
+    real_scalar = pagination.AsyncSession.scalar
+
+    async def counting_scalar(self, statement, *args, **kwargs):
+        if "count(*)" in str(statement):
+            counts.append(statement)
+        return await real_scalar(self, statement, *args, **kwargs)
+
+    monkeypatch.setattr(pagination.AsyncSession, "scalar", counting_scalar)
+    _walk(client)
+    assert len(counts) == 1
+    # exact_total bypasses the cached value
+    assert client.get("/admin/work-orders", params={"exact_total": "true"}).json()["total"] == 7
+    assert len(counts) == 2
+
+
+def test_planner_estimates_are_cached(client, monkeypatch):
+    calls = []
+
+    async def fake_estimate(db, query):
+        calls.append(query)
+        return 1000
+
+    monkeypatch.setattr(pagination, "_planner_estimate", fake_estimate)
+    for _ in range(3):
+        page = client.get("/admin/work-orders", params={"limit": 2}).json()
+        assert (page["total"], page["total_is_estimate"]) == (1000, True)
+    assert len(calls) == 1
+    page = client.get("/admin/work-orders", params={"exact_total": "true"}).json()
+    assert (page["total"], page["total_is_estimate"]) == (7, False)
+
+
+def test_explain_binds_filter_values():
+    stmt = _explain(select(WorkOrder).where(WorkOrder.status == "x'; DROP TABLE work_orders; --"))
+    compiled = stmt.compile(dialect=postgresql.asyncpg.dialect())
+    assert compiled.string.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "DROP TABLE" not in compiled.string
+    assert list(compiled.params.values()) == ["x'; DROP TABLE work_orders; --"]
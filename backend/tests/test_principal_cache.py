@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+import pytest
+from jose import jwt
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal, engine
+from app.main import app
+from app.models.user import User
+from app.services.websocket import ws_manager
+from app.utils import auth
+from app.utils.auth import PRINCIPAL_TOPIC, hash_password, on_backplane_message, user_from_token
+
+
+@pytest.fixture
+def officer(tables, monkeypatch):
+    auth._principal_cache.clear()
+    monkeypatch.setattr(ws_manager.backplane, "_handlers", [on_backplane_message])
+    db = SessionLocal()
+    user = User(email="officer@civic.test", name="Officer", role="officer", password_hash=hash_password("s3cret"))
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    yield user_id
+    auth._principal_cache.clear()
+
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def _login(client):
+    response = await client.post("/admin/login", json={"email": "officer@civic.test", "password": "s3cret"})
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+@pytest.mark.asyncio
+async def test_backplane_message_drops_another_workers_change(officer):
+    async with _client() as client:
+        await _login(client)
+        assert (await client.get("/admin/work-orders")).status_code == 200
+        # Demoted by another worker: no ORM event fires in this process
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE users SET role = 'citizen' WHERE id = :id"), {"id": officer})
+        assert (await client.get("/admin/work-orders")).status_code == 200  # still cached
+
+        await ws_manager.backplane.publish(PRINCIPAL_TOPIC, {"user_ids": [officer]})
+        assert (await client.get("/admin/work-orders")).status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_committed_change_is_published(officer, monkeypatch):
+    published = []
+
+    async def record(topic, message):
+        published.append((topic, message))
+
+    monkeypatch.setattr(ws_manager.backplane, "_handlers", [record])
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, officer)
+        user.role = "citizen"
+        await db.flush()
+        await db.rollback()
+        await asyncio.sleep(0)
+        assert published == []
+
+        user = await db.get(User, officer)
+        user.role = "citizen"
+        await db.commit()
+        await asyncio.sleep(0)
+    assert published == [(PRINCIPAL_TOPIC, {"user_ids": [officer]})]
+
+
+@pytest.mark.asyncio
+async def test_trusted_claims_carry_the_full_principal(officer, monkeypatch):
+    monkeypatch.setattr(settings, "auth_trust_token_claims", True)
+    async with _client() as client:
+        await _login(client)
+        token = client.headers["Authorization"].split()[1]
+
+    user = await user_from_token(token, db=None)  # no lookup at all
+    assert (user.id, user.email, user.name, user.role, user.tenant_id) == (
+        officer, "officer@civic.test", "Officer", "officer", None,
+    )
+
+    # A token issued before the extra claims existed falls back to the database
+    legacy = jwt.encode({"sub": officer, "role": "officer", "tenant_id": None, "iat": 1},
+                        settings.secret_key, algorithm=settings.algorithm)
+    async with AsyncSessionLocal() as db:
+        user = await user_from_token(legacy, db)
+    assert (user.email, user.name) == ("officer@civic.test", "Officer")
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import asyncpg
+import pytest
+
+from app import database
+from app.services.pubsub import PG_CHANNEL, PostgresBackplane
+from app.services.websocket import WebSocketManager
+from tests.test_websocket import FakeSocket
+
+
+class FakeListenConnection:
+    """Just enough of asyncpg.Connection for the LISTEN loop."""
+
+    def __init__(self):
+        self.listeners, self.terminators, self.closed = {}, [], False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def add_termination_listener(self, callback):
+        self.terminators.append(callback)
+
+    async def execute(self, sql):
+        return "SELECT 1"
+
+    async def close(self):
+        self.closed = True
+
+    def notify(self, topic, message):
+        payload = json.dumps({"topic": topic, "message": message})
+        self.listeners[PG_CHANNEL](self, 1, PG_CHANNEL, payload)
+
+    def drop(self):
+        for callback in self.terminators:
+            callback(self)
+
+
+async def _wait_for(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_listener_delivers_in_order_and_reconnects(monkeypatch):
+    connections = []
+
+    async def connect(dsn):
+        assert dsn.startswith("postgresql://")
+        connections.append(FakeListenConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    received = []
+
+    async def handler(topic, message):
+        received.append((topic, message["n"]))
+
+    backplane = PostgresBackplane("postgresql+asyncpg://civic:pw@db/civicai")
+    backplane.subscribe(handler)
+    await backplane.start()
+    try:
+        await asyncio.wait_for(_wait_for(lambda: connections and PG_CHANNEL in connections[0].listeners), 5)
+        for n in range(3):
+            connections[0].notify("CIV-1", {"n": n})
+        connections[0].drop()
+        await asyncio.wait_for(_wait_for(lambda: len(connections) == 2 and PG_CHANNEL in connections[1].listeners), 5)
+        connections[1].notify("CIV-2", {"n": 3})
+        await asyncio.wait_for(_wait_for(lambda: len(received) == 4), 5)
+    finally:
+        await backplane.close()
+    assert received == [("CIV-1", 0), ("CIV-1", 1), ("CIV-1", 2), ("CIV-2", 3)]
+    assert connections[0].closed and connections[1].closed
+
+
+class FakeNotifyEngine:
+    """Stands in for the async engine: pg_notify reaches every open LISTEN connection, like the server would."""
+
+    def __init__(self, listeners):
+        self.listeners = listeners
+
+    def connect(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params):
+        assert params["channel"] == PG_CHANNEL
+        event = json.loads(params["payload"])
+        for conn in self.listeners:
+            if not conn.closed:
+                conn.notify(event["topic"], event["message"])
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_update_published_on_one_worker_reaches_sockets_on_another(monkeypatch):
+    connections = []
+
+    async def connect(dsn):
+        connections.append(FakeListenConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    monkeypatch.setattr(database, "async_engine", FakeNotifyEngine(connections))
+
+    workers = []
+    for _ in range(2):
+        manager = WebSocketManager()
+        manager.backplane = PostgresBackplane("postgresql://civic:pw@db/civicai")
+        manager.backplane.subscribe(manager._deliver)
+        await manager.start()
+        workers.append(manager)
+    here, there = FakeSocket(), FakeSocket()
+    try:
+        await asyncio.wait_for(_wait_for(lambda: len(connections) == 2
+                                         and all(PG_CHANNEL in c.listeners for c in connections)), 5)
+        await workers[0].connect("CIV-1", here)
+        await workers[1].connect("CIV-1", there)
+
+        await workers[0].send_update("CIV-1", {"type": "status_update", "status": "assigned"})
+        await asyncio.wait_for(_wait_for(lambda: here.sent and there.sent), 5)
+    finally:
+        for manager in workers:
+            await manager.close()
+    # Each socket gets the update exactly once, the publisher's own included
+    assert here.sent == there.sent == [{"type": "status_update", "status": "assigned"}]
@@ -0,0 +1,97 @@
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import READ_YOUR_WRITES_COOKIE, Base, ReplicaRouter, _Replica, engine, replica_router
+from app.main import app
+from app.models.complaint import Complaint
+from app.services.email import email_service
+
+
+@pytest.fixture
+def replica(tables, tmp_path, monkeypatch):
+    """One replica on its own SQLite file, plugged into the app's router."""
+    url = f"sqlite:///{tmp_path}/replica.db"
+    sync = create_engine(url)
+    Base.metadata.create_all(bind=sync)
+    replica = _Replica(0, url)
+    replica.lag = 0.0
+    replica.sync_engine = sync
+    monkeypatch.setattr(replica_router, "replicas", [replica])
+    yield replica
+    sync.dispose()
+
+
+def _file(bind, status):
+    with Session(bind) as db:
+        db.add(Complaint(tracking_id="CIV-RYW", citizen_email="c@example.com", description="Pothole", status=status))
+        db.commit()
+
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def _status(client):
+    response = await client.get("/complaints/track/CIV-RYW")
+    return response.status_code, response.json().get("status")
+
+
+@pytest.mark.asyncio
+async def test_lag_check_skips_unreachable_and_lagging_replicas(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "replica_max_lag_seconds", 5.0)
+    router = ReplicaRouter([f"sqlite:///{tmp_path}/up.db", f"sqlite:///{tmp_path}/missing/dir/down.db"])
+    try:
+        await router.start()
+        up, down = router.replicas
+        assert up.lag == 0.0 and down.lag is None
+        assert {router.pick().name for _ in range(4)} == {up.name}
+
+        up.lag = 30.0  # fell behind
+        assert router.pick() is None
+        assert router.stats()[up.name] == {"lag_seconds": 30.0, "usable": False}
+    finally:
+        await router.close()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_the_replica_until_the_client_writes(replica, monkeypatch):
+    _file(engine, "resolved")  # the primary is ahead
+    _file(replica.sync_engine, "submitted")
+
+    async def sent(email, otp, db=None):
+        return True
+
+    monkeypatch.setattr(email_service, "send_otp", sent)
+    async with _client() as client:
+        assert await _status(client) == (200, "submitted")
+
+        write = await client.post("/complaints/verify-email", json={"email": "c@example.com"})
+        assert write.status_code == 200
+        assert READ_YOUR_WRITES_COOKIE in write.cookies
+        assert await _status(client) == (200, "resolved")
+    await replica.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_tracking_falls_back_to_the_primary_before_replication(replica):
+    _file(engine, "submitted")  # not on the replica yet
+    async with _client() as client:
+        assert await _status(client) == (200, "submitted")
+        assert (await client.get("/complaints/track/CIV-NOPE")).status_code == 404
+    await replica.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_no_cookie_without_replicas(tables, monkeypatch):
+    monkeypatch.setattr(replica_router, "replicas", [])
+
+    async def sent(email, otp, db=None):
+        return True
+
+    monkeypatch.setattr(email_service, "send_otp", sent)
+    async with _client() as client:
+        write = await client.post("/complaints/verify-email", json={"email": "c@example.com"})
+    assert write.status_code == 200 and READ_YOUR_WRITES_COOKIE not in write.cookies
@@ -0,0 +1,115 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.complaint import Complaint
+from app.models.complaint_rollup import ComplaintRollup
+from app.services import rollups
+
+
+@pytest.fixture
+def db(tables, monkeypatch):
+    monkeypatch.setattr(rollups, "_older_cursor", None)
+    monkeypatch.setattr(settings, "rollup_reconcile_recent_days", 3)
+    monkeypatch.setattr(settings, "rollup_reconcile_slice_days", 30)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def _complaint(days_ago=0, **fields):
+    return Complaint(
+        tracking_id=f"CIV-{uuid.uuid4().hex[:8]}", citizen_email="c@example.com", description="Pothole",
+        category=fields.pop("category", "roads"), status=fields.pop("status", "submitted"),
+        created_at=datetime.now(timezone.utc) - timedelta(days=days_ago), **fields,
+    )
+
+
+def _buckets(db) -> dict:
+    db.expire_all()
+    return {(r.day, r.category, r.status): r.count for r in db.query(ComplaintRollup) if r.count}
+
+
+def _expected(db) -> dict:
+    counts = {}
+    for c in db.query(Complaint):
+        key = (rollups._day(c.created_at), c.category or "", c.status)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def test_listener_moves_complaints_between_buckets(db):
+    a, b = _complaint(), _complaint()
+    db.add_all([a, b])
+    db.commit()
+    today = datetime.now(timezone.utc).date()
+    assert _buckets(db) == {(today, "roads", "submitted"): 2}
+
+    a.status = "resolved"
+    db.commit()
+    assert _buckets(db) == {(today, "roads", "submitted"): 1, (today, "roads", "resolved"): 1}
+
+    db.delete(b)
+    db.commit()
+    assert _buckets(db) == {(today, "roads", "resolved"): 1}
+
+
+def test_listener_changes_roll_back_with_the_transaction(db):
+    db.add(_complaint())
+    db.flush()
+    db.rollback()
+    assert _buckets(db) == {}
+
+
+def test_reconcile_repairs_bulk_updates(db):
+    db.add_all([_complaint(), _complaint(days_ago=1)])
+    db.commit()
+    db.execute(update(Complaint).values(status="closed"))  # bypasses the listener
+    db.commit()
+    assert _buckets(db) != _expected(db)
+
+    assert rollups.reconcile(db) == 4  # two buckets emptied, two filled
+    assert _buckets(db) == _expected(db)
+    assert rollups.reconcile(db) == 0
+    assert db.query(ComplaintRollup).filter(ComplaintRollup.count == 0).count() == 0
+
+
+def test_reconcile_walks_older_history_a_slice_per_run(db):
+    db.add_all([_complaint(days_ago=1), _complaint(days_ago=40), _complaint(days_ago=100)])
+    db.commit()
+    db.execute(update(Complaint).values(category="water"))
+    db.commit()
+
+    assert rollups.reconcile(db) == 2  # recent days, plus days 3-32 which hold nothing
+    assert rollups.reconcile(db) == 2  # days 33-62
+    assert rollups.reconcile(db) == 0  # days 63-92
+    assert rollups.reconcile(db) == 2  # days 93-122 reach the oldest complaint
+    assert _buckets(db) == _expected(db)
+    assert rollups._older_cursor < rollups._day(datetime.now(timezone.utc) - timedelta(days=100))
+    rollups.reconcile(db)
+    assert rollups._older_cursor == datetime.now(timezone.utc).date() - timedelta(days=33)  # wrapped
+
+
+def test_repair_keeps_deltas_committed_after_the_read(db):
+    db.add(_complaint())
+    db.commit()
+    db.execute(update(Complaint).values(category="water"))
+    db.commit()
+
+    drift = rollups._drift(db, None, None)
+    db.commit()
+    # Another request files a complaint between reconcile's read and its write
+    other = SessionLocal()
+    other.add(_complaint(category="water"))
+    other.commit()
+    other.close()
+
+    rollups._write(db.connection(), drift)
+    db.commit()
+    assert _buckets(db) == _expected(db)
+    today = datetime.now(timezone.utc).date()
+    assert _buckets(db) == {(today, "water", "submitted"): 2}
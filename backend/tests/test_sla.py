@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.agents import tracker
+from app.database import AsyncSessionLocal
+from app.models.complaint import Complaint
+from app.models.contractor import Contractor
+from app.models.escalation import Escalation
+from app.models.work_order import WorkOrder
+from app.services.email import email_service
+
+SLA = timedelta(hours=10)
+
+
+@pytest.fixture
+def sent(tables, monkeypatch):
+    messages = []
+
+    async def send_status_update(email, tracking_id, status, complaint_id=None, db=None):
+        messages.append(status)
+        return True
+
+    monkeypatch.setattr(email_service, "send_status_update", send_status_update)
+    return messages
+
+
+async def _order(elapsed: timedelta, spare_contractor=True) -> str:
+    """A work order whose SLA started ``elapsed`` ago, due for its next milestone."""
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        current = Contractor(name="Current", active_workload=1)
+        db.add(current)
+        if spare_contractor:
+            db.add(Contractor(name="Spare", rating=4.0))
+        complaint = Complaint(tracking_id="CIV-SLA", citizen_email="c@example.com", description="Pothole",
+                              status="assigned")
+        db.add(complaint)
+        await db.flush()
+        order = WorkOrder(complaint_id=complaint.id, contractor_id=current.id, status="assigned",
+                          created_at=now - elapsed, sla_deadline=now - elapsed + SLA)
+        order.next_milestone_at = tracker.next_sla_milestone(order)
+        db.add(order)
+        await db.commit()
+        return order.id
+
+
+async def _sweep(order_id) -> WorkOrder:
+    async with AsyncSessionLocal() as db:
+        await tracker.check_sla_deadlines(db)
+        return await db.get(WorkOrder, order_id)
+
+
+@pytest.mark.asyncio
+async def test_half_way_sends_the_early_warning(sent):
+    order = await _sweep(await _order(timedelta(hours=6)))
+    assert sent == ["Your complaint is being actively worked on — SLA deadline approaching"]
+    assert (order.sla_warned_50, order.sla_warned_75) == (True, False)
+    assert order.next_milestone_at == order.created_at + SLA * 0.75
+
+    await _sweep(order.id)  # not due again until 75%
+    assert len(sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_three_quarters_supersedes_a_missed_half_way_warning(sent):
+    order = await _sweep(await _order(timedelta(hours=8)))
+    assert sent == ["SLA warning — escalating priority"]
+    assert (order.sla_warned_50, order.sla_warned_75) == (True, True)
+    assert order.next_milestone_at == order.sla_deadline
+
+
+@pytest.mark.asyncio
+async def test_breach_reassigns_and_rearms_the_milestones(sent):
+    order = await _sweep(await _order(timedelta(hours=11)))
+    async with AsyncSessionLocal() as db:
+        spare_id = await db.scalar(select(Contractor.id).where(Contractor.name == "Spare"))
+        complaint = await db.get(Complaint, order.complaint_id)
+        escalations = (await db.scalars(select(Escalation))).all()
+    assert order.contractor_id == spare_id and complaint.status == "escalated" and len(escalations) == 1
+    assert order.sla_deadline == order.escalated_at + SLA
+    assert (order.sla_warned_50, order.sla_warned_75) == (False, False)
+    assert order.next_milestone_at == order.escalated_at + SLA * 0.5
+
+    # Six hours into the new contractor's window the half-way warning goes out again
+    async with AsyncSessionLocal() as db:
+        row = await db.get(WorkOrder, order.id)
+        row.escalated_at -= timedelta(hours=6)
+        row.sla_deadline -= timedelta(hours=6)
+        row.next_milestone_at -= timedelta(hours=6)
+        await db.commit()
+    order = await _sweep(order.id)
+    assert sent[-1] == "Your complaint is being actively worked on — SLA deadline approaching"
+    assert order.sla_warned_50 and not order.sla_warned_75
+
+
+@pytest.mark.asyncio
+async def test_breach_without_a_spare_contractor_is_final(sent):
+    order = await _sweep(await _order(timedelta(hours=11), spare_contractor=False))
+    assert order.escalated_at is not None and order.next_milestone_at is None
+    assert len(sent) == 1
+    await _sweep(order.id)
+    assert len(sent) == 1
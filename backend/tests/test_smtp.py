@@ -0,0 +1,86 @@
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.config import settings
+from app.services.smtp import SMTPPool
+
+
+class _Sink:
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content.decode())
+        self.peers.add(session.peer)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    handler = _Sink()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", controller.port)
+    monkeypatch.setattr(settings, "smtp_user", "")
+    monkeypatch.setattr(settings, "smtp_use_tls", False)
+    yield handler
+    controller.stop()
+
+
+def _message(n: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"], msg["To"], msg["Subject"] = "noreply@civicai.gov", "citizen@example.com", f"Update {n}"
+    msg.set_content("Your complaint has been updated.")
+    return msg
+
+
+@pytest.mark.asyncio
+async def test_sends_reuse_a_pooled_connection(sink):
+    pool = SMTPPool(size=2, timeout=5, keepalive_seconds=0)
+    try:
+        for n in range(3):
+            assert await pool.send(_message(n))
+    finally:
+        await pool.close()
+    assert [m.split("Subject: ")[1].splitlines()[0] for m in sink.messages] == ["Update 0", "Update 1", "Update 2"]
+    assert len(sink.peers) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_connect_is_retried(sink):
+    pool = SMTPPool(size=1, timeout=5, keepalive_seconds=0)
+    connect, calls = pool._connect, []
+
+    async def flaky_connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionRefusedError("server restarting")
+        return await connect()
+
+    pool._connect = flaky_connect
+    try:
+        assert await pool.send(_message(0))
+    finally:
+        await pool.close()
+    assert len(calls) == 2 and len(sink.messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_the_second_failure(monkeypatch):
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", _free_port())  # nothing listening
+    pool = SMTPPool(size=1, timeout=2, keepalive_seconds=0)
+    with pytest.raises(Exception):
+        await pool.send(_message(0))
+    assert pool._slots._value == 1  # the slot is released
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import DateTime, select
+from sqlalchemy.dialects import postgresql
+
+from app.database import Base, UTCDateTime
+from app.models.kv_entry import KVEntry
+from app.models.notification import Notification
+
+ASYNCPG = postgresql.asyncpg.dialect()
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _bound_params(stmt) -> dict:
+    """Parameters exactly as SQLAlchemy would hand them to asyncpg."""
+    compiled = stmt.compile(dialect=ASYNCPG)
+    processors = compiled._bind_processors
+    return {name: processors[name](value) if name in processors else value
+            for name, value in compiled.params.items()}
+
+
+def test_every_timestamp_column_normalises_to_utc():
+    plain = [f"{table.name}.{column.name}" for table in Base.metadata.sorted_tables for column in table.columns
+             if isinstance(column.type, DateTime) and not isinstance(column.type, UTCDateTime)]
+    assert plain == []
+
+
+def test_aware_comparisons_reach_asyncpg_as_naive_utc():
+    now = datetime(2026, 10, 19, 17, 30, tzinfo=IST)
+    params = _bound_params(select(KVEntry).where(KVEntry.expires_at > now))
+    [value] = params.values()
+    assert value == datetime(2026, 10, 19, 12, 0) and value.tzinfo is None
+
+
+def test_aware_inserts_and_defaults_reach_asyncpg_as_naive_utc():
+    row = Notification.__table__.insert().values(
+        recipient_email="a@b.c", notification_type="general", message="hi", status="pending", attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+        created_at=Notification.__table__.c.created_at.default.arg(None),
+    )
+    timestamps = [v for v in _bound_params(row).values() if isinstance(v, datetime)]
+    assert len(timestamps) == 2 and all(v.tzinfo is None for v in timestamps)
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.media import media_service
+
+
+@pytest.fixture
+def client(tables):
+    return TestClient(app)
+
+
+def _create(client, size):
+    response = client.post("/complaints/uploads", json={"filename": "note.mp3", "size": size})
+    assert response.status_code == 201
+    return response.json()["upload_id"]
+
+
+def _patch(client, upload_id, offset, body):
+    return client.patch(f"/complaints/uploads/{upload_id}", content=body, headers={"Upload-Offset": str(offset)})
+
+
+def _final_bytes(client, upload_id):
+    response = client.post(f"/complaints/uploads/{upload_id}/finalize")
+    assert response.status_code == 200
+    return (media_service.upload_dir / f"upload_{upload_id}.mp3").read_bytes()
+
+
+def test_chunks_resume_from_server_offset(client):
+    upload_id = _create(client, 10)
+    assert _patch(client, upload_id, 0, b"hello").headers["Upload-Offset"] == "5"
+    assert client.head(f"/complaints/uploads/{upload_id}").headers["Upload-Offset"] == "5"
+
+    stale = _patch(client, upload_id, 0, b"hello")
+    assert stale.status_code == 409
+    assert "5" in stale.json()["detail"]
+
+    assert _patch(client, upload_id, 5, b"world").status_code == 200
+    assert _final_bytes(client, upload_id) == b"helloworld"
+
+
+def test_chunk_past_declared_size_is_rejected(client):
+    upload_id = _create(client, 4)
+    assert _patch(client, upload_id, 0, b"too long").status_code == 400
+    assert client.post(f"/complaints/uploads/{upload_id}/finalize").status_code == 409
+
+
+def test_uncommitted_tail_is_truncated(client):
+    upload_id = _create(client, 10)
+    _patch(client, upload_id, 0, b"hello")
+    # A PATCH that wrote bytes but died before committing its offset
+    with open(media_service._partial_path(upload_id), "ab") as f:
+        f.write(b"XXXXXXXXXXXX")
+
+    assert client.head(f"/complaints/uploads/{upload_id}").headers["Upload-Offset"] == "5"
+    assert _patch(client, upload_id, 5, b"world").status_code == 200
+    assert _final_bytes(client, upload_id) == b"helloworld"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_patches_at_same_offset_append_once(tables):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        created = await client.post("/complaints/uploads", json={"filename": "note.mp3", "size": 8})
+        upload_id = created.json()["upload_id"]
+
+        async def body(data: bytes):
+            yield data[:2]
+            await asyncio.sleep(0.05)  # keep the first PATCH mid-stream while the second arrives
+            yield data[2:]
+
+        responses = await asyncio.gather(*(
+            client.patch(f"/complaints/uploads/{upload_id}", content=body(data), headers={"Upload-Offset": "0"})
+            for data in (b"aaaa", b"bbbb")
+        ))
+        assert sorted(r.status_code for r in responses) == [200, 409]
+        winner = next(r for r in responses if r.status_code == 200)
+        assert winner.headers["Upload-Offset"] == "4"
+        assert media_service._partial_path(upload_id).read_bytes() in (b"aaaa", b"bbbb")
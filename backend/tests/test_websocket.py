@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.websocket import WebSocketManager, admin_topic
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_admin_topics_never_reach_citizen_sockets():
+    manager = WebSocketManager()
+    citizen, admin = FakeSocket(), FakeSocket()
+    await manager.connect(admin_topic("t1"), citizen)  # a tracking ID that looks like an admin topic
+    await manager.connect_admin("t1", admin)
+
+    await manager.send_update(admin_topic("t1"), {"type": "complaint.created"})
+    await _drain()
+
+    assert citizen.sent == []
+    assert admin.sent == [{"type": "complaint.created"}]
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_updates_reach_only_their_tracking_id():
+    manager = WebSocketManager()
+    mine, other = FakeSocket(), FakeSocket()
+    await manager.connect("CIV-1", mine, snapshot={"type": "snapshot"})
+    await manager.connect("CIV-2", other)
+
+    await manager.send_update("CIV-1", {"type": "status_update"})
+    await _drain()
+
+    assert mine.sent == [{"type": "snapshot"}, {"type": "status_update"}]
+    assert other.sent == []
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_check_only_drops_clients_that_ping(monkeypatch):
+    monkeypatch.setattr(settings, "ws_idle_timeout_seconds", 60)
+    manager = WebSocketManager()
+    listener, pinger = FakeSocket(), FakeSocket()
+    listen_conn = await manager.connect("CIV-1", listener)
+    ping_conn = await manager.connect("CIV-1", pinger)
+    manager.received(ping_conn, "ping")
+    await _drain()
+    assert pinger.sent == [{"type": "pong"}]
+
+    stale = time.monotonic() - 120
+    listen_conn.last_seen = ping_conn.last_seen = stale
+    await manager.close_idle()
+
+    assert listener.close_code is None
+    assert pinger.close_code is not None
+    assert manager.stats()["connections"] == 1
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_disconnected(monkeypatch):
+    monkeypatch.setattr(settings, "ws_send_queue_size", 2)
+    manager = WebSocketManager()
+    conn = await manager.connect("CIV-1", FakeSocket())
+    conn.writer.cancel()  # nothing drains the queue
+    for n in range(3):
+        manager.enqueue(conn, {"n": n})
+    assert conn.closed
+    assert manager.counters["slow_consumer_disconnects"] == 1
+    await manager.close()
@@ -1,8 +1,8 @@
 import { useState, useEffect } from 'react';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { Link, useNavigate } from 'react-router-dom';
 import { getAdminComplaints, updateComplaint } from '../../services/api';
-import type { Complaint } from '../../types';
+import type { ComplaintPage } from '../../types';
 
 const statusColor: Record<string, string> = {
   submitted: 'bg-gray-100 text-gray-700',
@@ -38,13 +38,18 @@ export default function AdminComplaints() {
 
   const queryClient = useQueryClient();
 
-  const { data, isLoading, isError } = useQuery<Complaint[]>({
+  // The API returns pages of 50; "Load more" continues from the last page's cursor
+  const { data, isLoading, isError, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: ['adminComplaints', params],
-    queryFn: async () => {
-      const res = await getAdminComplaints(params);
-      return res.data.complaints;
+    queryFn: async ({ pageParam }) => {
+      const res = await getAdminComplaints(params, pageParam);
+      return res.data as ComplaintPage;
     },
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
   });
+  const complaints = data?.pages.flatMap((page) => page.complaints) ?? [];
+  const firstPage = data?.pages[0];
 
   const statusMutation = useMutation({
     mutationFn: ({ id, status }: { id: string; status: string }) =>
@@ -137,12 +142,12 @@ export default function AdminComplaints() {
               </tr>
             </thead>
             <tbody>
-              {(data || []).length === 0 ? (
+              {complaints.length === 0 ? (
                 <tr>
                   <td colSpan={6} className="text-center text-gray-400 py-12">No complaints found</td>
                 </tr>
               ) : (
-                (data || []).map((c) => (
+                complaints.map((c) => (
                   <tr
                     key={c.id}
                     onClick={() => navigate(`/admin/complaints/${c.id}`)}
@@ -169,6 +174,22 @@ export default function AdminComplaints() {
               )}
             </tbody>
           </table>
+          {firstPage && complaints.length > 0 && (
+            <div className="flex items-center justify-between px-4 py-3 border-t border-gray-200 text-sm text-gray-500">
+              <span>
+                Showing {complaints.length} of {firstPage.total_is_estimate ? '~' : ''}{firstPage.total}
+              </span>
+              {hasNextPage && (
+                <button
+                  onClick={() => fetchNextPage()}
+                  disabled={isFetchingNextPage}
+                  className="px-3 py-1 border border-gray-300 rounded-lg bg-white hover:bg-gray-50 disabled:opacity-60"
+                >
+                  {isFetchingNextPage ? 'Loading...' : 'Load more'}
+                </button>
+              )}
+            </div>
+          )}
         </div>
       )}
     </div>
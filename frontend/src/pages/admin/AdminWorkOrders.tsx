@@ -1,8 +1,8 @@
 import { useState, useEffect } from 'react';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { Link, useNavigate } from 'react-router-dom';
 import { getWorkOrders, updateWorkOrder, uploadCompletionPhoto, API_BASE_URL } from '../../services/api';
-import type { WorkOrder } from '../../types';
+import type { WorkOrder, WorkOrderPage } from '../../types';
 
 const statusColor: Record<string, string> = {
   created: 'bg-gray-100 text-gray-700',
@@ -26,13 +26,18 @@ export default function AdminWorkOrders() {
     if (!localStorage.getItem('admin_token')) navigate('/admin/login');
   }, [navigate]);
 
-  const { data, isLoading, isError } = useQuery<WorkOrder[]>({
+  // The API returns pages of 50; "Load more" continues from the last page's cursor
+  const { data, isLoading, isError, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: ['adminWorkOrders', filterStatus],
-    queryFn: async () => {
-      const res = await getWorkOrders(filterStatus || undefined);
-      return res.data.work_orders;
+    queryFn: async ({ pageParam }) => {
+      const res = await getWorkOrders(filterStatus || undefined, pageParam);
+      return res.data as WorkOrderPage;
     },
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
   });
+  const orders = data?.pages.flatMap((page) => page.work_orders) ?? [];
+  const firstPage = data?.pages[0];
 
   const statusMutation = useMutation({
     mutationFn: ({ id, status }: { id: string; status: string }) =>
@@ -133,12 +138,12 @@ export default function AdminWorkOrders() {
               </tr>
             </thead>
             <tbody>
-              {(data || []).length === 0 ? (
+              {orders.length === 0 ? (
                 <tr>
                   <td colSpan={7} className="text-center text-gray-400 py-12">No work orders found</td>
                 </tr>
               ) : (
-                (data || []).map((wo) => (
+                orders.map((wo) => (
                   <tr key={wo.id} className="border-b border-gray-100 hover:bg-gray-50">
                     <td className="px-4 py-3 font-mono text-xs">{wo.complaint_id.slice(0, 8)}...</td>
                     <td className="px-4 py-3">{wo.contractor_id ? wo.contractor_id.slice(0, 8) + '...' : 'Unassigned'}</td>
@@ -217,6 +222,22 @@ export default function AdminWorkOrders() {
               )}
             </tbody>
           </table>
+          {firstPage && orders.length > 0 && (
+            <div className="flex items-center justify-between px-4 py-3 border-t border-gray-200 text-sm text-gray-500">
+              <span>
+                Showing {orders.length} of {firstPage.total_is_estimate ? '~' : ''}{firstPage.total}
+              </span>
+              {hasNextPage && (
+                <button
+                  onClick={() => fetchNextPage()}
+                  disabled={isFetchingNextPage}
+                  className="px-3 py-1 border border-gray-300 rounded-lg bg-white hover:bg-gray-50 disabled:opacity-60"
+                >
+                  {isFetchingNextPage ? 'Loading...' : 'Load more'}
+                </button>
+              )}
+            </div>
+          )}
         </div>
       )}
 
@@ -2,7 +2,9 @@ import axios from 'axios';
 
 export const API_BASE_URL = 'http://localhost:8000';
 
-const api = axios.create({ baseURL: API_BASE_URL });
+// withCredentials: the API sets a read-your-writes cookie after writes, and the
+// browser only stores and returns it for a cross-origin API when asked to
+const api = axios.create({ baseURL: API_BASE_URL, withCredentials: true });
 
 // Attach admin token to every /admin request
 api.interceptors.request.use((config) => {
@@ -42,11 +44,12 @@ export const getMyComplaints = (email: string) => api.get(`/complaints/my?email=
 export const getPublicDashboard = (tenantId?: string, state?: string, district?: string, category?: string) =>
   api.get('/public/dashboard', { params: { tenant_id: tenantId, state, district, category } });
 export const adminLogin = (email: string, password: string) => api.post('/admin/login', { email, password });
-export const getAdminComplaints = (params?: Record<string, string>) => api.get('/admin/complaints', { params });
+export const getAdminComplaints = (params?: Record<string, string>, cursor?: string) =>
+  api.get('/admin/complaints', { params: { ...params, cursor } });
 export const updateComplaint = (id: string, data: Record<string, unknown>) => api.patch(`/admin/complaints/${id}`, data);
 export const getAdminComplaintDetail = (id: string) => api.get(`/admin/complaints/${id}`);
 export const approveComplaintEmail = (id: string, emailDraft: string) => api.post(`/admin/complaints/${id}/approve-email`, { email_draft: emailDraft });
-export const getWorkOrders = (status?: string) => api.get('/admin/work-orders', { params: { status } });
+export const getWorkOrders = (status?: string, cursor?: string) => api.get('/admin/work-orders', { params: { status, cursor } });
 export const updateWorkOrder = (id: string, data: Record<string, unknown>) => api.patch(`/admin/work-orders/${id}`, data);
 export const getAnalytics = () => api.get('/admin/analytics');
 export const getPerformanceMetrics = () => api.get('/admin/analytics/performance');
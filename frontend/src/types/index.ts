@@ -41,6 +41,20 @@ export interface WorkOrder {
   completion_photo: string | null;
 }
 
+export interface ComplaintPage {
+  complaints: Complaint[];
+  total: number;
+  total_is_estimate: boolean;
+  next_cursor: string | null;
+}
+
+export interface WorkOrderPage {
+  work_orders: WorkOrder[];
+  total: number;
+  total_is_estimate: boolean;
+  next_cursor: string | null;
+}
+
 export interface Contractor {
   id: string;
   name: string;